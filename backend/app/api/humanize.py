@@ -1,8 +1,24 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from pydantic import BaseModel
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
 import os
+from time import perf_counter
+from app.core.config import settings
 from app.services.humanizer import humanizer
+from app.services.incremental import incremental_humanizer, SeedRequiredError, UnknownJobError
+from app.services.job_queue import Job, job_queue
+from app.services.job_workers import JOB_HANDLERS, job_workers
+from app.services.model_runtime import model_runtime
+from app.services.model_registry import model_registry
+from app.services.embedding_cache import embedding_cache
+from app.services.safe_regex import regex_guard
+from app.services.stage_cache import stage_cache
+from app.services.streaming import humanize_events, humanize_upload_stream
+from app.services.text_scoring import text_scorer
 
 router = APIRouter()
 
@@ -12,6 +28,7 @@ class HumanizeRequest(BaseModel):
     education_level: str = "undergraduate"  # elementary, middle_school, high_school, undergraduate, masters, phd
     paranoid_mode: bool = True  # Extra aggressive coherence disruption for GPTZero & SurferSEO
     writehuman_mode: bool = True  # WriteHuman mimicry for SurferSEO final strike
+    seed: Optional[int] = None  # makes stage outputs reusable: a rerun with other downstream options resumes from cache
 
 class HumanizeResponse(BaseModel):
     original_text: str
@@ -21,6 +38,8 @@ class HumanizeResponse(BaseModel):
     ai_detection_score_before: float
     ai_detection_score_after: float
     readability_improvement: float
+    readability_before: Optional[dict] = None
+    readability_after: Optional[dict] = None
     education_level: Optional[str] = None
     gemini_humanized_text: Optional[str] = None
     meaning_preserved: Optional[bool] = None
@@ -43,6 +62,7 @@ async def humanize_text(request: HumanizeRequest):
     Pipeline Types: comprehensive, standard, quick, advanced
     Paranoid Mode: Extra aggressive coherence disruption for GPTZero & SurferSEO evasion
     WriteHuman Mode: Mimics WriteHuman.ai's approach to reduce SurferSEO detection from 52% to <20%
+    Seed: Optional; a rerun with the same text and seed reuses cached stages up to the first changed option
     """
     # Validate input
     is_valid, error_message = humanizer.validate_input(request.text)
@@ -56,7 +76,8 @@ async def humanize_text(request: HumanizeRequest):
             request.pipeline_type, 
             request.education_level,
             request.paranoid_mode,
-            request.writehuman_mode
+            request.writehuman_mode,
+            request.seed
         )
         
         return HumanizeResponse(**result)
@@ -64,6 +85,331 @@ async def humanize_text(request: HumanizeRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing text: {str(e)}")
 
+@router.post("/text/stream")
+async def humanize_text_stream(request: HumanizeRequest, format: str = "ndjson"):
+    """
+    Humanize text, streaming progress events while the pipeline runs
+    
+    Same request body as /text. The response is a stream of JSON events, as
+    NDJSON (one object per line, the default) or, with ?format=sse, as
+    server-sent events (the event type as "event:", the object as "data:"):
+    
+    - started: word_count, education_level
+    - stage_started / stage_finished: stage, variant, and when finished
+      elapsed_ms, cached, and the text of the paraphrased and gemini_humanized stages
+    - partial: index and text; the texts of all partial events concatenate to
+      the humanized text (sent as shards finish on sharded runs, otherwise
+      paragraph by paragraph once the pipeline is done)
+    - result: the HumanizeResponse of /text
+    - error: detail, if the pipeline failed
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or sse")
+    is_valid, error_message = humanizer.validate_input(request.text)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_message)
+    
+    async def body():
+        async for event in humanize_events(request.text, request.pipeline_type, request.education_level,
+                                           request.paranoid_mode, request.writehuman_mode, request.seed):
+            if event["event"] == "result":
+                event = {"event": "result", "result": HumanizeResponse(**event["result"]).model_dump()}
+            data = json.dumps(event)
+            yield f"event: {event['event']}\ndata: {data}\n\n" if format == "sse" else data + "\n"
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    # No buffering by proxies, so events reach the client as they're sent
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+class MultiLevelHumanizeRequest(BaseModel):
+    text: str
+    education_levels: List[str] = list(humanizer.educational_engine.level_configs)
+    pipeline_type: str = "comprehensive"
+    paranoid_mode: bool = True
+    writehuman_mode: bool = True
+    seed: Optional[int] = None
+
+class MultiLevelHumanizeResponse(BaseModel):
+    original_text: str
+    paraphrased_text: str
+    gemini_humanized_text: Optional[str] = None
+    variants: Dict[str, HumanizeResponse]
+    processing_time_ms: int
+
+@router.post("/levels", response_model=MultiLevelHumanizeResponse)
+async def humanize_levels(request: MultiLevelHumanizeRequest):
+    """
+    Humanize one text for several education levels in one request
+    
+    Paraphrasing and Gemini humanization run once; the per-level stages
+    (Step 3 on) run as parallel branches from their shared output. Every
+    variant comes back under its level in "variants".
+    
+    Example:
+    {
+        "text": "The artificial intelligence system demonstrates remarkable capabilities in natural language processing.",
+        "education_levels": ["elementary", "high_school", "phd"]
+    }
+    """
+    is_valid, error_message = humanizer.validate_input(request.text)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_message)
+    levels = list(dict.fromkeys(request.education_levels))
+    unknown = [level for level in levels if level not in humanizer.educational_engine.level_configs]
+    if not levels or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown or missing education levels: {unknown}")
+    
+    start_time = perf_counter()
+    try:
+        results = await run_in_threadpool(humanizer.humanize_levels, request.text, levels, request.pipeline_type,
+                                          request.paranoid_mode, request.writehuman_mode, request.seed)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing text: {str(e)}")
+    
+    first = results[levels[0]]
+    return MultiLevelHumanizeResponse(
+        original_text=request.text,
+        paraphrased_text=first["paraphrased_text"],
+        gemini_humanized_text=first.get("gemini_humanized_text"),
+        variants={level: HumanizeResponse(**result) for level, result in results.items()},
+        processing_time_ms=int((perf_counter() - start_time) * 1000)
+    )
+
+class IncrementalHumanizeRequest(BaseModel):
+    text: str
+    previous_job_id: Optional[str] = None  # job_id of an earlier incremental run of this document
+    previous_text: Optional[str] = None  # or the earlier text itself, with that run's seed (reuse via the stage cache)
+    education_level: str = "undergraduate"
+    paranoid_mode: bool = True
+    writehuman_mode: bool = True
+    seed: Optional[int] = None  # default: the previous job's seed, or a new one
+
+class ParagraphChange(BaseModel):
+    op: str  # equal, replace, insert or delete
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+
+class ParagraphResult(BaseModel):
+    text: str
+    humanized_text: str
+    reused: bool
+
+class IncrementalHumanizeResponse(BaseModel):
+    job_id: str
+    seed: int
+    original_text: str
+    humanized_text: str
+    education_level: str
+    diff: List[ParagraphChange]
+    paragraphs: List[ParagraphResult]
+    reused_paragraphs: int
+    processed_paragraphs: int
+    ai_detection_score_before: float
+    ai_detection_score_after: float
+    readability_improvement: float
+    readability_before: Optional[dict] = None
+    readability_after: Optional[dict] = None
+    processing_time_ms: int
+
+@router.post("/incremental", response_model=IncrementalHumanizeResponse)
+async def humanize_incremental(request: IncrementalHumanizeRequest):
+    """
+    Re-humanize an edited document, paying only for the edited paragraphs
+    
+    The first run (no previous_job_id) humanizes every paragraph and returns a
+    job_id. Send the edited text with that job_id and only new or changed
+    paragraphs go through the pipeline again; the others reuse their earlier
+    output. "diff" lists the paragraph operations from the previous text to
+    this one, as index ranges into both.
+    
+    Jobs live in the job queue's shared store for INCREMENTAL_JOB_TTL seconds,
+    so the follow-up can go to any server worker. Once the job has expired,
+    send previous_text together with the seed the earlier run returned
+    instead: unchanged paragraphs then come from the stage cache. That cache is
+    per worker process, so this fallback only saves work when the request
+    reaches the worker that ran the earlier text. previous_text without a seed
+    is rejected (400), since a new seed would rerun every paragraph.
+    
+    Example:
+    {
+        "text": "First paragraph, unchanged.\n\nSecond paragraph, now edited.",
+        "previous_job_id": "3f2a...",
+        "education_level": "undergraduate"
+    }
+    """
+    is_valid, error_message = humanizer.validate_input(request.text)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_message)
+    if request.education_level not in humanizer.educational_engine.level_configs:
+        raise HTTPException(status_code=400, detail=f"Unknown education level: {request.education_level}")
+    
+    try:
+        result = await run_in_threadpool(incremental_humanizer.humanize, request.text, request.previous_job_id,
+                                         request.previous_text, request.education_level, request.paranoid_mode,
+                                         request.writehuman_mode, request.seed)
+    except UnknownJobError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {request.previous_job_id}")
+    except SeedRequiredError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing text: {str(e)}")
+    
+    return IncrementalHumanizeResponse(**result)
+
+class JobRequest(BaseModel):
+    text: str
+    education_levels: Optional[List[str]] = None  # several levels: runs like /levels instead of /text
+    pipeline_type: str = "comprehensive"
+    education_level: str = "undergraduate"
+    paranoid_mode: bool = True
+    writehuman_mode: bool = True
+    seed: Optional[int] = None
+    priority: int = 0  # -100 to 100, higher runs first
+    max_attempts: Optional[int] = None  # default JOB_MAX_ATTEMPTS
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued, running, succeeded or failed
+    priority: int
+    attempts: int
+    max_attempts: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+    error: Optional[str] = None  # last error; set on failed jobs and on jobs waiting for a retry
+    result: Optional[Dict[str, Any]] = None  # a HumanizeResponse, or {"variants": {level: HumanizeResponse}}
+
+def job_response(job: Job) -> JobResponse:
+    result = None
+    if job.result is not None:
+        if job.kind == "levels":
+            result = {"variants": {level: HumanizeResponse(**variant).model_dump()
+                                   for level, variant in job.result.items()}}
+        else:
+            result = HumanizeResponse(**job.result).model_dump()
+    return JobResponse(job_id=job.id, kind=job.kind, status=job.status, priority=job.priority,
+                       attempts=job.attempts, max_attempts=job.max_attempts, created_at=job.created_at,
+                       started_at=job.started_at, finished_at=job.finished_at, expires_at=job.expires_at,
+                       error=job.error, result=result)
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(request: JobRequest):
+    """
+    Queue a humanization run and return its job id right away
+    
+    The run happens on a pipeline worker, independently of this request;
+    poll GET /jobs/{job_id} for its status and result. Higher priority jobs
+    run first. A run that fails is retried (with backoff) up to max_attempts.
+    With education_levels the job runs like /levels, otherwise like /text.
+    
+    Example:
+    {
+        "text": "The artificial intelligence system demonstrates remarkable capabilities in natural language processing.",
+        "education_level": "high_school",
+        "priority": 10
+    }
+    """
+    is_valid, error_message = humanizer.validate_input(request.text)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_message)
+    payload = request.model_dump(exclude={"priority", "max_attempts"})
+    if request.education_levels is not None:
+        levels = list(dict.fromkeys(request.education_levels))
+        unknown = [level for level in levels if level not in humanizer.educational_engine.level_configs]
+        if not levels or unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown or missing education levels: {unknown}")
+        kind, payload["education_levels"] = "levels", levels
+    else:
+        kind = "text"
+        del payload["education_levels"]
+    
+    job = await run_in_threadpool(job_queue.enqueue, kind, payload, request.priority, request.max_attempts)
+    job_workers.wake()
+    return job_response(job)
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = 0):
+    """
+    Status of a queued job, with its result once it has succeeded
+    
+    With ?wait=N (seconds, up to JOB_MAX_WAIT) the request long-polls: it
+    returns as soon as the job has finished, or after N seconds with its
+    current status. Finished jobs are kept for JOB_RESULT_TTL seconds; after
+    that (or for an unknown id) the response is 404.
+    """
+    deadline = perf_counter() + min(max(wait, 0), settings.JOB_MAX_WAIT)
+    while True:
+        job = await run_in_threadpool(job_queue.get, job_id)
+        if job is None or job.kind not in JOB_HANDLERS:  # incremental runs are stored there too
+            raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+        remaining = deadline - perf_counter()
+        if job.finished or remaining <= 0:
+            return job_response(job)
+        await asyncio.sleep(min(settings.JOB_POLL_INTERVAL, remaining))
+
+class ScoreRequest(BaseModel):
+    texts: List[str]
+    per_sentence: bool = False
+
+class SentenceScore(BaseModel):
+    text: str
+    word_count: int
+    ai_likeness: float
+    perplexity: Optional[float] = None
+    syllables_per_word: Optional[float] = None
+
+class TextScore(BaseModel):
+    word_count: int
+    sentence_count: int
+    ai_likeness: float
+    perplexity: float
+    raw_perplexity: Optional[float] = None
+    burstiness: Optional[float] = None
+    burstiness_percentile: Optional[float] = None
+    readability: dict
+    sentences: Optional[List[SentenceScore]] = None
+
+class ScoreResponse(BaseModel):
+    results: List[TextScore]
+    processing_time_ms: int
+
+@router.post("/score", response_model=ScoreResponse)
+async def score_texts(request: ScoreRequest):
+    """
+    Score texts without humanizing them
+    
+    Returns, per text: AI-likeness (0-1, local n-gram classifier), perplexity
+    (0-100 percentile against human reference text), raw language model
+    perplexity, burstiness and readability statistics (Flesch-Kincaid,
+    sentence lengths, syllables). With per_sentence, each text also gets
+    AI-likeness, perplexity and syllables per word for every sentence.
+    
+    Example:
+    {
+        "texts": ["The artificial intelligence system demonstrates remarkable capabilities.", "We got lost on the way to the lake."],
+        "per_sentence": false
+    }
+    """
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="No texts provided")
+    if len(request.texts) > settings.SCORE_MAX_TEXTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.SCORE_MAX_TEXTS} texts per request")
+    if sum(len(text) for text in request.texts) > settings.SCORE_MAX_CHARACTERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.SCORE_MAX_CHARACTERS} characters per request")
+    
+    start_time = perf_counter()
+    try:
+        # CPU-bound: keep it off the event loop
+        results = await run_in_threadpool(text_scorer.score_batch, request.texts, request.per_sentence)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scoring texts: {str(e)}")
+    
+    return ScoreResponse(results=results, processing_time_ms=int((perf_counter() - start_time) * 1000))
+
 @router.post("/file")
 async def humanize_file(
     file: UploadFile = File(...), 
@@ -75,7 +421,7 @@ async def humanize_file(
     """
     Humanize text from uploaded file with advanced algorithms
     
-    Supports: .txt files (up to 5MB)
+    Supports: .txt files (up to MAX_FILE_SIZE, 5MB by default; use /file/stream for larger ones)
     Education Levels: elementary, middle_school, high_school, undergraduate, masters, phd
     Pipeline Types: comprehensive, standard, quick, advanced
     Paranoid Mode: Extra aggressive coherence disruption for GPTZero & SurferSEO evasion
@@ -85,25 +431,15 @@ async def humanize_file(
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
     
-    # Check file size (5MB limit)
-    max_size = 5 * 1024 * 1024
-    if file.size and file.size > max_size:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File size exceeds maximum allowed size of 5MB"
-        )
+    # Check file size
+    check_upload(file, settings.MAX_FILE_SIZE)
     
-    # Check file type
-    file_extension = os.path.splitext(file.filename)[1].lower()
-    if file_extension != '.txt':
-        raise HTTPException(
-            status_code=400,
-            detail="Only .txt files are supported for MVP"
-        )
+    # Read at most one byte past the limit, in case the size wasn't known up front
+    content = await file.read(settings.MAX_FILE_SIZE + 1)
+    if len(content) > settings.MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail=f"File size exceeds maximum allowed size of {format_size(settings.MAX_FILE_SIZE)}")
     
     try:
-        # Read file content
-        content = await file.read()
         text = content.decode('utf-8')
         
         # Validate text content
@@ -122,6 +458,54 @@ async def humanize_file(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
+@router.post("/file/stream")
+async def humanize_file_stream(
+    file: UploadFile = File(...),
+    education_level: str = "undergraduate",
+    paranoid_mode: bool = True,
+    writehuman_mode: bool = True,
+    seed: Optional[int] = None
+):
+    """
+    Humanize a large .txt file as a stream
+    
+    The upload is read and decoded in chunks and split into paragraphs as it
+    arrives; each paragraph goes through the pipeline on its own and its
+    output is streamed back (text/plain) as soon as it's ready. Memory use
+    depends on the paragraph size, not the file size. Files up to
+    STREAM_MAX_FILE_SIZE (100MB by default) are accepted. Paragraph breaks are
+    kept; there is no minimum word count.
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    check_upload(file, settings.STREAM_MAX_FILE_SIZE)
+    if education_level not in humanizer.educational_engine.level_configs:
+        raise HTTPException(status_code=400, detail=f"Unknown education level: {education_level}")
+    
+    stem = os.path.splitext(os.path.basename(file.filename))[0]
+    return StreamingResponse(
+        humanize_upload_stream(file, education_level, paranoid_mode, writehuman_mode, seed),
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{stem}_humanized.txt"'}
+    )
+
+def check_upload(file: UploadFile, max_size: int):
+    """Reject non-.txt uploads and uploads known to be over max_size (0 = no limit)"""
+    if max_size and file.size and file.size > max_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size exceeds maximum allowed size of {format_size(max_size)}"
+        )
+    file_extension = os.path.splitext(file.filename)[1].lower()
+    if file_extension != '.txt':
+        raise HTTPException(
+            status_code=400,
+            detail="Only .txt files are supported for MVP"
+        )
+
+def format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):g}MB"
+
 @router.get("/health")
 async def health_check():
     """
@@ -135,6 +519,12 @@ async def health_check():
             "text_humanization",
             "file_upload",
             "ai_detection_scoring",
+            "batch_scoring",
+            "multi_level_fanout",
+            "incremental_rehumanization",
+            "streaming_file_upload",
+            "progress_streaming",
+            "background_jobs",
             "readability_analysis",
             "stylometric_masking",
             "pegasus_paraphrasing",
@@ -161,7 +551,13 @@ async def health_check():
             "standard", 
             "quick",
             "advanced"
-        ]
+        ],
+        "model_runtime": model_runtime.get_stats(),
+        "models": model_registry.get_stats(),
+        "embedding_cache": embedding_cache.get_stats(),
+        "regex_guard": regex_guard.get_stats(),
+        "stage_cache": stage_cache.get_stats(),
+        "jobs": job_workers.get_stats()
     }
 
 @router.get("/demo")
@@ -39,8 +39,82 @@ class Settings(BaseSettings):
     MAX_TEXT_LENGTH: int = 10000
     PROCESSING_TIMEOUT: int = 30  # seconds
     
+    # Local model runtime (Pegasus / sentence-transformers)
+    WEB_CONCURRENCY: int = 1  # worker processes per host, used to size thread pools
+    MODEL_INTRA_OP_THREADS: int = 0  # 0 = cpu_count // WEB_CONCURRENCY
+    MODEL_INTER_OP_THREADS: int = 1
+    MODEL_EXECUTOR_WORKERS: int = 1  # dedicated threads for model calls
+    PRELOAD_MODELS: bool = True  # load models in the gunicorn master and share them with forked workers
+    
+    # Sentence-embedding cache
+    EMBEDDING_CACHE_CAPACITY: int = 50000  # sentences
+    EMBEDDING_CACHE_DTYPE: str = "float16"  # float16 or int8
+    EMBEDDING_CACHE_PATH: str = ""  # file prefix for a persistent memory-mapped cache, empty = in-memory
+    
+    # Lexical pre-filter in front of the semantic similarity checks
+    SEMANTIC_PREFILTER_ENABLED: bool = True
+    SEMANTIC_PREFILTER_ACCEPT: float = 0.95  # lexical similarity >= this: accept without the model
+    SEMANTIC_PREFILTER_REJECT: float = 0.30  # lexical similarity <= this: reject without the model
+    
+    # Apply the sentence-level rules of the rule-based stages in one fused traversal
+    FUSED_SENTENCE_ENGINE: bool = False
+    
+    # Adjust education level in a measured loop that stops once the text is in the level's band
+    ITERATIVE_LEVEL_TARGETING: bool = False
+    
+    # Threads for the per-level branches of a multi-level (fan-out) request
+    LEVEL_FANOUT_WORKERS: int = 4
+    
+    # Memoize stage outputs, so a request that only changes downstream options resumes from cached upstream stages
+    STAGE_CACHE_ENABLED: bool = True
+    STAGE_CACHE_MAX_MB: int = 64
+    
+    # Seconds finished incremental runs are kept for later edits of the same document (/api/humanize/incremental),
+    # in the job queue's store so every server worker can resume them
+    INCREMENTAL_JOB_TTL: int = 24 * 3600
+    
+    # Paragraph-sharded execution: the per-level rule stages of large documents run on a process pool
+    PARAGRAPH_SHARDING: bool = False
+    SHARD_WORKERS: int = 0  # 0 = cpu_count // WEB_CONCURRENCY
+    SHARD_MIN_WORDS: int = 400  # target shard size; documents under twice this run unsharded
+    SHARD_START_METHOD: str = "forkserver"  # forkserver, spawn or fork (fork copies the server's threads' state)
+    
+    # Streaming file humanization (/api/humanize/file/stream), which holds one paragraph at a time
+    STREAM_MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 0 = unlimited
+    STREAM_CHUNK_SIZE: int = 64 * 1024  # bytes read from the upload at a time
+    STREAM_MAX_PARAGRAPH_CHARS: int = 20000  # longer paragraphs are cut between sentences
+    
+    # Background jobs (/api/humanize/jobs): a durable queue drained by pipeline worker threads
+    JOB_QUEUE_BACKEND: str = "sqlite"  # sqlite (JOB_QUEUE_PATH) or redis (REDIS_URL, needs the redis package)
+    JOB_QUEUE_PATH: str = "jobs/queue.sqlite3"
+    JOB_WORKERS: int = 2  # worker threads per server process, 0 = only enqueue here
+    JOB_MAX_ATTEMPTS: int = 3  # default attempts per job, retries included
+    JOB_RETRY_BACKOFF: float = 5.0  # seconds before the first retry, doubled for each later one
+    JOB_LEASE_SECONDS: int = 600  # a running job whose worker stops renewing this long is retried
+    JOB_RESULT_TTL: int = 24 * 3600  # seconds finished jobs and their results are kept
+    JOB_POLL_INTERVAL: float = 0.5  # seconds between queue checks of idle workers and long-polls
+    JOB_MAX_WAIT: float = 30.0  # longest long-poll (?wait=) of GET /api/humanize/jobs/{id}
+    
+    # Word n-gram language model for perplexity / burstiness scoring (empty = bundled app/data/ngram_lm.npz)
+    LANGUAGE_MODEL_PATH: str = ""
+    
+    # Hashed n-gram classifier behind the ai_detection_score fields (empty = bundled app/data/ai_likeness.npz)
+    AI_LIKENESS_MODEL_PATH: str = ""
+    
+    # Optional "word syllables" table for readability scoring (empty = built-in exceptions + heuristic)
+    SYLLABLE_TABLE_PATH: str = ""
+    
+    # Limits of one /api/humanize/score request
+    SCORE_MAX_TEXTS: int = 5000
+    SCORE_MAX_CHARACTERS: int = 20 * 1024 * 1024
+    
+    # Time budgets for regex rules run over user text (0 = no per-rule timeout)
+    REGEX_RULE_TIMEOUT_MS: int = 250
+    REGEX_STAGE_BUDGET_MS: int = 2000
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
+        extra = "ignore"  # .env also carries keys read via os.getenv (e.g. GEMINI_API_KEY)
 
 settings = Settings() 
\ No newline at end of file
@@ -4,6 +4,9 @@ from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import uvicorn
 from app.api import humanize
+from app.services.embedding_cache import embedding_cache
+from app.services.job_workers import job_workers
+from app.services.sharding import shard_pool
 
 import os
 from dotenv import load_dotenv
@@ -32,8 +35,13 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting ReHumanizer API...")
     print(f"🌐 CORS Origins: {origins}")
+    job_workers.start()
     yield
     # Shutdown
+    job_workers.stop()
+    job_workers.queue.close()
+    embedding_cache.flush()
+    shard_pool.shutdown()
     print("👋 Shutting down ReHumanizer API...")
 
 app = FastAPI(
@@ -68,7 +76,13 @@ async def root():
         "endpoints": {
             "ui": "/static/index.html",
             "humanize_text": "/api/humanize/text",
+            "humanize_text_stream": "/api/humanize/text/stream",
             "humanize_file": "/api/humanize/file",
+            "humanize_file_stream": "/api/humanize/file/stream",
+            "humanize_levels": "/api/humanize/levels",
+            "humanize_incremental": "/api/humanize/incremental",
+            "humanize_jobs": "/api/humanize/jobs",
+            "score": "/api/humanize/score",
             "demo": "/api/humanize/demo",
             "health": "/api/humanize/health",
             "docs": "/docs"
@@ -0,0 +1,114 @@
+import logging
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data", "ai_likeness.npz"))
+
+NGRAM_SIZES = (3, 4, 5)
+HASH_BITS = 18  # 262144 buckets
+_MULTIPLIER = np.uint64(0x100000001B3)  # FNV-1a prime, for the rolling polynomial
+_MIX = np.uint64(0x9E3779B97F4A7C15)  # Fibonacci hashing constant, spreads keys over the top bits
+
+
+def ngram_features(texts: Sequence[str], bits: int = HASH_BITS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Hashed character n-grams of a batch of texts, without a Python loop per n-gram.
+
+    The lowercased texts are joined into one byte array and every n-gram hash
+    is a polynomial over a sliding window of it; windows that cross from one
+    text into the next are dropped.
+
+    Returns:
+        (buckets, rows, counts): bucket of every n-gram, the text it came from,
+        and the number of n-grams per text
+    """
+    encoded = [text.lower().encode("utf-8") for text in texts]
+    lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    ends = np.cumsum(lengths)
+    position_rows = np.repeat(np.arange(len(encoded)), lengths)
+    shift = np.uint64(64 - bits)
+
+    buckets, rows = [], []
+    for n in NGRAM_SIZES:
+        windows = len(data) - n + 1
+        if windows <= 0:
+            continue
+        hashes = np.full(windows, n, dtype=np.uint64)  # n seeds the hash, so sizes don't collide
+        for k in range(n):
+            hashes = hashes * _MULTIPLIER + data[k:k + windows]  # wraps modulo 2**64
+        window_rows = position_rows[:windows]
+        inside = np.arange(windows) + n <= ends[window_rows]
+        buckets.append(((hashes[inside] * _MIX) >> shift).astype(np.int64))
+        rows.append(window_rows[inside])
+
+    if not buckets:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(len(texts), dtype=np.int64)
+    rows = np.concatenate(rows)
+    return np.concatenate(buckets), rows, np.bincount(rows, minlength=len(texts))
+
+
+class AILikenessScorer:
+    """
+    Local AI-likeness score: logistic regression over hashed character n-grams.
+
+    A text's features are its n-gram frequencies (counts divided by the number
+    of n-grams), so its logit is the bias plus the mean weight of its n-grams
+    and a batch is scored with one gather and one bincount. The weights are
+    trained offline on the bundled corpora (scripts/build_ai_likeness_model.py).
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float, bits: int = HASH_BITS):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.bits = bits
+
+    @classmethod
+    def load(cls, path: str) -> "AILikenessScorer":
+        with np.load(path, allow_pickle=False) as tables:
+            return cls(tables["weights"], float(tables["bias"]), int(tables["bits"]))
+
+    def save(self, path: str):
+        np.savez_compressed(path, weights=self.weights, bias=np.float64(self.bias), bits=np.int64(self.bits))
+
+    def logits(self, texts: Sequence[str]) -> np.ndarray:
+        buckets, rows, counts = ngram_features(texts, self.bits)
+        totals = np.bincount(rows, weights=self.weights[buckets], minlength=len(texts))
+        return self.bias + totals / np.maximum(counts, 1)
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Probability that each text is AI-written (0-1)"""
+        if not len(texts):
+            return np.zeros(0)
+        return 1.0 / (1.0 + np.exp(-self.logits(texts)))
+
+    def score(self, text: str) -> float:
+        return float(self.score_batch([text])[0])
+
+
+def load_ai_likeness_scorer() -> Optional[AILikenessScorer]:
+    path = settings.AI_LIKENESS_MODEL_PATH or DEFAULT_MODEL_PATH
+    try:
+        scorer = AILikenessScorer.load(path)
+        logger.info(f"✅ AI-likeness scorer loaded: {len(scorer.weights)} features")
+        return scorer
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"⚠️ AI-likeness scorer unavailable ({path}): {e}")
+        return None
+
+
+def ai_likeness_scores(texts: List[str]) -> List[float]:
+    """Scores of texts, or a neutral 0.5 for each when no model is available"""
+    if ai_likeness_scorer is None:
+        return [0.5] * len(texts)
+    return ai_likeness_scorer.score_batch(texts).tolist()
+
+
+ai_likeness_scorer = load_ai_likeness_scorer()
+AI_LIKENESS_AVAILABLE = ai_likeness_scorer is not None
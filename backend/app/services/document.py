@@ -0,0 +1,256 @@
+import functools
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# A sentence ends at ., ! or ? followed by whitespace; the whitespace is kept as its separator
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])(\s+)')
+# Paragraphs are separated by blank lines
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+
+
+def count_words(text: str) -> int:
+    """Whitespace-delimited word count, the pipeline's definition of a word"""
+    return len(text.split())
+
+
+def split_paragraphs(text: str) -> Tuple[List[str], List[str]]:
+    """Non-empty paragraphs of a text (split on blank lines), and the whitespace between consecutive ones"""
+    paragraphs, separators = [], []
+    position = 0
+    for match in PARAGRAPH_BREAK.finditer(text):
+        paragraph = text[position:match.start()].strip()
+        if paragraph:
+            paragraphs.append(paragraph)
+            separators.append(match.group())
+        position = match.end()
+    last = text[position:].strip()
+    if last:
+        paragraphs.append(last)
+    elif separators:
+        separators.pop()
+    return paragraphs, separators
+
+
+def join_paragraphs(paragraphs: List[str], separators: List[str]) -> str:
+    return "".join(p + s for p, s in zip(paragraphs, separators)) + (paragraphs[-1] if paragraphs else "")
+
+
+class Document:
+    """
+    Sentence-level representation of a text, shared by the rule-based stages.
+
+    The text is split once into sentences and the whitespace separators between
+    them (so paragraph breaks survive), with the word count of every sentence
+    kept in an array (grown geometrically, so rebuilding a document one append
+    at a time stays linear) and the document total maintained on every edit. Stages
+    edit sentences in place; only edited sentences are re-split and re-counted,
+    and the text itself is only materialized when asked for.
+    """
+
+    def __init__(self, sentences: Iterable[str] = (), separators: Optional[Iterable[str]] = None,
+                 counts: Optional[Sequence[int]] = None):
+        """
+        Args:
+            sentences: Sentences without surrounding whitespace
+            separators: Whitespace between consecutive sentences (default: one space)
+            counts: Word count of every sentence, if already known
+        """
+        self.sentences: List[str] = list(sentences)
+        self.separators: List[str] = list(separators) if separators is not None else [" "] * max(len(self.sentences) - 1, 0)
+        if counts is None:
+            counts = [count_words(sentence) for sentence in self.sentences]
+        self._counts = np.asarray(counts, dtype=np.int32).reshape(-1)
+        self.word_count = int(self._counts.sum())
+        self._text: Optional[str] = None
+        self._spans: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "Document":
+        parts = SENTENCE_BOUNDARY.split(text.strip())
+        if parts == [""]:
+            return cls()
+        return cls(parts[0::2], parts[1::2])
+
+    @classmethod
+    def coerce(cls, value: Union[str, "Document"]) -> "Document":
+        """The document itself, or a new one parsed from a string"""
+        return value if isinstance(value, Document) else cls.from_text(value)
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sentences)
+
+    def __getitem__(self, i: int) -> str:
+        return self.sentences[i]
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"Document({len(self.sentences)} sentences, {self.word_count} words)"
+
+    @property
+    def text(self) -> str:
+        """The materialized text (cached until the next edit)"""
+        if self._text is None:
+            parts = [self.sentences[0]] if self.sentences else []
+            for separator, sentence in zip(self.separators, self.sentences[1:]):
+                parts.append(separator)
+                parts.append(sentence)
+            self._text = "".join(parts)
+        return self._text
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Word count per sentence (read-only view)"""
+        view = self._counts.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def _counts(self) -> np.ndarray:
+        """Word count per sentence: the used part of the count buffer"""
+        return self._buffer[:len(self.sentences)]
+
+    @_counts.setter
+    def _counts(self, counts):
+        self._buffer = np.asarray(counts, dtype=np.int32).reshape(-1)
+
+    def count(self, i: int) -> int:
+        return int(self._counts[i])
+
+    def separator_before(self, i: int) -> str:
+        """Whitespace preceding sentence i (a single space for the first sentence)"""
+        if i < 0:
+            i += len(self.sentences)
+        return self.separators[i - 1] if i > 0 else " "
+
+    def set_separator_before(self, i: int, separator: str):
+        if i < 0:
+            i += len(self.sentences)
+        self.separators[i - 1] = separator
+        self._changed()
+
+    def spans(self) -> np.ndarray:
+        """(start, end) character offsets of every sentence in the text, from prefix sums"""
+        if self._spans is None:
+            n = len(self.sentences)
+            lengths = np.fromiter((len(s) for s in self.sentences), dtype=np.int64, count=n)
+            gaps = np.fromiter((len(s) for s in self.separators), dtype=np.int64, count=len(self.separators))
+            starts = np.zeros(n, dtype=np.int64)
+            if n > 1:
+                starts[1:] = np.cumsum(lengths[:-1] + gaps)
+            self._spans = np.stack((starts, starts + lengths), axis=1)
+        return self._spans
+
+    def word_starts(self) -> np.ndarray:
+        """Index of the first word of every sentence within the document's words"""
+        return np.cumsum(self._counts) - self._counts
+
+    def set(self, i: int, sentence: str, count: Optional[int] = None):
+        """
+        Replace sentence i. Without a count the new text is re-split, so an edit
+        that creates (or removes) sentence boundaries keeps the document exact.
+        """
+        if i < 0:
+            i += len(self.sentences)
+        if count is None:
+            parts = SENTENCE_BOUNDARY.split(sentence.strip())
+            if len(parts) > 1 or parts == [""]:
+                sentences = parts[0::2] if parts != [""] else []
+                self._splice(i, i + 1, sentences, parts[1::2], [count_words(s) for s in sentences])
+                return
+            sentence = parts[0]
+            count = count_words(sentence)
+        self.word_count += count - int(self._counts[i])
+        self._counts[i] = count
+        self.sentences[i] = sentence
+        self._changed()
+
+    def append(self, sentence: str, count: Optional[int] = None, separator: str = " "):
+        """Append one sentence, preceded by separator"""
+        if self.sentences:
+            self.separators.append(separator)
+        count = count_words(sentence) if count is None else count
+        n = len(self.sentences)
+        if n == len(self._buffer):
+            grown = np.empty(max(8, 2 * n), dtype=np.int32)
+            grown[:n] = self._buffer[:n]
+            self._buffer = grown
+        self._buffer[n] = count
+        self.sentences.append(sentence)
+        self.word_count += count
+        self._changed()
+
+    def map(self, fn: Callable[[str], str]) -> "Document":
+        """Apply fn to every sentence in order, updating only the sentences it changed"""
+        changed = []
+        for i, sentence in enumerate(self.sentences):
+            new_sentence = fn(sentence)
+            if new_sentence != sentence:
+                changed.append((i, new_sentence))
+        # Back to front, so a re-split sentence doesn't shift the ones still to update
+        for i, new_sentence in reversed(changed):
+            self.set(i, new_sentence)
+        return self
+
+    def permute(self, order: Sequence[int]):
+        """Reorder the sentences; separators stay where they are"""
+        self.sentences = [self.sentences[j] for j in order]
+        self._counts = self._counts[np.asarray(order, dtype=np.intp)]
+        self._changed()
+
+    def assign(self, other: "Document") -> "Document":
+        """Take over the content of another document (in place)"""
+        self.sentences = other.sentences
+        self.separators = other.separators
+        self._counts = other._counts
+        self.word_count = other.word_count
+        self._changed()
+        return self
+
+    def copy(self) -> "Document":
+        return Document(self.sentences, self.separators, self._counts.copy())
+
+    def _splice(self, start: int, stop: int, sentences: List[str], separators: List[str], counts: List[int]):
+        n = len(self.sentences)
+        old_counts = self._counts
+        self.sentences[start:stop] = sentences
+        if sentences:
+            self.separators[start:stop - 1] = separators
+        elif stop < n:
+            del self.separators[start:stop]
+        else:
+            del self.separators[max(start - 1, 0):stop - 1]
+        self._counts = np.concatenate((old_counts[:start], np.asarray(counts, dtype=np.int32), old_counts[stop:]))
+        self.word_count = int(self._counts.sum())
+        self._changed()
+
+    def _changed(self):
+        self._text = None
+        self._spans = None
+
+
+def document_stage(method):
+    """
+    Let a stage written against Document also be called with a plain string.
+
+    The wrapped method receives a Document and edits it in place. Called with a
+    Document, the stage returns what the method returned; called with a string,
+    Document results (alone or first in a tuple) are materialized back to text.
+    """
+    @functools.wraps(method)
+    def wrapper(self, text, *args, **kwargs):
+        result = method(self, Document.coerce(text), *args, **kwargs)
+        if isinstance(text, Document):
+            return result
+        if isinstance(result, Document):
+            return result.text
+        if isinstance(result, tuple) and result and isinstance(result[0], Document):
+            return (result[0].text,) + result[1:]
+        return result
+    return wrapper
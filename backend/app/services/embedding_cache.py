@@ -0,0 +1,245 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from .model_registry import SEMANTIC_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+EMPTY_KEY = 0
+
+
+class EmbeddingCache:
+    """
+    LRU cache of L2-normalized sentence embeddings keyed by (model id, sentence hash).
+
+    Vectors live in one preallocated NumPy arena stored as float16, or as int8
+    with a per-row scale, so 50k MiniLM sentences cost ~38 MB (float16) or
+    ~19 MB (int8). With a path the arena is a memory-mapped file, mapped by the
+    first lookup in each process, so a restarted worker starts warm. A forked
+    process never reuses its parent's mapping: only one process at a time owns
+    the file, the others cache in memory.
+    """
+
+    def __init__(self, model_id: str, capacity: int = 50000, dtype: str = "float16",
+                 path: Optional[str] = None):
+        """
+        Args:
+            model_id (str): Embedding model name, part of every key
+            capacity (int): Maximum number of cached sentences
+            dtype (str): "float16" or "int8" (int8 stores a float32 scale per row)
+            path (str): Optional file prefix for a persistent memory-mapped arena
+        """
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.model_id = model_id
+        self.capacity = max(1, capacity)
+        self.dtype = dtype
+        self.path = path or None
+        self.persistent = False
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[int, int]" = OrderedDict()  # key -> arena row, in LRU order
+        self._free: List[int] = []
+        self._lock_file = None
+        # Allocated on first store, once the embedding dimension is known,
+        # or on the first lookup from a persistent arena's metadata
+        self.dim: Optional[int] = None
+        self._vectors = None
+        self._scales = None
+        self._keys = None
+        self._arena_pid: Optional[int] = None  # process the persistent arena was opened in
+
+    def _ensure_arena(self):
+        """
+        Open the persistent arena in this process (called under the lock). Not
+        done at import: a preloading master would fork workers sharing one
+        MAP_SHARED arena, each with its own index of its rows.
+        """
+        if not self.path or self._arena_pid == os.getpid():
+            return
+        if self._arena_pid is not None:
+            self._release_arena()  # inherited across a fork
+        self._arena_pid = os.getpid()
+        dim = self._persisted_dim()
+        if dim:
+            self._allocate(dim)
+
+    def _release_arena(self):
+        if self._lock_file:
+            self._lock_file.close()  # our copy only; the parent keeps its lock
+            self._lock_file = None
+        self._slots = OrderedDict()
+        self._free = []
+        self.dim = None
+        self._vectors = self._scales = self._keys = None
+        self.persistent = False
+
+    def _meta(self, dim: int) -> Dict[str, object]:
+        return {"model_id": self.model_id, "dim": dim, "dtype": self.dtype, "capacity": self.capacity}
+
+    def _persisted_dim(self) -> Optional[int]:
+        """Embedding dimension of a persistent arena written by this configuration, if any"""
+        try:
+            with open(f"{self.path}.meta.json") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        dim = meta.get("dim") if isinstance(meta, dict) else None
+        return dim if isinstance(dim, int) and meta == self._meta(dim) else None
+
+    def _key(self, text: str) -> int:
+        digest = hashlib.blake2b(f"{self.model_id}\0{text}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1  # 0 marks an empty row
+
+    def _allocate(self, dim: int):
+        self.dim = dim
+        storage = np.int8 if self.dtype == "int8" else np.float16
+        if self.path and self._open_persistent(dim, storage):
+            return
+        self._vectors = np.zeros((self.capacity, dim), dtype=storage)
+        self._scales = np.ones(self.capacity, dtype=np.float32)
+        self._keys = np.zeros(self.capacity, dtype=np.uint64)
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def _open_persistent(self, dim: int, storage) -> bool:
+        """Map the arena from disk. Only one process may own the files at a time."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._lock_file = open(f"{self.path}.lock", "w")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Another worker owns the persistent arena; this one caches in memory only
+            logger.info(f"Embedding cache file {self.path} in use, using an in-memory arena")
+            if self._lock_file:
+                self._lock_file.close()
+                self._lock_file = None
+            return False
+
+        meta = self._meta(dim)
+        meta_path = f"{self.path}.meta.json"
+        reuse = False
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                reuse = json.load(f) == meta
+        mode = "r+" if reuse else "w+"
+        open_memmap = np.lib.format.open_memmap
+        self._vectors = open_memmap(f"{self.path}.vectors.npy", mode=mode, dtype=storage, shape=(self.capacity, dim))
+        self._scales = open_memmap(f"{self.path}.scales.npy", mode=mode, dtype=np.float32, shape=(self.capacity,))
+        self._keys = open_memmap(f"{self.path}.keys.npy", mode=mode, dtype=np.uint64, shape=(self.capacity,))
+        if not reuse:
+            self._keys[:] = EMPTY_KEY
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+
+        used = np.flatnonzero(self._keys != EMPTY_KEY)
+        self._slots = OrderedDict((int(self._keys[row]), int(row)) for row in used)
+        self._free = [int(row) for row in np.flatnonzero(self._keys == EMPTY_KEY)[::-1]]
+        self.persistent = True
+        logger.info(f"✅ Embedding cache mapped from {self.path} ({len(self._slots)} warm entries)")
+        return True
+
+    def _quantize(self, vector: np.ndarray):
+        if self.dtype == "int8":
+            scale = float(np.abs(vector).max()) / 127.0 or 1.0
+            return np.round(vector / scale).astype(np.int8), scale
+        return vector.astype(np.float16), 1.0
+
+    def _store(self, key: int, stored: np.ndarray, scale: float):
+        if key in self._slots:
+            row = self._slots[key]
+        elif self._free:
+            row = self._free.pop()
+        else:
+            _, row = self._slots.popitem(last=False)
+            self.evictions += 1
+        self._vectors[row] = stored
+        self._scales[row] = scale
+        self._keys[row] = key
+        self._slots[key] = row
+
+    def get_or_encode(self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return L2-normalized float32 embeddings for texts, calling encode_fn once
+        (batched) for the distinct texts that are not cached yet.
+        """
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+
+        keys = [self._key(text) for text in texts]
+        found = {}
+        missing = {}
+        with self._lock:
+            self._ensure_arena()
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    self.hits += 1  # duplicate within the batch, looked up once
+                elif key in self._slots and self._keys[self._slots[key]] == key:
+                    row = self._slots[key]
+                    self._slots.move_to_end(key)
+                    vector = self._vectors[row].astype(np.float32)
+                    found[key] = vector * self._scales[row] if self.dtype == "int8" else vector
+                    self.hits += 1
+                else:
+                    # A row the index points at but that now holds another key is stale
+                    self._slots.pop(key, None)
+                    missing[key] = text
+                    self.misses += 1
+
+        if missing:
+            embeddings = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+            with self._lock:
+                if self._vectors is None:
+                    self._allocate(embeddings.shape[1])
+                for key, vector in zip(missing, embeddings):
+                    stored, scale = self._quantize(vector)
+                    self._store(key, stored, scale)
+                    # Serve the compact representation for misses too, so results
+                    # don't depend on whether a sentence was cached
+                    found[key] = stored.astype(np.float32) * scale
+
+        return np.stack([found[key] for key in keys])
+
+    def flush(self):
+        """Write dirty pages of a persistent arena to disk."""
+        with self._lock:
+            if self.persistent and self._arena_pid == os.getpid():
+                for array in (self._vectors, self._scales, self._keys):
+                    array.flush()
+
+    def get_stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        arena_bytes = sum(a.nbytes for a in (self._vectors, self._scales, self._keys) if a is not None)
+        return {
+            "model_id": self.model_id,
+            "dtype": self.dtype,
+            "entries": len(self._slots),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_bytes": arena_bytes,
+            "persistent_path": self.path if self.persistent else None
+        }
+
+
+embedding_cache = EmbeddingCache(
+    SEMANTIC_MODEL_NAME,
+    capacity=settings.EMBEDDING_CACHE_CAPACITY,
+    dtype=settings.EMBEDDING_CACHE_DTYPE,
+    path=settings.EMBEDDING_CACHE_PATH
+)
@@ -1,7 +1,6 @@
-import random
-import re
 import logging
 import numpy as np
+from collections import Counter
 from typing import List, Tuple, Dict, Optional
 
 # Try to import sentence transformers (optional dependency)
@@ -12,6 +11,15 @@ except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
     SentenceTransformer = None
 
+from .model_runtime import model_runtime
+from .model_registry import model_registry
+from .embedding_cache import embedding_cache
+from .lexicon import Lexicon
+from .document import Document, document_stage, count_words
+from .lexical_similarity import LexicalPrefilter, ACCEPT, REJECT, AMBIGUOUS
+from .rng import request_random
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 class EnhancedWriteHumanMimic:
@@ -20,26 +28,31 @@ class EnhancedWriteHumanMimic:
     Balances undetectability with readability and coherence.
     """
     
-    def __init__(self, aggressiveness=0.25, semantic_threshold=0.85, seed=None):
+    def __init__(self, aggressiveness=0.25, semantic_threshold=0.85):
         """
         Args:
             aggressiveness (float): 0.2-0.3 for balanced approach (lower = more readable)
             semantic_threshold (float): Minimum cosine similarity to preserve (0.85+ recommended)
-            seed (int): For reproducibility
         """
         self.aggressiveness = aggressiveness
         self.semantic_threshold = semantic_threshold
-        if seed is not None:
-            random.seed(seed)
         
         # Initialize semantic similarity model
         self.semantic_model = None
+        self.embedding_cache = embedding_cache
+        self.lexical_prefilter = None
+        if settings.SEMANTIC_PREFILTER_ENABLED:
+            # The bands never decide a pair outright against what the threshold would decide
+            self.lexical_prefilter = LexicalPrefilter(
+                accept_above=max(settings.SEMANTIC_PREFILTER_ACCEPT, semantic_threshold),
+                reject_below=min(settings.SEMANTIC_PREFILTER_REJECT, semantic_threshold)
+            )
         if SENTENCE_TRANSFORMERS_AVAILABLE:
-            try:
-                self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.semantic_model = model_registry.get("semantic")
+            if self.semantic_model is not None:
                 logger.info("✅ Semantic similarity model loaded successfully")
-            except Exception as e:
-                logger.warning(f"⚠️ Could not load semantic model: {e}")
+            else:
+                logger.warning("⚠️ Could not load semantic model")
         else:
             logger.info("⚠️ Sentence-transformers not available, using simplified semantic checking")
         
@@ -59,6 +72,7 @@ class EnhancedWriteHumanMimic:
             "implementation": "setup",
             "utilization": "use"
         }
+        self.strategic_lexicon = Lexicon(self.strategic_replacements)
         
         # Subtle flow breakers (reduced set for better readability)
         self.subtle_fillers = [
@@ -77,81 +91,247 @@ class EnhancedWriteHumanMimic:
             "basically"
         ]
 
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        L2-normalized embeddings for texts. Cached sentences are served from the
+        embedding cache; the rest are encoded in a single batched model call.
+        """
+        return self.embedding_cache.get_or_encode(
+            texts, lambda missing: model_runtime.run(self.semantic_model.encode, missing, convert_to_numpy=True)
+        )
+
+    def _batch_similarities(self, pairs: List[Tuple[str, str]], prefilter: bool = True) -> np.ndarray:
+        """
+        Cosine similarity for every (original, candidate) pair with one encode call.
+        
+        With the lexical pre-filter, pairs that are clearly above or below the
+        threshold keep their lexical score and only the ambiguous ones are encoded.
+        """
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+        if not self.semantic_model:
+            return np.ones(len(pairs), dtype=np.float32)  # Assume perfect similarity if model unavailable
+        
+        similarities = np.ones(len(pairs), dtype=np.float32)
+        pending = np.arange(len(pairs))
+        if prefilter and self.lexical_prefilter:
+            lexical = self.lexical_prefilter.batch_similarity(pairs)
+            decisions = self.lexical_prefilter.decide(lexical, self.semantic_threshold)
+            similarities = lexical.astype(np.float32)
+            pending = np.flatnonzero(decisions == AMBIGUOUS)
+            if not len(pending):
+                return similarities
+        
+        try:
+            pending_pairs = [pairs[i] for i in pending]
+            # Each distinct text is encoded once, however many pairs it appears in
+            unique_texts = list(dict.fromkeys(text for pair in pending_pairs for text in pair))
+            index = {text: i for i, text in enumerate(unique_texts)}
+            embeddings = self._encode(unique_texts)
+            left = embeddings[[index[a] for a, _ in pending_pairs]]
+            right = embeddings[[index[b] for _, b in pending_pairs]]
+            # Row-wise dot products of normalized vectors = cosine similarities
+            similarities[pending] = np.einsum("ij,ij->i", left, right)
+        except Exception as e:
+            logger.warning(f"⚠️ Similarity calculation failed: {e}")
+            similarities[pending] = 1.0
+        return similarities
+
     def _calculate_semantic_similarity(self, original: str, modified: str) -> float:
         """Calculate semantic similarity between original and modified text"""
+        return float(self._batch_similarities([(original, modified)], prefilter=False)[0])
+
+    def _document_similarity(self, original, modified) -> float:
+        """
+        Document similarity from sentence embeddings: cosine of the summed
+        sentence vectors of both texts (str or Document), encoded together in one call.
+        """
         if not self.semantic_model:
-            return 1.0  # Assume perfect similarity if model unavailable
+            return 1.0
         
         try:
-            embeddings = self.semantic_model.encode([original, modified])
-            similarity = np.dot(embeddings[0], embeddings[1]) / (
-                np.linalg.norm(embeddings[0]) * np.linalg.norm(embeddings[1])
-            )
-            return float(similarity)
+            original_sentences = Document.coerce(original).sentences
+            modified_sentences = Document.coerce(modified).sentences
+            embeddings = self._encode(original_sentences + modified_sentences)
+            original_doc = embeddings[:len(original_sentences)].sum(axis=0)
+            modified_doc = embeddings[len(original_sentences):].sum(axis=0)
+            return self._cosine(original_doc, modified_doc)
         except Exception as e:
             logger.warning(f"⚠️ Similarity calculation failed: {e}")
             return 1.0
 
-    def _apply_strategic_synonyms(self, text: str) -> Tuple[str, List[str]]:
-        """Apply strategic synonym replacements with semantic checking"""
+    @staticmethod
+    def _apply_rows(neural: dict, touched: dict, offset: int):
+        """Add an accepted swap's deltas to the (composed) vectors of the sentences it touched"""
+        for j, i in enumerate(touched):
+            neural["rows"][i] += neural["candidates"][offset + j] - neural["base"][i]
+
+    @staticmethod
+    def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.dot(a, b) / max(np.linalg.norm(a) * np.linalg.norm(b), 1e-12))
+
+    @document_stage
+    def _apply_strategic_synonyms(self, document: Document) -> Tuple[Document, List[str]]:
+        """
+        Apply strategic synonym replacements with a sentence-local semantic guard.
+        
+        Only sentences touched by a swap are re-encoded; the document vector is
+        kept as the sum of sentence vectors and updated incrementally, so each
+        decision costs O(touched sentences) instead of a full-document encode.
+        The lexical pre-filter tracks a hashed term-frequency document vector the
+        same way, and the model is only consulted for swaps it can't decide.
+        A sentence hit by several accepted swaps is re-encoded as emitted at the
+        end, and its last swap is undone if the document then falls below the
+        threshold.
+        """
+        rng = request_random()
         changes = []
-        modified_text = text
+        sentences = list(document)
+        
+        # One lexicon scan per sentence finds every dictionary word it contains
+        found = [self.strategic_lexicon.find(sentence) for sentence in sentences]
         
+        # Generate every candidate first: the rewritten versions of the touched sentences only
+        candidates = []
         for original_word, replacement in self.strategic_replacements.items():
-            if random.random() < self.aggressiveness:
-                pattern = rf"\b{re.escape(original_word)}\b"
-                if re.search(pattern, modified_text, re.IGNORECASE):
-                    candidate = re.sub(pattern, replacement, modified_text, flags=re.IGNORECASE)
-                    
-                    # Check semantic similarity
-                    similarity = self._calculate_semantic_similarity(text, candidate)
+            if rng.random() < self.aggressiveness:
+                swap = {original_word}
+                touched = {i: self.strategic_lexicon.sub(sentence, active=swap)
+                           for i, sentence in enumerate(sentences) if original_word in found[i]}
+                if touched:
+                    candidates.append((original_word, replacement, swap, touched))
+        
+        if not candidates:
+            return document, changes
+        
+        original_sentences = list(sentences)
+        candidate_texts = [c for *_, touched in candidates for c in touched.values()]
+        offsets = np.cumsum([0] + [len(touched) for *_, touched in candidates])
+        
+        def deltas(base, candidate_rows):
+            # Candidates were built from the original sentences; their deltas compose
+            # when an earlier accepted swap already touched the same sentence
+            return [sum(candidate_rows[offsets[k] + j] - base[i] for j, i in enumerate(touched))
+                    for k, (*_, touched) in enumerate(candidates)]
+        
+        lexical = None
+        if self.semantic_model and self.lexical_prefilter:
+            counts = self.lexical_prefilter.counts(original_sentences + candidate_texts)
+            base_counts = counts[:len(sentences)]
+            lexical = {
+                "original": base_counts.sum(axis=0),
+                "deltas": deltas(base_counts, counts[len(sentences):])
+            }
+            lexical["current"] = lexical["original"].copy()
+        
+        neural = None  # Encoded lazily, on the first swap the pre-filter can't decide
+        accepted = []
+        edits = Counter()  # accepted swaps per sentence
+        previous, last_swap = {}, {}  # sentence text before, and index of, its latest accepted swap
+        for k, (original_word, replacement, swap, touched) in enumerate(candidates):
+            decision = ACCEPT if not self.semantic_model else AMBIGUOUS
+            
+            if lexical is not None:
+                similarity = self._cosine(lexical["original"], lexical["current"] + lexical["deltas"][k])
+                decision = self.lexical_prefilter.decide(np.array([similarity]), self.semantic_threshold)[0]
+            
+            if decision == AMBIGUOUS:
+                if neural is None:
+                    try:
+                        # One batched encode: all original sentences + every touched-sentence candidate
+                        embeddings = self._encode(original_sentences + candidate_texts)
+                        base = embeddings[:len(sentences)]
+                        candidate_rows = embeddings[len(sentences):]
+                        neural = {"original": base.sum(axis=0), "deltas": deltas(base, candidate_rows),
+                                  "base": base, "candidates": candidate_rows, "rows": base.copy()}
+                        for a in accepted:
+                            self._apply_rows(neural, candidates[a][3], offsets[a])
+                        neural["current"] = neural["rows"].sum(axis=0)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Similarity calculation failed: {e}")
+                        neural = False
+                if neural is False:
+                    decision = ACCEPT
+                else:
+                    similarity = self._cosine(neural["original"], neural["current"] + neural["deltas"][k])
+                    decision = ACCEPT if similarity >= self.semantic_threshold else REJECT
+            
+            if decision != ACCEPT:
+                logger.debug(f"Rejected synonym swap: {original_word} → {replacement} (similarity: {similarity:.3f})")
+                continue
+            
+            accepted.append(k)
+            if lexical is not None:
+                lexical["current"] += lexical["deltas"][k]
+            if neural:
+                neural["current"] += neural["deltas"][k]
+                self._apply_rows(neural, touched, offsets[k])
+            for i in touched:
+                previous[i] = sentences[i]
+                edits[i] += 1
+                last_swap[i] = k
+                sentences[i] = self.strategic_lexicon.sub(sentences[i], active=swap)
+            changes.append(f"{original_word} → {replacement}")
+        
+        # Vectors of sentences several swaps hit were composed from deltas against the
+        # original sentence: encode what is actually emitted and check that instead
+        composed = sorted((i for i, n in edits.items() if n > 1), key=last_swap.get, reverse=True)
+        if neural and composed:
+            try:
+                exact = self._encode([sentences[i] for i in composed] + [previous[i] for i in composed])
+                emitted, before = exact[:len(composed)], exact[len(composed):]
+                document_vector = neural["current"] + (emitted - neural["rows"][composed]).sum(axis=0)
+                for j, i in enumerate(composed):  # most recently changed first
+                    similarity = self._cosine(neural["original"], document_vector)
                     if similarity >= self.semantic_threshold:
-                        modified_text = candidate
-                        changes.append(f"{original_word} → {replacement}")
-                    else:
-                        logger.debug(f"Rejected synonym swap: {original_word} → {replacement} (similarity: {similarity:.3f})")
+                        break
+                    logger.debug(f"Reverted the last swap in sentence {i} (similarity: {similarity:.3f})")
+                    document_vector += before[j] - emitted[j]
+                    sentences[i] = previous[i]
+            except Exception as e:
+                logger.warning(f"⚠️ Similarity calculation failed: {e}")
         
-        return modified_text, changes
+        for i in reversed(range(len(sentences))):
+            if sentences[i] is not document[i]:
+                document.set(i, sentences[i])
+        return document, changes
 
-    def _add_subtle_flow_breaks(self, text: str) -> Tuple[str, List[str]]:
+    @document_stage
+    def _add_subtle_flow_breaks(self, document: Document) -> Tuple[Document, List[str]]:
         """Add subtle flow breaks without destroying coherence"""
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        modified_sentences = []
+        rng = request_random()
         changes = []
         
-        for sentence in sentences:
-            if len(sentence.split()) > 10 and random.random() < self.aggressiveness / 2:
+        candidates = {}  # sentence index -> (candidate sentence, filler)
+        for i, sentence in enumerate(document):
+            if document.count(i) > 10 and rng.random() < self.aggressiveness / 2:
                 words = sentence.split()
                 # Insert filler in middle third of sentence (safer positioning)
-                pos = random.randint(len(words)//3, 2*len(words)//3)
-                filler = random.choice(self.subtle_fillers)
+                pos = rng.randint(len(words)//3, 2*len(words)//3)
+                filler = rng.choice(self.subtle_fillers)
                 words.insert(pos, f"{filler},")
-                
-                candidate_sentence = " ".join(words)
-                
-                # Check if this maintains meaning
-                similarity = self._calculate_semantic_similarity(sentence, candidate_sentence)
-                if similarity >= self.semantic_threshold:
-                    modified_sentences.append(candidate_sentence)
-                    changes.append(f"Added filler: {filler}")
-                else:
-                    modified_sentences.append(sentence)
-            else:
-                modified_sentences.append(sentence)
+                candidates[i] = (" ".join(words), filler)
+        
+        # Check if the candidates maintain meaning, all in one batch
+        similarities = self._batch_similarities([(document[i], c[0]) for i, c in candidates.items()])
+        for (i, (candidate_sentence, filler)), similarity in zip(candidates.items(), similarities):
+            if similarity >= self.semantic_threshold:
+                document.set(i, candidate_sentence, document.count(i) + count_words(filler))
+                changes.append(f"Added filler: {filler}")
         
-        return " ".join(modified_sentences), changes
+        return document, changes
 
-    def _controlled_sentence_variation(self, text: str) -> Tuple[str, List[str]]:
+    @document_stage
+    def _controlled_sentence_variation(self, document: Document) -> Tuple[Document, List[str]]:
         """Create controlled sentence length variation"""
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        modified_sentences = []
+        rng = request_random()
         changes = []
         
-        for i, sentence in enumerate(sentences):
-            words = sentence.split()
-            
+        candidates = {}  # sentence index -> (part1, part2, words in part1)
+        for i, sentence in enumerate(document):
             # Only modify longer sentences and not too frequently
-            if len(words) > 15 and random.random() < self.aggressiveness / 3:
+            if document.count(i) > 15 and rng.random() < self.aggressiveness / 3:
+                words = sentence.split()
                 # Split at natural break points (conjunctions, commas)
                 split_candidates = []
                 for j, word in enumerate(words):
@@ -159,61 +339,73 @@ class EnhancedWriteHumanMimic:
                         split_candidates.append(j)
                 
                 if split_candidates:
-                    split_point = random.choice(split_candidates)
+                    split_point = rng.choice(split_candidates)
                     part1 = " ".join(words[:split_point]).rstrip('.,!?') + "."
                     part2 = " ".join(words[split_point:])
-                    
-                    # Check semantic preservation
-                    original_meaning = self._calculate_semantic_similarity(sentence, sentence)
-                    combined_meaning = self._calculate_semantic_similarity(sentence, f"{part1} {part2}")
-                    
-                    if combined_meaning >= self.semantic_threshold:
-                        modified_sentences.extend([part1, part2])
-                        changes.append("Split long sentence")
-                    else:
-                        modified_sentences.append(sentence)
+                    candidates[i] = (part1, part2, split_point)
+        
+        # Check semantic preservation of every split at once
+        similarities = self._batch_similarities([(document[i], f"{p1} {p2}") for i, (p1, p2, _) in candidates.items()])
+        accepted = {}
+        for (i, parts), similarity in zip(candidates.items(), similarities):
+            if similarity >= self.semantic_threshold:
+                accepted[i] = parts
+                changes.append("Split long sentence")
+        
+        if accepted:
+            varied = Document()
+            for i, sentence in enumerate(document):
+                separator = document.separator_before(i)
+                if i in accepted:
+                    part1, part2, split_point = accepted[i]
+                    varied.append(part1, split_point, separator)
+                    varied.append(part2, document.count(i) - split_point)
                 else:
-                    modified_sentences.append(sentence)
-            else:
-                modified_sentences.append(sentence)
+                    varied.append(sentence, document.count(i), separator)
+            document.assign(varied)
         
-        return " ".join(modified_sentences), changes
+        return document, changes
 
-    def _add_light_redundancy(self, text: str) -> Tuple[str, List[str]]:
+    @document_stage
+    def _add_light_redundancy(self, document: Document) -> Tuple[Document, List[str]]:
         """Add light redundancy for lower information density"""
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        modified_sentences = []
+        rng = request_random()
         changes = []
         
-        for sentence in sentences:
-            if random.random() < self.aggressiveness / 4:  # Very selective
-                redundancy = random.choice(self.light_redundancy)
+        candidates = {}  # sentence index -> (candidate, redundancy)
+        for i, sentence in enumerate(document):
+            if rng.random() < self.aggressiveness / 4:  # Very selective
+                redundancy = rng.choice(self.light_redundancy)
                 candidate = f"{sentence.rstrip('.')}. {redundancy.capitalize()}, {sentence.lower()}"
                 
                 # Check if this maintains readability
-                if len(candidate.split()) < len(sentence.split()) * 1.5:  # Don't make it too verbose
-                    similarity = self._calculate_semantic_similarity(sentence, candidate)
-                    if similarity >= self.semantic_threshold:
-                        modified_sentences.append(candidate)
-                        changes.append(f"Added redundancy: {redundancy}")
-                    else:
-                        modified_sentences.append(sentence)
-                else:
-                    modified_sentences.append(sentence)
-            else:
-                modified_sentences.append(sentence)
+                if count_words(candidate) < document.count(i) * 1.5:  # Don't make it too verbose
+                    candidates[i] = (candidate, redundancy)
+        
+        similarities = self._batch_similarities([(document[i], c[0]) for i, c in candidates.items()])
+        accepted = []
+        for (i, (candidate, redundancy)), similarity in zip(candidates.items(), similarities):
+            if similarity >= self.semantic_threshold:
+                accepted.append((i, candidate))
+                changes.append(f"Added redundancy: {redundancy}")
+        
+        # Each accepted candidate becomes two sentences; apply back to front to keep indices valid
+        for i, candidate in reversed(accepted):
+            document.set(i, candidate)
         
-        return " ".join(modified_sentences), changes
+        return document, changes
 
-    def process(self, text: str, min_words=200) -> Dict[str, any]:
+    def process(self, text, min_words=200) -> Dict[str, any]:
         """
-        Apply enhanced WriteHuman processing with semantic awareness
+        Apply enhanced WriteHuman processing with semantic awareness.
+        A Document is edited in place and returned as "text".
         
         Returns:
             Dict with processed text, similarity score, and change log
         """
-        if min_words and len(text.split()) < min_words:
-            logger.info(f"Text too short ({len(text.split())} words), skipping enhanced processing")
+        document = Document.coerce(text)
+        if min_words and document.word_count < min_words:
+            logger.info(f"Text too short ({document.word_count} words), skipping enhanced processing")
             return {
                 "text": text,
                 "similarity": 1.0,
@@ -223,32 +415,32 @@ class EnhancedWriteHumanMimic:
         
         logger.info("🎭 Applying Enhanced WriteHuman mimicry with semantic awareness...")
         
-        original_text = text
+        original = document.copy()
         all_changes = []
         
         # Step 1: Strategic synonym replacements
-        text, changes = self._apply_strategic_synonyms(text)
+        _, changes = self._apply_strategic_synonyms(document)
         all_changes.extend(changes)
         
         # Step 2: Subtle flow breaks
-        text, changes = self._add_subtle_flow_breaks(text)
+        _, changes = self._add_subtle_flow_breaks(document)
         all_changes.extend(changes)
         
         # Step 3: Controlled sentence variation
-        text, changes = self._controlled_sentence_variation(text)
+        _, changes = self._controlled_sentence_variation(document)
         all_changes.extend(changes)
         
         # Step 4: Light redundancy
-        text, changes = self._add_light_redundancy(text)
+        _, changes = self._add_light_redundancy(document)
         all_changes.extend(changes)
         
         # Calculate final similarity
-        final_similarity = self._calculate_semantic_similarity(original_text, text)
+        final_similarity = self._document_similarity(original, document)
         
         logger.info(f"✅ Enhanced WriteHuman complete - Similarity: {final_similarity:.3f}, Changes: {len(all_changes)}")
         
         return {
-            "text": text,
+            "text": document if isinstance(text, Document) else document.text,
             "similarity": final_similarity,
             "changes": all_changes,
             "aggressiveness_used": self.aggressiveness
@@ -262,5 +454,7 @@ class EnhancedWriteHumanMimic:
             "replacement_count": len(self.strategic_replacements),
             "filler_count": len(self.subtle_fillers),
             "semantic_model_available": self.semantic_model is not None,
+            "embedding_cache": self.embedding_cache.get_stats(),
+            "lexical_prefilter": self.lexical_prefilter.get_stats() if self.lexical_prefilter else None,
             "sentence_transformers_available": SENTENCE_TRANSFORMERS_AVAILABLE
         } 
\ No newline at end of file
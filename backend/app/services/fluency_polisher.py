@@ -1,9 +1,11 @@
 import re
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
+from .safe_regex import SafePattern, regex_guard
+
 # Try to import Gemini for advanced polishing
 try:
     import google.generativeai as genai
@@ -36,39 +38,32 @@ class SafeFluencyPolisher:
             except Exception as e:
                 logger.warning(f"⚠️ Gemini unavailable for polishing: {e}")
         
-        # Rule-based polishing patterns
+        # Rule-based polishing patterns, applied in order. Patterns start with a
+        # literal where possible so the regex engine can skip ahead to candidates.
         self.polish_patterns = {
             # Fix obvious grammar issues while preserving quirks
-            r'\s+,': ',',  # Fix spacing before commas
-            r'\s+\.': '.',  # Fix spacing before periods
-            r'(\w+),\s*,': r'\1,',  # Remove duplicate commas
-            r'(\w+)\.\s*\.': r'\1.',  # Remove duplicate periods
-            r'\s{2,}': ' ',  # Normalize multiple spaces
-            r'^([a-z])': lambda m: m.group(1).upper(),  # Capitalize sentence starts
+            r'(?<!\s)\s+([,.])': r'\1',  # Fix spacing before commas and periods (whitespace runs tried once)
+            r',(?<=\w,)\s*,': ',',  # Remove duplicate commas
+            r'\.(?<=\w\.)\s*\.': '.',  # Remove duplicate periods
+            r'\s\s+': ' ',  # Normalize multiple spaces
+            # Capitalize sentence starts: after a period, at line starts and at the very start
+            r'(?:\.\s+|\n)[^\W\d_]': lambda m: m.group(0).upper(),
+            r'\A[^\W\d_]': lambda m: m.group(0).upper(),
         }
+        self._program = self._compile_program(self.polish_patterns)
+
+    @staticmethod
+    def _compile_program(patterns: Dict[str, object]) -> List[Tuple[SafePattern, object]]:
+        """Compile the polishing patterns once into an ordered list of (regex, replacement)"""
+        return [(regex_guard.compile(pattern, re.MULTILINE), replacement) for pattern, replacement in patterns.items()]
 
     def _rule_based_polish(self, text: str) -> str:
         """Apply rule-based polishing for basic readability improvements"""
         polished = text
-        
-        # Apply pattern-based fixes
-        for pattern, replacement in self.polish_patterns.items():
-            if callable(replacement):
-                polished = re.sub(pattern, replacement, polished, flags=re.MULTILINE)
-            else:
-                polished = re.sub(pattern, replacement, polished)
-        
-        # Fix sentence capitalization after periods
-        sentences = re.split(r'(\.\s+)', polished)
-        fixed_sentences = []
-        
-        for i, part in enumerate(sentences):
-            if i % 2 == 0 and part.strip():  # Actual sentence content
-                if part and part[0].islower():
-                    part = part[0].upper() + part[1:]
-            fixed_sentences.append(part)
-        
-        return ''.join(fixed_sentences).strip()
+        with regex_guard.budget():
+            for pattern, replacement in self._program:
+                polished = pattern.sub(replacement, polished)
+        return polished.strip()
 
     def _gemini_polish(self, text: str) -> Optional[str]:
         """Use Gemini to polish text while preserving anti-detection features"""
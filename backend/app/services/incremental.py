@@ -0,0 +1,116 @@
+import difflib
+from time import perf_counter
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from .document import join_paragraphs, split_paragraphs
+from .humanizer import EnhancedComprehensiveHumanizer, enforce_min_word_count, humanizer, outcome_scores
+from .job_queue import JobQueue, job_queue
+from .rng import request_rng
+
+JOB_KIND = "incremental"
+
+
+class UnknownJobError(KeyError):
+    """No incremental job with this id (never created, or expired)"""
+
+
+class SeedRequiredError(ValueError):
+    """previous_text was sent without a job id or the seed of the run that humanized it"""
+
+
+class IncrementalJob(NamedTuple):
+    """One finished incremental run: what a later edit of the same document can reuse"""
+    text: str
+    options: Tuple[str, bool, bool]  # education level, paranoid mode, writehuman mode
+    seed: int
+    outputs: Dict[str, str]  # humanized text of every paragraph
+
+
+class IncrementalHumanizer:
+    """
+    Re-humanizes edited documents paragraph by paragraph.
+
+    A run humanizes every paragraph separately (with the request's seed, so
+    paragraph stages also land in the stage cache) and remembers the outputs
+    under a job id. Re-running with that job id diffs the new text against the
+    job's paragraphs and only sends new or edited paragraphs through the
+    pipeline; unchanged (or moved) paragraphs reuse their earlier output, so
+    the cost follows the size of the edit. The minimum word count applies to
+    the stitched document. Jobs are finished records in the job queue's store
+    (SQLite or Redis), so a follow-up edit can land on any server worker; they
+    expire after ttl seconds.
+    """
+
+    def __init__(self, pipeline: EnhancedComprehensiveHumanizer, store: JobQueue, ttl: float = 24 * 3600):
+        self.pipeline = pipeline
+        self.store = store
+        self.ttl = ttl
+
+    def get_job(self, job_id: str) -> IncrementalJob:
+        job = self.store.get(job_id)
+        if job is None or job.kind != JOB_KIND:
+            raise UnknownJobError(job_id)
+        return IncrementalJob(job.payload["text"], tuple(job.payload["options"]), job.payload["seed"], job.result)
+
+    def _store(self, job: IncrementalJob) -> str:
+        payload = {"text": job.text, "options": list(job.options), "seed": job.seed}
+        return self.store.record(JOB_KIND, payload, job.outputs, self.ttl).id
+
+    def humanize(self, text: str, previous_job_id: Optional[str] = None, previous_text: Optional[str] = None,
+                 education_level: str = "undergraduate", paranoid_mode: bool = True, writehuman_mode: bool = True,
+                 seed: Optional[int] = None) -> Dict[str, object]:
+        start_time = perf_counter()
+        job = self.get_job(previous_job_id) if previous_job_id else None
+        if job is None and previous_text is not None and seed is None:
+            # Unchanged paragraphs can only come from the stage cache under the earlier run's seed
+            raise SeedRequiredError("previous_text needs the seed returned by the earlier run")
+        options = (education_level, paranoid_mode, writehuman_mode)
+        if seed is None:
+            seed = job.seed if job else int(request_rng().integers(2 ** 63))
+        if job:
+            previous_text = job.text
+        # Earlier outputs are only valid for the same options and seed; otherwise the stage cache still helps
+        reusable = job.outputs if job and job.options == options and job.seed == seed else {}
+
+        paragraphs, separators = split_paragraphs(text)
+        previous_paragraphs, _ = split_paragraphs(previous_text or "")
+        matcher = difflib.SequenceMatcher(None, previous_paragraphs, paragraphs, autojunk=False)
+        diff = [{"op": op, "old_start": i1, "old_end": i2, "new_start": j1, "new_end": j2}
+                for op, i1, i2, j1, j2 in matcher.get_opcodes()]
+        print(f"🧩 Incremental run: {len(paragraphs)} paragraphs, "
+              f"{sum(d['new_end'] - d['new_start'] for d in diff if d['op'] != 'equal')} new or edited")
+
+        outputs, reused = {}, 0
+        for paragraph in paragraphs:
+            if paragraph in outputs:
+                continue
+            if paragraph in reusable:
+                outputs[paragraph] = reusable[paragraph]
+                reused += 1
+            else:
+                outputs[paragraph] = self.pipeline.humanize_paragraph(paragraph, education_level, paranoid_mode,
+                                                                      writehuman_mode, seed)
+
+        humanized = [outputs[paragraph] for paragraph in paragraphs]
+        final = enforce_min_word_count(join_paragraphs(humanized, separators), min_words=self.pipeline.MIN_WORDS)
+        job_id = self._store(IncrementalJob(text, options, seed, outputs))
+
+        result = {
+            "job_id": job_id,
+            "seed": seed,
+            "original_text": text,
+            "humanized_text": final,
+            "education_level": education_level,
+            "diff": diff,
+            "paragraphs": [{"text": paragraph, "humanized_text": output, "reused": paragraph in reusable}
+                           for paragraph, output in zip(paragraphs, humanized)],
+            "reused_paragraphs": reused,
+            "processed_paragraphs": len(outputs) - reused
+        }
+        result.update(outcome_scores(text, final))
+        result["processing_time_ms"] = int((perf_counter() - start_time) * 1000)
+        return result
+
+
+incremental_humanizer = IncrementalHumanizer(humanizer, job_queue, settings.INCREMENTAL_JOB_TTL)
@@ -0,0 +1,530 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional
+
+from app.core.config import settings
+
+try:
+    import redis
+    from redis import WatchError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+    class WatchError(Exception):
+        """A watched key changed before EXEC (redis.WatchError without the redis package)"""
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+MAX_PRIORITY = 100
+
+
+class Job(NamedTuple):
+    """A queued unit of pipeline work, as last seen in the queue"""
+    id: str
+    kind: str  # name of the handler that runs it
+    payload: Dict[str, Any]
+    priority: int  # higher is claimed first
+    status: str  # queued, running, succeeded or failed
+    attempts: int  # times claimed so far; also tells a stale worker's report from the current one
+    max_attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None  # finished jobs and their results are dropped after this
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+
+class JobQueue(ABC):
+    """
+    Durable priority queue of pipeline jobs.
+
+    Workers claim the highest-priority job (oldest first within a priority)
+    and hold it under a lease they keep renewing. A job whose handler fails,
+    or whose worker stops renewing (crashed, killed with the server), goes back
+    in the queue after an exponential backoff until it has used max_attempts.
+    Finished jobs keep their result for result_ttl seconds.
+    """
+
+    backend = ""
+
+    def __init__(self, max_attempts: int = 3, result_ttl: int = 24 * 3600, lease_seconds: int = 600,
+                 retry_backoff: float = 5.0):
+        """
+        Args:
+            max_attempts (int): Default attempts per job (1 = no retries)
+            result_ttl (int): Seconds finished jobs are kept
+            lease_seconds (int): Seconds a claimed job stays with its worker without a renewal
+            retry_backoff (float): Seconds before the first retry, doubled for each later one
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+
+    def retry_delay(self, attempts: int) -> float:
+        return self.retry_backoff * 2 ** max(0, attempts - 1)
+
+    @staticmethod
+    def new_job_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def clamp_priority(priority: int) -> int:
+        return max(-MAX_PRIORITY, min(MAX_PRIORITY, int(priority)))
+
+    @abstractmethod
+    def enqueue(self, kind: str, payload: Dict[str, Any], priority: int = 0,
+                max_attempts: Optional[int] = None) -> Job:
+        ...
+
+    @abstractmethod
+    def claim(self) -> Optional[Job]:
+        """The next job, now running under a lease, or None if nothing is due"""
+
+    @abstractmethod
+    def renew(self, job: Job) -> bool:
+        """Extend the lease of a running job; False if it's no longer this claim's"""
+
+    @abstractmethod
+    def complete(self, job: Job, result: Any) -> bool:
+        """Store the result of a claimed job; False if the claim had already expired"""
+
+    @abstractmethod
+    def fail(self, job: Job, error: str, retry: bool = True) -> Optional[Job]:
+        """Record a failed attempt: the job is queued again for a retry, or fails for good"""
+
+    @abstractmethod
+    def record(self, kind: str, payload: Dict[str, Any], result: Any, ttl: Optional[float] = None) -> Job:
+        """Store an already finished job that no worker runs, kept for ttl seconds (default result_ttl)"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    def purge_expired(self) -> int:
+        """Drop finished jobs past their TTL; the number dropped"""
+        return 0
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, object]:
+        ...
+
+    def close(self):
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    JobQueue in a local SQLite database (WAL mode), shared by every worker
+    process that opens the same file. A claim is one IMMEDIATE transaction, so
+    two workers never take the same job. The database is opened on first use.
+    """
+
+    backend = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            priority INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            available_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            lease_until REAL,
+            expires_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, priority DESC, created_at);
+        CREATE INDEX IF NOT EXISTS jobs_expiry ON jobs (expires_at);
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(self.SCHEMA)
+            self._connection = connection
+            logger.info(f"✅ Job queue opened: {self.path}")
+        return self._connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"], kind=row["kind"], payload=json.loads(row["payload"]), priority=row["priority"],
+            status=row["status"], attempts=row["attempts"], max_attempts=row["max_attempts"],
+            result=json.loads(row["result"]) if row["result"] is not None else None, error=row["error"],
+            created_at=row["created_at"], started_at=row["started_at"], finished_at=row["finished_at"],
+            expires_at=row["expires_at"]
+        )
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], priority: int = 0,
+                max_attempts: Optional[int] = None) -> Job:
+        job_id, now = self.new_job_id(), time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO jobs (id, kind, payload, priority, status, max_attempts, created_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), self.clamp_priority(priority), QUEUED,
+                 max(1, max_attempts or self.max_attempts), now, now))
+            return self._job(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def claim(self) -> Optional[Job]:
+        now = time.time()
+        with self._transaction() as db:
+            for row in db.execute("SELECT * FROM jobs WHERE status = ? AND lease_until < ?", (RUNNING, now)).fetchall():
+                self._retry_or_fail(db, self._job(row), "Worker stopped before finishing (lease expired)", True, now)
+            row = db.execute(
+                "SELECT id FROM jobs WHERE status = ? AND available_at <= ? "
+                "ORDER BY priority DESC, created_at, rowid LIMIT 1", (QUEUED, now)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, lease_until = ? "
+                       "WHERE id = ?", (RUNNING, now, now + self.lease_seconds, row["id"]))
+            return self._job(db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def renew(self, job: Job) -> bool:
+        with self._transaction() as db:
+            return db.execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND attempts = ?",
+                              (time.time() + self.lease_seconds, job.id, RUNNING, job.attempts)).rowcount > 0
+
+    def complete(self, job: Job, result: Any) -> bool:
+        now = time.time()
+        with self._transaction() as db:
+            return db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ?, expires_at = ?, "
+                "lease_until = NULL WHERE id = ? AND status = ? AND attempts = ?",
+                (SUCCEEDED, json.dumps(result), now, now + self.result_ttl, job.id, RUNNING, job.attempts)
+            ).rowcount > 0
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> Optional[Job]:
+        with self._transaction() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ? AND status = ? AND attempts = ?",
+                             (job.id, RUNNING, job.attempts)).fetchone()
+            if row is None:
+                return None
+            self._retry_or_fail(db, self._job(row), error, retry, time.time())
+            return self._job(db.execute("SELECT * FROM jobs WHERE id = ?", (job.id,)).fetchone())
+
+    def record(self, kind: str, payload: Dict[str, Any], result: Any, ttl: Optional[float] = None) -> Job:
+        job_id, now = self.new_job_id(), time.time()
+        ttl = self.result_ttl if ttl is None else ttl
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO jobs (id, kind, payload, priority, status, max_attempts, result, created_at, "
+                "available_at, finished_at, expires_at) VALUES (?, ?, ?, 0, ?, 1, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), SUCCEEDED, json.dumps(result), now, now, now, now + ttl))
+            return self._job(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def _retry_or_fail(self, db: sqlite3.Connection, job: Job, error: str, retry: bool, now: float):
+        if retry and job.attempts < job.max_attempts:
+            db.execute("UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_until = NULL WHERE id = ?",
+                       (QUEUED, error, now + self.retry_delay(job.attempts), job.id))
+        else:
+            db.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ?, expires_at = ?, lease_until = NULL "
+                       "WHERE id = ?", (FAILED, error, now, now + self.result_ttl, job.id))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (row["expires_at"] is not None and row["expires_at"] <= time.time()):
+            return None
+        return self._job(row)
+
+    def purge_expired(self) -> int:
+        with self._transaction() as db:
+            return db.execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            counts = dict(self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"backend": self.backend, "path": self.path, **{status: counts.get(status, 0)
+                                                                for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}}
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class RedisJobQueue(JobQueue):
+    """
+    JobQueue on a Redis server (a client created with decode_responses=True).
+
+    Each job is a hash, removed by Redis itself once its result TTL passes.
+    Queued ids sit in a sorted set ordered by priority, then arrival; retries
+    wait in a second sorted set until they're due, and running jobs in a third,
+    by lease expiry. Every step (enqueue, promote, claim, renew, complete, fail)
+    reads and writes in one WATCH/MULTI transaction: a job is in exactly one
+    set at any time, even if a worker dies midway, and a worker whose lease
+    expired can't overwrite a retry.
+    """
+
+    backend = "redis"
+
+    FIELDS = ("kind", "payload", "priority", "status", "attempts", "max_attempts", "result", "error",
+              "created_at", "started_at", "finished_at", "expires_at")
+    JSON_FIELDS = ("payload", "result")
+
+    def __init__(self, client, prefix: str = "rehumanizer:jobs", **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+        self.queued_key = f"{prefix}:queued"
+        self.delayed_key = f"{prefix}:delayed"
+        self.running_key = f"{prefix}:running"
+        self.sequence_key = f"{prefix}:sequence"
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisJobQueue":
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("The redis package is not installed")
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    @staticmethod
+    def _score(priority: int, sequence: int) -> float:
+        # Priority first, then enqueue order (< 1e13), exact in a double for |priority| <= MAX_PRIORITY
+        return -priority * 1e13 + sequence
+
+    def _save(self, job: Job, client=None):
+        fields = job._asdict()
+        (client or self.client).hset(self._key(job.id), mapping={
+            name: json.dumps(fields[name]) if name in self.JSON_FIELDS else
+            ("" if fields[name] is None else str(fields[name]))
+            for name in self.FIELDS
+        })
+
+    def _load(self, job_id: str, fields: Dict[str, str]) -> Job:
+        def number(name, cast=float):
+            return cast(fields[name]) if fields.get(name) else None
+        return Job(
+            id=job_id, kind=fields["kind"], payload=json.loads(fields["payload"]), priority=int(fields["priority"]),
+            status=fields["status"], attempts=int(fields["attempts"]), max_attempts=int(fields["max_attempts"]),
+            result=json.loads(fields["result"]) if fields.get("result") else None, error=fields.get("error") or None,
+            created_at=float(fields["created_at"]), started_at=number("started_at"),
+            finished_at=number("finished_at"), expires_at=number("expires_at")
+        )
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], priority: int = 0,
+                max_attempts: Optional[int] = None) -> Job:
+        job = Job(id=self.new_job_id(), kind=kind, payload=payload, priority=self.clamp_priority(priority),
+                  status=QUEUED, attempts=0, max_attempts=max(1, max_attempts or self.max_attempts),
+                  created_at=time.time())
+
+        def add(pipe, sequence: int) -> Job:
+            pipe.incr(self.sequence_key)
+            self._save(job, pipe)
+            pipe.hset(self._key(job.id), mapping={"sequence": str(sequence)})
+            pipe.zadd(self.queued_key, {job.id: self._score(job.priority, sequence)})
+            return job
+        return self._atomic([self.sequence_key], lambda pipe: int(pipe.get(self.sequence_key) or 0) + 1, add)
+
+    def claim(self) -> Optional[Job]:
+        now = time.time()
+        for job_id in self.client.zrangebyscore(self.running_key, 0, now):
+            job = self.get(job_id)
+            if job is None:
+                self.client.zrem(self.running_key, job_id)
+                continue
+            self._transition(job, lambda pipe, current: self._retry_or_fail(
+                pipe, current, "Worker stopped before finishing (lease expired)", True, now), lease_expired_by=now)
+        for job_id in self.client.zrangebyscore(self.delayed_key, 0, now):
+            self._promote(job_id)
+
+        def take(pipe, job: Job) -> Job:
+            running = job._replace(status=RUNNING, attempts=job.attempts + 1, started_at=now)
+            pipe.zrem(self.queued_key, job.id)
+            self._save(running, pipe)
+            pipe.zadd(self.running_key, {job.id: now + self.lease_seconds})
+            return running
+        return self._atomic([self.queued_key], self._read_next, take)
+
+    def _read_next(self, pipe) -> Optional[Job]:
+        """The job at the head of the queue, or None if it's empty"""
+        while True:
+            head = pipe.zrange(self.queued_key, 0, 0)
+            if not head:
+                return None
+            fields = pipe.hgetall(self._key(head[0]))
+            if fields:
+                return self._load(head[0], fields)
+            # Deleted while queued. Dropping it touches the watched set, so the claim reruns.
+            pipe.zrem(self.queued_key, head[0])
+
+    def _promote(self, job_id: str):
+        """Move a retry whose backoff has passed from the delayed set back into the queue"""
+        def read(pipe) -> Optional[Dict[str, str]]:
+            if pipe.zscore(self.delayed_key, job_id) is None:
+                return None  # another worker promoted it
+            return pipe.hgetall(self._key(job_id))
+
+        def move(pipe, fields: Dict[str, str]):
+            pipe.zrem(self.delayed_key, job_id)
+            if fields:
+                pipe.zadd(self.queued_key, {job_id: self._score(int(fields["priority"]), int(fields["sequence"]))})
+        self._atomic([self.delayed_key], read, move)
+
+    def _atomic(self, keys, read: Callable[[Any], Any], write: Callable[[Any, Any], Any]) -> Any:
+        """
+        One optimistic transaction: read(pipeline) runs with keys WATCHed and
+        returns what write needs, or None to change nothing; write(pipeline,
+        state) then queues its commands after MULTI. The whole thing is retried
+        whenever a watched key changes before EXEC, so a worker dying midway
+        leaves nothing half-written. write's return value, or None.
+        """
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*keys)
+                    state = read(pipe)
+                    if state is None:
+                        return None
+                    pipe.multi()
+                    result = write(pipe, state)
+                    pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+
+    def _transition(self, job: Job, change: Callable[[Any, Job], Job],
+                    lease_expired_by: Optional[float] = None) -> Optional[Job]:
+        """
+        Apply change(pipeline, current job) if the job is still running under
+        this claim (and, with lease_expired_by, its lease ran out by then). The
+        check and change's commands form one transaction, retried when another
+        client touches the job or the lease first. The changed job, or None.
+        """
+        key = self._key(job.id)
+
+        def read(pipe) -> Optional[Job]:
+            fields = pipe.hgetall(key)
+            current = self._load(job.id, fields) if fields else None
+            if current is None or current.status != RUNNING or current.attempts != job.attempts:
+                return None
+            if lease_expired_by is not None:
+                lease = pipe.zscore(self.running_key, job.id)
+                if lease is None or lease > lease_expired_by:
+                    return None
+            return current
+        return self._atomic([key, self.running_key], read, change)
+
+    def renew(self, job: Job) -> bool:
+        def extend(pipe, current: Job) -> Job:
+            pipe.zadd(self.running_key, {job.id: time.time() + self.lease_seconds})
+            return current
+        return self._transition(job, extend) is not None
+
+    def complete(self, job: Job, result: Any) -> bool:
+        def succeed(pipe, current: Job) -> Job:
+            now = time.time()
+            done = current._replace(status=SUCCEEDED, result=result, error=None, finished_at=now,
+                                    expires_at=now + self.result_ttl)
+            pipe.zrem(self.running_key, job.id)
+            self._save(done, pipe)
+            pipe.pexpire(self._key(job.id), max(1, int(self.result_ttl * 1000)))
+            return done
+        return self._transition(job, succeed) is not None
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> Optional[Job]:
+        return self._transition(job, lambda pipe, current: self._retry_or_fail(
+            pipe, current, error, retry, time.time()))
+
+    def _retry_or_fail(self, pipe, job: Job, error: str, retry: bool, now: float) -> Job:
+        """Queue the commands that end a running attempt, on a pipeline in MULTI mode"""
+        pipe.zrem(self.running_key, job.id)
+        if retry and job.attempts < job.max_attempts:
+            job = job._replace(status=QUEUED, error=error)
+            self._save(job, pipe)
+            pipe.zadd(self.delayed_key, {job.id: now + self.retry_delay(job.attempts)})
+        else:
+            job = job._replace(status=FAILED, error=error, finished_at=now, expires_at=now + self.result_ttl)
+            self._save(job, pipe)
+            pipe.pexpire(self._key(job.id), max(1, int(self.result_ttl * 1000)))
+        return job
+
+    def record(self, kind: str, payload: Dict[str, Any], result: Any, ttl: Optional[float] = None) -> Job:
+        now = time.time()
+        ttl = self.result_ttl if ttl is None else ttl
+        job = Job(id=self.new_job_id(), kind=kind, payload=payload, priority=0, status=SUCCEEDED, attempts=0,
+                  max_attempts=1, result=result, created_at=now, finished_at=now, expires_at=now + ttl)
+        with self.client.pipeline() as pipe:
+            pipe.multi()
+            self._save(job, pipe)
+            pipe.pexpire(self._key(job.id), max(1, int(ttl * 1000)))
+            pipe.execute()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        fields = self.client.hgetall(self._key(job_id))
+        if not fields or (fields.get("expires_at") and float(fields["expires_at"]) <= time.time()):
+            return None
+        return self._load(job_id, fields)
+
+    def get_stats(self) -> Dict[str, object]:
+        return {"backend": self.backend, QUEUED: self.client.zcard(self.queued_key),
+                "retrying": self.client.zcard(self.delayed_key), RUNNING: self.client.zcard(self.running_key)}
+
+
+def create_job_queue() -> JobQueue:
+    """The queue selected by JOB_QUEUE_BACKEND (Redis at REDIS_URL, else SQLite at JOB_QUEUE_PATH)"""
+    options = dict(max_attempts=settings.JOB_MAX_ATTEMPTS, result_ttl=settings.JOB_RESULT_TTL,
+                   lease_seconds=settings.JOB_LEASE_SECONDS, retry_backoff=settings.JOB_RETRY_BACKOFF)
+    if settings.JOB_QUEUE_BACKEND == "redis":
+        if REDIS_AVAILABLE:
+            return RedisJobQueue.from_url(settings.REDIS_URL, **options)
+        logger.warning("⚠️ JOB_QUEUE_BACKEND is redis but the redis package is not installed; using SQLite")
+    return SQLiteJobQueue(settings.JOB_QUEUE_PATH, **options)
+
+
+job_queue = create_job_queue()
@@ -0,0 +1,158 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from .humanizer import humanizer
+from .job_queue import Job, JobQueue, job_queue
+
+logger = logging.getLogger(__name__)
+
+
+def run_text_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """humanize_text with the fields of a /text request"""
+    return humanizer.humanize_text(payload["text"], payload.get("pipeline_type", "comprehensive"),
+                                   payload.get("education_level", "undergraduate"),
+                                   payload.get("paranoid_mode", True), payload.get("writehuman_mode", True),
+                                   payload.get("seed"))
+
+
+def run_levels_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """humanize_levels with the fields of a /levels request"""
+    return humanizer.humanize_levels(payload["text"], payload["education_levels"],
+                                     payload.get("pipeline_type", "comprehensive"),
+                                     payload.get("paranoid_mode", True), payload.get("writehuman_mode", True),
+                                     payload.get("seed"))
+
+
+# Job kind -> handler; a handler's return value must be JSON-serializable
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "text": run_text_job,
+    "levels": run_levels_job,
+}
+
+
+class JobWorkerPool:
+    """
+    Worker threads that drain a JobQueue.
+
+    Each worker claims a job, runs its handler and stores the result or the
+    error (a failed job is retried by the queue). A housekeeping thread renews
+    the leases of running jobs and purges expired results. Several server
+    processes can each run a pool over the same queue.
+    """
+
+    def __init__(self, queue: JobQueue, workers: int = 2, poll_interval: float = 0.5,
+                 handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Any]]] = None):
+        """
+        Args:
+            queue (JobQueue): Queue to drain
+            workers (int): Worker threads (0 = this process only enqueues)
+            poll_interval (float): Seconds an idle worker waits before looking for due jobs again
+            handlers (dict): Job kind -> handler, default JOB_HANDLERS
+        """
+        self.queue = queue
+        self.workers = max(0, workers)
+        self.poll_interval = poll_interval
+        self.handlers = handlers if handlers is not None else JOB_HANDLERS
+
+        self.succeeded = 0
+        self.failed = 0
+
+        self._lock = threading.Lock()
+        self._active: Dict[str, Job] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def start(self):
+        if self._threads or not self.workers:
+            return
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                         for i in range(self.workers)]
+        self._threads.append(threading.Thread(target=self._housekeeping, name="job-housekeeping", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"🧵 Job workers started: {self.workers} ({self.queue.backend} queue)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop claiming jobs; a job still running after timeout is retried once its lease expires"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        """A job was just enqueued: idle workers look now instead of at their next poll"""
+        self._wake.set()
+
+    def run_once(self) -> Optional[Job]:
+        """Claim and run one job; the claimed job, or None if none was due"""
+        job = self.queue.claim()
+        if job is None:
+            return None
+        with self._lock:
+            self._active[job.id] = job
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                self.queue.fail(job, f"Unknown job kind: {job.kind}", retry=False)
+                self.failed += 1
+                return job
+            logger.info(f"🧵 Job {job.id} ({job.kind}, priority {job.priority}) attempt {job.attempts}/{job.max_attempts}")
+            try:
+                result = handler(job.payload)
+            except Exception as e:
+                logger.warning(f"⚠️ Job {job.id} failed: {e}")
+                self.queue.fail(job, str(e))
+                self.failed += 1
+            else:
+                if not self.queue.complete(job, result):
+                    logger.warning(f"⚠️ Job {job.id} finished after its lease expired; result dropped")
+                self.succeeded += 1
+        finally:
+            with self._lock:
+                self._active.pop(job.id, None)
+        return job
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self.run_once()
+            except Exception as e:  # queue unavailable: wait and try again
+                logger.error(f"❌ Job queue error: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _housekeeping(self):
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            with self._lock:
+                active = list(self._active.values())
+            try:
+                for job in active:
+                    self.queue.renew(job)
+                purged = self.queue.purge_expired()
+                if purged:
+                    logger.info(f"🧹 Purged {purged} expired jobs")
+            except Exception as e:
+                logger.error(f"❌ Job queue error: {e}")
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            running = len(self._active)
+        return {
+            "workers": self.workers,
+            "alive": sum(thread.is_alive() for thread in self._threads),
+            "running": running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "queue": self.queue.get_stats()
+        }
+
+
+job_workers = JobWorkerPool(job_queue, settings.JOB_WORKERS, settings.JOB_POLL_INTERVAL)
@@ -0,0 +1,185 @@
+import logging
+import os
+from functools import lru_cache
+from itertools import chain, repeat
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from app.core.config import settings
+from .document import Document
+from .lexical_similarity import TOKEN_PATTERN
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data", "ngram_lm.npz"))
+
+BOS_ID = 0  # sentence start
+UNK_ID = 1  # out-of-vocabulary word
+SPECIAL_TOKENS = ["<s>", "<unk>"]
+
+
+class LanguageModelScores(NamedTuple):
+    """Language model scores of one text"""
+    sentence_logprobs: np.ndarray  # total natural-log probability per scored sentence
+    sentence_tokens: np.ndarray  # tokens per scored sentence
+    perplexity: float  # of the whole text
+    burstiness: float  # coefficient of variation of the sentence perplexities
+    perplexity_percentile: float  # 0-100 against the reference distribution
+    burstiness_percentile: float
+
+    @property
+    def sentence_perplexities(self) -> np.ndarray:
+        return np.exp(-self.sentence_logprobs / self.sentence_tokens)
+
+
+class NgramLanguageModel:
+    """
+    Word bigram language model with Witten-Bell interpolation, backed by
+    NumPy count tables.
+
+    Bigrams are stored as sorted int64 keys (previous id * vocabulary size +
+    id) with their counts, so a whole text is scored with one searchsorted and
+    a few array operations. Percentiles place a text's perplexity and
+    burstiness within the distribution of held-out reference documents,
+    measured when the model was built (scripts/build_language_model.py).
+    """
+
+    def __init__(self, vocabulary: Sequence[str], unigram_counts: np.ndarray, bigram_keys: np.ndarray,
+                 bigram_counts: np.ndarray, perplexity_quantiles: Optional[np.ndarray] = None,
+                 burstiness_quantiles: Optional[np.ndarray] = None, cache_size: int = 64):
+        self.vocabulary = list(vocabulary)
+        self.index = {word: i for i, word in enumerate(self.vocabulary)}
+        self.size = len(self.vocabulary)
+        self.unigram_counts = np.asarray(unigram_counts, dtype=np.int64)
+        self.bigram_keys = np.asarray(bigram_keys, dtype=np.int64)
+        self.bigram_counts = np.asarray(bigram_counts, dtype=np.int64)
+        self.perplexity_quantiles = perplexity_quantiles
+        self.burstiness_quantiles = burstiness_quantiles
+
+        # Add-one unigram distribution (the interpolation floor)
+        self.unigram_probs = (self.unigram_counts + 1) / (self.unigram_counts.sum() + self.size)
+        # Per history: how often it was followed by anything, and by how many distinct words
+        histories = self.bigram_keys // self.size
+        self.history_counts = np.bincount(histories, weights=self.bigram_counts, minlength=self.size)
+        self.history_types = np.bincount(histories, minlength=self.size).astype(np.float64)
+
+        self._score_text = lru_cache(maxsize=cache_size)(self._score)
+
+    @classmethod
+    def train(cls, texts: Iterable[str], **kwargs) -> "NgramLanguageModel":
+        """Count unigrams and bigrams over the sentences of texts"""
+        sentences = [tokens for text in texts for tokens in tokenize(text) if tokens]
+        vocabulary = SPECIAL_TOKENS + sorted({token for tokens in sentences for token in tokens})
+        index = {word: i for i, word in enumerate(vocabulary)}
+        ids = [np.array([BOS_ID] + [index[token] for token in tokens], dtype=np.int64) for tokens in sentences]
+        unigram_counts = np.bincount(np.concatenate([s[1:] for s in ids]), minlength=len(vocabulary))
+        keys = np.concatenate([s[:-1] * len(vocabulary) + s[1:] for s in ids])
+        bigram_keys, bigram_counts = np.unique(keys, return_counts=True)
+        return cls(vocabulary, unigram_counts, bigram_keys, bigram_counts, **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "NgramLanguageModel":
+        with np.load(path, allow_pickle=False) as tables:
+            return cls(tables["vocabulary"].tolist(), tables["unigram_counts"], tables["bigram_keys"],
+                       tables["bigram_counts"], tables["perplexity_quantiles"], tables["burstiness_quantiles"],
+                       **kwargs)
+
+    def save(self, path: str):
+        np.savez(path, vocabulary=np.array(self.vocabulary), unigram_counts=self.unigram_counts.astype(np.int32),
+                 bigram_keys=self.bigram_keys, bigram_counts=self.bigram_counts.astype(np.int32),
+                 perplexity_quantiles=self.perplexity_quantiles, burstiness_quantiles=self.burstiness_quantiles)
+
+    def token_logprobs(self, ids: np.ndarray, histories: np.ndarray) -> np.ndarray:
+        """Natural-log probability of every token id given the id before it"""
+        keys = histories * self.size + ids
+        slots = np.minimum(np.searchsorted(self.bigram_keys, keys), len(self.bigram_keys) - 1)
+        bigram = np.where(self.bigram_keys[slots] == keys, self.bigram_counts[slots], 0)
+        types = self.history_types[histories]
+        floor = self.unigram_probs[ids]
+        # Witten-Bell: (c(h, w) + T(h) * P(w)) / (c(h) + T(h)); unseen histories fall back to P(w)
+        denominator = self.history_counts[histories] + types
+        probs = np.where(denominator > 0, (bigram + types * floor) / np.maximum(denominator, 1), floor)
+        return np.log(probs)
+
+    def score(self, text: Union[str, Document]) -> LanguageModelScores:
+        """Scores of a text or Document (memoized by text, so stages can share them)"""
+        return self._score_text(text.text if isinstance(text, Document) else text)
+
+    def _score(self, text: str) -> LanguageModelScores:
+        return self.score_batch([text])[0]
+
+    def score_batch(self, texts: Sequence[Union[str, Document]]) -> List[LanguageModelScores]:
+        """Scores of many texts, with one vectorized pass over all of their tokens (not memoized)"""
+        sentences = [[tokens for tokens in tokenize(text) if tokens] for text in texts]
+        # Text of every sentence, and tokens per sentence (every scored sentence has at least one)
+        sentence_texts = np.repeat(np.arange(len(texts)), [len(text) for text in sentences])
+        lengths = np.fromiter((len(tokens) for text in sentences for tokens in text), dtype=np.int64,
+                              count=len(sentence_texts))
+        if not len(lengths):
+            return [self._empty_scores() for _ in texts]
+
+        # One flat array of ids for all texts, plus each token's history
+        flat_tokens = chain.from_iterable(chain.from_iterable(sentences))
+        ids = np.fromiter(map(self.index.get, flat_tokens, repeat(UNK_ID)), dtype=np.int64, count=int(lengths.sum()))
+        starts = np.cumsum(lengths) - lengths
+        histories = np.empty_like(ids)
+        histories[1:] = ids[:-1]
+        histories[starts] = BOS_ID
+
+        sentence_logprobs = np.add.reduceat(self.token_logprobs(ids, histories), starts)
+        sentence_perplexities = np.exp(-sentence_logprobs / lengths)
+
+        # Per-text aggregates by grouping sentences on their text
+        sentence_counts = np.bincount(sentence_texts, minlength=len(texts))
+        tokens = np.bincount(sentence_texts, weights=lengths, minlength=len(texts))
+        logprobs = np.bincount(sentence_texts, weights=sentence_logprobs, minlength=len(texts))
+        perplexities = np.where(tokens > 0, np.exp(-logprobs / np.maximum(tokens, 1)), 0.0)
+        means = np.bincount(sentence_texts, weights=sentence_perplexities, minlength=len(texts)) / np.maximum(sentence_counts, 1)
+        squares = np.bincount(sentence_texts, weights=sentence_perplexities ** 2, minlength=len(texts)) / np.maximum(sentence_counts, 1)
+        stds = np.sqrt(np.maximum(squares - means ** 2, 0.0))
+        burstiness = np.where(sentence_counts > 1, stds / np.maximum(means, 1e-12), 0.0)
+        perplexity_percentiles = self._percentile(perplexities, self.perplexity_quantiles)
+        burstiness_percentiles = self._percentile(burstiness, self.burstiness_quantiles)
+
+        scores = []
+        bounds = np.concatenate([[0], np.cumsum(sentence_counts)])
+        for i in range(len(texts)):
+            if not sentence_counts[i]:
+                scores.append(self._empty_scores())
+                continue
+            group = slice(bounds[i], bounds[i + 1])
+            scores.append(LanguageModelScores(sentence_logprobs[group], lengths[group], float(perplexities[i]),
+                                              float(burstiness[i]), float(perplexity_percentiles[i]),
+                                              float(burstiness_percentiles[i])))
+        return scores
+
+    @staticmethod
+    def _empty_scores() -> LanguageModelScores:
+        return LanguageModelScores(np.zeros(0), np.zeros(0, dtype=np.int64), 0.0, 0.0, 0.0, 0.0)
+
+    @staticmethod
+    def _percentile(values: np.ndarray, quantiles: Optional[np.ndarray]) -> np.ndarray:
+        if quantiles is None or not len(quantiles):
+            return np.full(len(values), 50.0)
+        return np.interp(values, quantiles, np.linspace(0, 100, len(quantiles)))
+
+
+def tokenize(text: Union[str, Document]) -> List[List[str]]:
+    """Lowercase word tokens of every sentence (sentence boundaries as in Document)"""
+    return [TOKEN_PATTERN.findall(sentence.lower()) for sentence in Document.coerce(text)]
+
+
+def load_language_model() -> Optional[NgramLanguageModel]:
+    path = settings.LANGUAGE_MODEL_PATH or DEFAULT_MODEL_PATH
+    try:
+        model = NgramLanguageModel.load(path)
+        logger.info(f"✅ Language model loaded: {model.size} words, {len(model.bigram_keys)} bigrams")
+        return model
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"⚠️ Language model unavailable ({path}): {e}")
+        return None
+
+
+language_model = load_language_model()
+LANGUAGE_MODEL_AVAILABLE = language_model is not None
@@ -0,0 +1,84 @@
+import re
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+ACCEPT = 1
+REJECT = -1
+AMBIGUOUS = 0
+
+
+class LexicalPrefilter:
+    """
+    Cheap lexical stand-in for the sentence-transformer similarity check.
+
+    Texts are mapped to hashed term-frequency vectors; the cosine between two
+    of them is cheap to compute for a whole batch at once. Edits whose lexical
+    similarity is at or above `accept_above` are accepted without the model,
+    edits at or below `reject_below` are rejected, and only the band in between
+    is sent to the transformer. The bands are calibrated with
+    benchmarks/bench_lexical_prefilter.py.
+    """
+
+    def __init__(self, accept_above: float = 0.95, reject_below: float = 0.30, dim: int = 4096):
+        """
+        Args:
+            accept_above (float): Lexical similarity from which an edit is accepted outright
+            reject_below (float): Lexical similarity up to which an edit is rejected outright
+            dim (int): Number of hash buckets for the term-frequency vectors
+        """
+        self.accept_above = accept_above
+        self.reject_below = reject_below
+        self.dim = dim
+        self.stats: Dict[str, int] = {"accepted": 0, "rejected": 0, "ambiguous": 0}
+
+    def _token_ids(self, text: str) -> List[int]:
+        return [zlib.crc32(token.encode()) % self.dim for token in TOKEN_PATTERN.findall(text.lower())]
+
+    def counts(self, texts: List[str]) -> np.ndarray:
+        """Hashed term-frequency counts, one row per text (rows add up to a document)"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            ids = self._token_ids(text)
+            if ids:
+                np.add.at(matrix[row], ids, 1.0)
+        return matrix
+
+    def vectors(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized hashed term-frequency vectors, one row per text"""
+        matrix = self.counts(texts)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def batch_similarity(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """Lexical cosine similarity for every (original, candidate) pair"""
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+        left = self.vectors([a for a, _ in pairs])
+        right = self.vectors([b for _, b in pairs])
+        return np.einsum("ij,ij->i", left, right)
+
+    def decide(self, similarities: np.ndarray, semantic_threshold: float) -> np.ndarray:
+        """ACCEPT / REJECT / AMBIGUOUS for each lexical similarity"""
+        # Never accept lexically below the semantic threshold itself
+        accept_above = max(self.accept_above, semantic_threshold)
+        decisions = np.full(len(similarities), AMBIGUOUS, dtype=np.int8)
+        decisions[similarities >= accept_above] = ACCEPT
+        decisions[similarities <= self.reject_below] = REJECT
+        self.stats["accepted"] += int((decisions == ACCEPT).sum())
+        self.stats["rejected"] += int((decisions == REJECT).sum())
+        self.stats["ambiguous"] += int((decisions == AMBIGUOUS).sum())
+        return decisions
+
+    def get_stats(self) -> Dict[str, object]:
+        total = sum(self.stats.values())
+        bypassed = self.stats["accepted"] + self.stats["rejected"]
+        return {
+            **self.stats,
+            "accept_above": self.accept_above,
+            "reject_below": self.reject_below,
+            "bypass_rate": round(bypassed / total, 4) if total else 0.0
+        }
@@ -0,0 +1,85 @@
+import re
+from typing import Callable, Collection, Dict, Optional, Sequence, Set, Union
+
+from .rng import request_random
+
+Replacement = Union[str, Sequence[str]]
+
+
+def match_case(source: str, replacement: str) -> str:
+    """Give the replacement the casing of the word it replaces"""
+    if source.isupper() and len(source) > 1:
+        return replacement.upper()
+    if source[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+class Lexicon:
+    """
+    A word -> replacement dictionary compiled into a single alternation regex.
+
+    One `sub` call scans the text once for every entry at the same time,
+    instead of one `re.sub(rf"\\b{word}\\b", ...)` scan per dictionary entry.
+    Replacements may be a string or a list of variants to choose from per match.
+    """
+
+    def __init__(self, replacements: Dict[str, Replacement], preserve_case: bool = True):
+        """
+        Args:
+            replacements (dict): word (or phrase) -> replacement string or list of variants
+            preserve_case (bool): Capitalize/upper-case replacements like the matched word
+        """
+        self.replacements = {word.lower(): replacement for word, replacement in replacements.items()}
+        self.preserve_case = preserve_case
+        # Longest first, so an entry is never shadowed by one of its prefixes
+        words = sorted(self.replacements, key=len, reverse=True)
+        # An empty alternation would match at every word boundary, so an empty lexicon has no pattern
+        self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")\b",
+                                  re.IGNORECASE) if words else None
+
+    def __len__(self):
+        return len(self.replacements)
+
+    def __iter__(self):
+        return iter(self.replacements)
+
+    def find(self, text: str) -> Set[str]:
+        """Dictionary entries present in the text (one scan)"""
+        if self.pattern is None:
+            return set()
+        return {match.lower() for match in self.pattern.findall(text)}
+
+    def sub(self, text: str, active: Optional[Collection[str]] = None,
+            choose: Callable[[Sequence[str]], str] = None, max_per_word: Optional[int] = None) -> str:
+        """
+        Replace every dictionary word in one pass.
+
+        Args:
+            text (str): Input text
+            active (collection): Only replace these entries (default: all)
+            choose (callable): Picks a variant when a replacement is a list (default: from the request RNG)
+            max_per_word (int): Replace at most this many occurrences of each entry
+        """
+        if self.pattern is None:
+            return text
+        counts: Dict[str, int] = {}
+
+        def replace(match):
+            nonlocal choose
+            source = match.group(0)
+            word = source.lower()
+            if active is not None and word not in active:
+                return source
+            if max_per_word is not None:
+                if counts.get(word, 0) >= max_per_word:
+                    return source
+                counts[word] = counts.get(word, 0) + 1
+            replacement = self.replacements[word]
+            if not isinstance(replacement, str):
+                if choose is None:
+                    choose = request_random().choice
+                replacement = choose(replacement)
+            return match_case(source, replacement) if self.preserve_case else replacement
+
+        return self.pattern.sub(replace, text)
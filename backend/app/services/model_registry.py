@@ -0,0 +1,135 @@
+import gc
+import os
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .model_runtime import model_runtime
+
+logger = logging.getLogger(__name__)
+
+PEGASUS_MODEL_NAME = "Eemansleepdeprived/Humaneyes"
+SEMANTIC_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def _load_pegasus():
+    from transformers import PegasusForConditionalGeneration, PegasusTokenizer
+    tokenizer = PegasusTokenizer.from_pretrained(PEGASUS_MODEL_NAME)
+    model = PegasusForConditionalGeneration.from_pretrained(PEGASUS_MODEL_NAME)
+    return tokenizer, model
+
+
+def _load_semantic():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SEMANTIC_MODEL_NAME)
+
+
+class ModelRegistry:
+    """
+    One copy of every local model per process.
+
+    In preload mode the master process loads the registry before forking its
+    workers, so the weights live in pages shared copy-on-write by every worker
+    instead of being loaded once per worker.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {
+            "pegasus": _load_pegasus,
+            "semantic": _load_semantic,
+        }
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.preloaded = False
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the loaded model, loading it on first use. None if it can't be loaded."""
+        if name in self._models:
+            return self._models[name]
+        with self._lock:
+            if name in self._models:
+                return self._models[name]
+            if name in self._errors:
+                return None
+            try:
+                model_runtime.configure()
+                model = self._loaders[name]()
+                self._freeze(model)
+                self._models[name] = model
+                logger.info(f"✅ Model '{name}' loaded in process {os.getpid()}")
+                return model
+            except Exception as e:
+                self._errors[name] = str(e)
+                logger.warning(f"⚠️ Model '{name}' unavailable: {e}")
+                return None
+
+    def restrict(self, names, reason: str = "not loaded in this process"):
+        """Never load the models outside names in this process (those already loaded stay)"""
+        with self._lock:
+            for name in self._loaders:
+                if name not in names and name not in self._models:
+                    self._errors[name] = reason
+
+    def _freeze(self, model):
+        # Inference only: never write to the weights, which keeps shared pages clean
+        for part in model if isinstance(model, tuple) else (model,):
+            if hasattr(part, "eval"):
+                part.eval()
+            if hasattr(part, "requires_grad_"):
+                part.requires_grad_(False)
+
+    def preload(self, names=None):
+        """Load models up-front (call in the master process before forking workers)."""
+        for name in names or self._loaders:
+            self.get(name)
+        # Move everything allocated so far out of the GC's reach, so collections
+        # in the workers don't touch (and un-share) the pages holding it
+        gc.collect()
+        gc.freeze()
+        self.preloaded = True
+        logger.info(f"✅ Model registry preloaded: {sorted(self._models)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": sorted(self._models),
+            "unavailable": self._errors,
+            "preloaded": self.preloaded,
+            "memory": process_memory(),
+        }
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, Any]:
+    """
+    RSS / PSS / shared memory of a process in MB (Linux /proc).
+
+    PSS divides shared pages between the processes mapping them, so with
+    working copy-on-write sharing each worker's PSS is well below its RSS.
+    """
+    pid = pid or os.getpid()
+    stats = {"pid": pid}
+    fields = {
+        "Rss": "rss_mb",
+        "Pss": "pss_mb",
+        "Shared_Clean": "shared_clean_mb",
+        "Shared_Dirty": "shared_dirty_mb",
+        "Private_Clean": "private_clean_mb",
+        "Private_Dirty": "private_dirty_mb",
+    }
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    stats[fields[key]] = round(int(rest.split()[0]) / 1024, 1)
+    except OSError:
+        # Not Linux (or no permission): fall back to peak RSS of this process
+        try:
+            import resource
+            stats["rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        except (ImportError, ValueError):
+            pass
+    return stats
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,127 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional
+
+# Try to import torch (optional, only needed for the local model stages)
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+    torch = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRuntime:
+    """
+    Process-wide runtime for the local PyTorch models (Pegasus, MiniLM).
+
+    Every uvicorn worker gets its own intra-op/inter-op thread budget instead of
+    PyTorch's default of one thread per core, and all model calls run under
+    inference mode on a small dedicated executor so request threads never fan
+    out into the torch thread pool themselves.
+    """
+
+    def __init__(self, intra_op_threads: int = 0, inter_op_threads: int = 1,
+                 executor_workers: int = 1, web_concurrency: int = 1):
+        """
+        Args:
+            intra_op_threads (int): Threads per model op, 0 = cpu_count // web_concurrency
+            inter_op_threads (int): Threads for running independent ops in parallel
+            executor_workers (int): Dedicated threads that execute model calls
+            web_concurrency (int): Worker processes sharing this host
+        """
+        cpu_count = os.cpu_count() or 1
+        self.web_concurrency = max(1, web_concurrency)
+        self.intra_op_threads = intra_op_threads or max(1, cpu_count // self.web_concurrency)
+        self.inter_op_threads = max(1, inter_op_threads)
+        self.executor_workers = max(1, executor_workers)
+        self.calls = 0
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._configured_pid: Optional[int] = None
+
+    def configure(self):
+        """Apply the thread budget to torch (once per process, re-applied after fork)."""
+        if self._configured_pid == os.getpid():
+            return
+        self._configured_pid = os.getpid()
+        if not TORCH_AVAILABLE:
+            return
+
+        torch.set_num_threads(self.intra_op_threads)
+        try:
+            torch.set_num_interop_threads(self.inter_op_threads)
+        except RuntimeError:
+            # Only settable before the first inter-op parallel work in this process
+            logger.debug("Inter-op thread count already fixed for this process")
+        logger.info(f"✅ Model runtime: {self.intra_op_threads} intra-op / {self.inter_op_threads} inter-op threads")
+
+    def inference(self):
+        """Context manager that disables autograd tracking for model calls."""
+        if TORCH_AVAILABLE:
+            return torch.inference_mode()
+        return nullcontext()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so a preloading master process never forks with live threads
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self.configure()
+                self._executor_pid = os.getpid()
+                # torch's intra-op thread count is process-wide, so configure() covers these threads
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.executor_workers,
+                    thread_name_prefix="model-runtime"
+                )
+            return self._executor
+
+    def _call(self, fn: Callable, args, kwargs):
+        with self.inference():
+            return fn(*args, **kwargs)
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """Schedule a model call on the dedicated executor and return its future."""
+        self.calls += 1
+        return self._get_executor().submit(self._call, fn, args, kwargs)
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a model call on the dedicated executor and wait for the result."""
+        if threading.current_thread().name.startswith("model-runtime"):
+            # Already on the model executor (nested call), don't deadlock waiting on ourselves
+            return self._call(fn, args, kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the effective runtime settings"""
+        return {
+            "torch_available": TORCH_AVAILABLE,
+            "web_concurrency": self.web_concurrency,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "executor_workers": self.executor_workers,
+            "inference_mode": TORCH_AVAILABLE,
+            "model_calls": self.calls
+        }
+
+
+model_runtime = ModelRuntime(
+    intra_op_threads=settings.MODEL_INTRA_OP_THREADS,
+    inter_op_threads=settings.MODEL_INTER_OP_THREADS,
+    executor_workers=settings.MODEL_EXECUTOR_WORKERS,
+    web_concurrency=settings.WEB_CONCURRENCY
+)
@@ -0,0 +1,114 @@
+from typing import Optional
+
+from .document import Document, document_stage, count_words
+from .language_model import language_model, LanguageModelScores, LANGUAGE_MODEL_AVAILABLE
+from .lexicon import Lexicon
+from .rng import request_random
+
+
+class PerplexityOptimizer:
+    """Optimizes text perplexity to match human writing patterns."""
+    
+    def __init__(self):
+        # Percentiles of document perplexity under the language model, measured
+        # against held-out reference text (type-token ratio x 100 without the model)
+        self.target_perplexity_ranges = {
+            'elementary': (20, 40),
+            'middle_school': (30, 50),
+            'high_school': (40, 65),
+            'undergraduate': (50, 80),
+            'masters': (60, 90),
+            'phd': (70, 100)
+        }
+        self.max_rounds = 2
+        
+        self.variety_synonyms = Lexicon({
+            'good': ['excellent', 'great', 'superb', 'outstanding'],
+            'bad': ['poor', 'terrible', 'awful', 'dreadful'],
+            'big': ['large', 'huge', 'enormous', 'massive'],
+            'small': ['tiny', 'minute', 'miniature', 'petite']
+        })
+    
+    @document_stage
+    def calculate_simple_perplexity(self, document: Document) -> float:
+        """Simple perplexity estimation based on word frequency (fallback without the language model)."""
+        total_words = document.word_count
+        if total_words < 2:
+            return 50.0
+        
+        # Distinct words across all sentences
+        vocabulary = set()
+        for sentence in document:
+            vocabulary.update(sentence.lower().split())
+        
+        # Calculate perplexity-like score
+        unique_words = len(vocabulary)
+        
+        # Higher ratio of unique words = higher perplexity
+        perplexity = (unique_words / total_words) * 100
+        
+        return min(perplexity, 100.0)
+    
+    def score(self, document) -> Optional[LanguageModelScores]:
+        """Language model scores (shared through the model's cache), or None without the model"""
+        return language_model.score(document) if LANGUAGE_MODEL_AVAILABLE else None
+    
+    def calculate_perplexity(self, document) -> float:
+        """Perplexity as a 0-100 score: the language model percentile, or the type-token fallback."""
+        scores = self.score(document)
+        return scores.perplexity_percentile if scores is not None else self.calculate_simple_perplexity(document)
+    
+    @document_stage
+    def optimize_perplexity(self, document: Document, level: str = 'undergraduate') -> Document:
+        """Optimize text perplexity for target range."""
+        target_min, target_max = self.target_perplexity_ranges.get(level, (50, 80))
+        current_perplexity = self.calculate_perplexity(document)
+        scores = self.score(document)
+        burstiness = f", burstiness: {scores.burstiness:.2f} ({scores.burstiness_percentile:.0f}th pct)" if scores else ""
+        
+        print(f"🔄 Current perplexity: {current_perplexity:.1f}{burstiness}, Target: {target_min}-{target_max}")
+        
+        for _ in range(self.max_rounds):
+            text = document.text
+            if current_perplexity < target_min:
+                # Increase perplexity by adding variety
+                self.increase_perplexity(document)
+            elif current_perplexity > target_max:
+                # Decrease perplexity by adding repetition
+                self.decrease_perplexity(document)
+            if document.text == text:
+                break
+            current_perplexity = self.calculate_perplexity(document)
+        
+        print(f"✅ Optimized perplexity: {current_perplexity:.1f}")
+        
+        return document
+    
+    @document_stage
+    def increase_perplexity(self, document: Document) -> Document:
+        """Increase perplexity by adding word variety."""
+        # First occurrence of each word in the document only
+        done = set()
+        for i, sentence in enumerate(document):
+            first = self.variety_synonyms.find(sentence) - done
+            if first:
+                document.set(i, self.variety_synonyms.sub(sentence, active=first, max_per_word=1))
+                done |= first
+        return document
+    
+    @document_stage
+    def decrease_perplexity(self, document: Document) -> Document:
+        """Decrease perplexity by adding repetition."""
+        rng = request_random()
+        if len(document) > 2:
+            # Repeat some phrases
+            common_phrases = ['in fact', 'for example', 'in other words']
+            phrase = rng.choice(common_phrases)
+            phrase_words = count_words(phrase)
+            
+            # Add the phrase to multiple sentences
+            for i in range(0, min(3, len(document))):
+                if rng.random() < 0.3:
+                    document.set(i, f"{phrase}, {document[i].lower()}", document.count(i) + phrase_words)
+        
+        return document
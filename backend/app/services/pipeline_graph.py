@@ -0,0 +1,218 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, Hashable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .rng import request_rng, use_request_rng
+from .stage_cache import MISSING, StageCache, content_hash, stage_key
+
+_store_output: contextvars.ContextVar[Optional[List[bool]]] = contextvars.ContextVar("store_stage_output", default=None)
+_listener: contextvars.ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = contextvars.ContextVar(
+    "pipeline_listener", default=None)
+
+
+class Stage(NamedTuple):
+    """A pipeline stage: a function of the request inputs and earlier stage outputs named in `inputs`"""
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...]
+    per_variant: bool = False  # run once per fan-out variant instead of once per request
+    seeded: bool = True  # draws from the request RNG, so its output is only reused for the same request seed
+
+
+class _RunOptions(NamedTuple):
+    seed: Optional[int]
+    cache: Optional[StageCache]
+    namespace: str
+
+    @property
+    def keyed(self) -> bool:
+        return self.seed is not None or self.cache is not None
+
+
+def skip_stage_cache():
+    """Called from a stage: don't cache its current output (e.g. a fallback after a failed API call)"""
+    flag = _store_output.get()
+    if flag is not None:
+        flag[0] = False
+
+
+@contextmanager
+def observe_pipeline(listener: Callable[[Dict[str, Any]], None]) -> Iterator[None]:
+    """
+    Call listener with the progress events of pipelines run in this block (and their branch threads).
+
+    Events are dicts with an "event" key: stage_started and stage_finished
+    (stage, variant, and on finishing elapsed_ms, cached and the stage's
+    output, which later stages may still edit), plus whatever stages notify().
+    The listener runs on the pipeline's thread, so it must not block.
+    """
+    token = _listener.set(listener)
+    try:
+        yield
+    finally:
+        _listener.reset(token)
+
+
+def notify(event: Dict[str, Any]):
+    """Pass a progress event to the current listener, if anyone is observing"""
+    listener = _listener.get()
+    if listener is not None:
+        listener(event)
+
+
+class StageGraph:
+    """
+    A pipeline as an explicit DAG of stages, fanned out over variants.
+
+    Shared stages (the common prefix) run once per request. The per-variant
+    stages then run as one branch per variant, in parallel, each seeing the
+    shared outputs plus its own variant under `variant_key`. Branches run on
+    threads, so they overlap model and API calls; the pure-Python rule stages
+    still take turns on the GIL. Each branch gets a copy of the request's
+    context (regex budgets, ...) and its own request RNG, seeded from the
+    request's, so branches don't draw from one another's streams.
+
+    With a StageCache, every stage output is memoized under a hash of the
+    stage's input content, the pipeline configuration (`namespace`) and, for
+    seeded stages, the request seed. A request that only changes downstream
+    options finds its upstream stages cached and recomputes from the first
+    stage whose inputs changed. Without a request seed, seeded stages are never
+    reused. With one, each seeded stage draws from its own generator, seeded by
+    its cache key, so a stage's output doesn't depend on which earlier stages
+    were recomputed and which came from the cache. That holds as long as
+    seeded stages take every random decision from request_rng() /
+    request_random() (never the module-level random) and stage outputs carry
+    no timings or other run-dependent values, since they feed later keys.
+    """
+
+    def __init__(self, stages: Sequence[Stage], request_inputs: Sequence[str], variant_key: str):
+        self.variant_key = variant_key
+        available = set(request_inputs)
+        shared_outputs = set(request_inputs)
+        self.shared: List[Stage] = []
+        self.branch: List[Stage] = []
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in available and name != variant_key]
+            if missing:
+                raise ValueError(f"Stage {stage.name!r} needs {missing}, which no earlier stage or input provides")
+            if stage.name in available:
+                raise ValueError(f"Duplicate stage or input name {stage.name!r}")
+            if not stage.per_variant:
+                if variant_key in stage.inputs or not set(stage.inputs) <= shared_outputs:
+                    raise ValueError(f"Shared stage {stage.name!r} depends on a per-variant value")
+                shared_outputs.add(stage.name)
+                self.shared.append(stage)
+            else:
+                self.branch.append(stage)
+            available.add(stage.name)
+
+    def run(self, inputs: Dict[str, Any], variants: Sequence[Hashable], max_workers: int = 4,
+            seed: Optional[int] = None, cache: Optional[StageCache] = None,
+            namespace: str = "") -> Dict[Hashable, Dict[str, Any]]:
+        """All stage outputs of every variant's branch (shared outputs included), by variant"""
+        options = _RunOptions(seed, cache, namespace)
+        values, hashes = self._run_shared(inputs, options)
+
+        if len(variants) == 1:
+            # Nothing to fan out: run inline, on the request's own RNG
+            return {variants[0]: self._run_branch(values, hashes, variants[0], options)}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(variants))),
+                                thread_name_prefix="pipeline-branch") as executor:
+            if seed is not None:
+                # Seeded stages already draw from generators of their own
+                futures = {
+                    variant: executor.submit(contextvars.copy_context().run, self._run_branch, values, hashes,
+                                             variant, options)
+                    for variant in variants
+                }
+            else:
+                seeds = request_rng().integers(2 ** 63, size=len(variants)).tolist()
+                futures = {
+                    variant: executor.submit(contextvars.copy_context().run, self._run_seeded_branch, values, hashes,
+                                             variant, options, branch_seed)
+                    for variant, branch_seed in zip(variants, seeds)
+                }
+            return {variant: future.result() for variant, future in futures.items()}
+
+    def run_shared(self, inputs: Dict[str, Any], seed: Optional[int] = None, cache: Optional[StageCache] = None,
+                   namespace: str = "") -> Dict[str, Any]:
+        """The inputs plus the outputs of the shared stages only (for callers that run the branches themselves)"""
+        return self._run_shared(inputs, _RunOptions(seed, cache, namespace))[0]
+
+    def _run_shared(self, inputs: Dict[str, Any], options: _RunOptions) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+        values = dict(inputs)
+        # Content hashes of every value, taken before later stages can edit it in place
+        hashes = {name: content_hash(value) for name, value in inputs.items()} if options.keyed else {}
+        for stage in self.shared:
+            self._run_stage(stage, values, hashes, options, None)
+        return values, hashes
+
+    def _run_seeded_branch(self, values: Dict[str, Any], hashes: Dict[str, bytes], variant: Hashable,
+                           options: _RunOptions, seed: int) -> Dict[str, Any]:
+        with use_request_rng(seed):
+            return self._run_branch(values, hashes, variant, options)
+
+    def _run_branch(self, values: Dict[str, Any], hashes: Dict[str, bytes], variant: Hashable,
+                    options: _RunOptions) -> Dict[str, Any]:
+        branch, branch_hashes = dict(values), dict(hashes)
+        branch[self.variant_key] = variant
+        if options.keyed:
+            branch_hashes[self.variant_key] = content_hash(variant)
+        for stage in self.branch:
+            self._run_stage(stage, branch, branch_hashes, options, variant)
+        return branch
+
+    def _run_stage(self, stage: Stage, values: Dict[str, Any], hashes: Dict[str, bytes], options: _RunOptions,
+                   variant: Optional[Hashable]):
+        listener = _listener.get()
+        if listener is not None:
+            listener({"event": "stage_started", "stage": stage.name, "variant": variant})
+            start = perf_counter()
+        values[stage.name], cached = self._call(stage, values, hashes, options)
+        if listener is not None:
+            listener({"event": "stage_finished", "stage": stage.name, "variant": variant, "cached": cached,
+                      "elapsed_ms": round((perf_counter() - start) * 1000, 1), "output": values[stage.name]})
+        if options.keyed:
+            hashes[stage.name] = content_hash(values[stage.name])
+
+    @staticmethod
+    def _call(stage: Stage, values: Dict[str, Any], hashes: Dict[str, bytes], options: _RunOptions) -> Tuple[Any, bool]:
+        """The stage's output, and whether it came from the cache"""
+        args = [values[name] for name in stage.inputs]
+        seeded = stage.seeded and options.seed is not None
+        cacheable = options.cache is not None and (seeded or not stage.seeded)
+        if not (seeded or cacheable):
+            if options.cache is not None:
+                options.cache.bypass(stage.name)
+            return stage.fn(*args), False
+
+        key = stage_key(stage.name, options.namespace, [hashes[name] for name in stage.inputs],
+                        options.seed if stage.seeded else None)
+        if cacheable:
+            value = options.cache.get(stage.name, key)
+            if value is not MISSING:
+                return value, True
+
+        store = [cacheable]
+        token = _store_output.set(store)
+        try:
+            if seeded:
+                with use_request_rng(int.from_bytes(key[:8], "little")):
+                    value = stage.fn(*args)
+            else:
+                value = stage.fn(*args)
+        finally:
+            _store_output.reset(token)
+        if store[0]:
+            options.cache.put(stage.name, key, value)
+        return value, False
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "shared": [stage.name for stage in self.shared],
+            "per_variant": [stage.name for stage in self.branch],
+            "variant_key": self.variant_key
+        }
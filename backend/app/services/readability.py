@@ -0,0 +1,195 @@
+import logging
+import re
+from itertools import chain
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from app.core.config import settings
+from .document import Document
+from .lexical_similarity import TOKEN_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# Common words the heuristic gets wrong
+SYLLABLE_EXCEPTIONS = {
+    "every": 2, "everything": 3, "everyone": 3, "everybody": 4, "business": 2, "businesses": 3,
+    "different": 3, "evening": 2, "family": 3, "several": 3, "interest": 3, "interesting": 4,
+    "area": 3, "idea": 3, "ideas": 3, "real": 1, "really": 2, "being": 2, "doing": 2, "going": 2,
+    "seeing": 2, "science": 2, "quiet": 2, "create": 2, "created": 3, "creative": 3, "creativity": 5,
+    "people": 2, "poem": 2, "poet": 2, "poetry": 3, "radio": 3, "video": 3, "ratio": 3, "society": 4,
+    "variety": 4, "anxiety": 4, "diet": 2, "lion": 2, "violent": 3, "violence": 3,
+    "period": 3, "serious": 3, "experience": 4, "experiences": 5, "material": 4, "obvious": 3,
+    "theory": 3, "theories": 3, "museum": 3, "usually": 4, "actually": 4, "natural": 3,
+    "chocolate": 2, "camera": 3, "vegetable": 4, "comfortable": 4, "temperature": 4,
+    "where": 1, "there": 1, "here": 1, "were": 1, "more": 1, "before": 2, "whole": 1, "some": 1,
+    "come": 1, "done": 1, "gone": 1, "one": 1, "once": 1, "since": 1, "sure": 1, "fire": 1,
+    "hour": 1, "hours": 1, "our": 1, "flour": 1, "the": 1, "she": 1, "he": 1, "we": 1,
+    "be": 1, "me": 1, "maybe": 2, "recipe": 3, "apostrophe": 4, "simile": 3, "coyote": 3,
+    "naive": 2, "cafe": 2, "cliche": 2, "fiance": 3, "karate": 3, "epitome": 4, "hyperbole": 4,
+    "wednesday": 2, "february": 4, "library": 3, "libraries": 3, "general": 3, "generally": 4,
+    "probably": 3, "especially": 4, "definitely": 4, "necessarily": 5, "immediately": 5,
+    "language": 2, "languages": 3, "sometimes": 2, "react": 2, "fuel": 2, "employee": 3,
+    "ai": 2, "nlp": 3,
+}
+
+_SILENT_ENDING = re.compile(r"(?:[^aeiouy]e|[^aeiouysxzhgc]es|[^aeiouytd]ed)$")
+_CONSONANT_LE = re.compile(r"[^aeiouy]les?$")
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+# Vowel pairs usually spoken as two syllables (ratio and potion aside)
+_HIATUS = re.compile(r"(?:(?<![ct])ia|iu|io(?!n|us)|eo|ua|uo|ie(?=r|t)|ea(?=t[eiou]|l))")
+
+
+def estimate_syllables(word: str) -> int:
+    """Heuristic syllable count: vowel groups, less silent endings, plus common hiatuses"""
+    word = word.lower().strip("'")
+    if word.endswith("'s"):
+        word = word[:-2]
+    if len(word) <= 3:
+        return 1
+    syllables = len(_VOWEL_GROUPS.findall(word))
+    if _SILENT_ENDING.search(word) and not _CONSONANT_LE.search(word):
+        syllables -= 1
+    syllables += len(_HIATUS.findall(word))
+    return max(1, syllables)
+
+
+class SyllableTable(dict):
+    """Word -> syllable count lookup; misses are estimated and remembered, up to max_size words"""
+
+    def __init__(self, entries: Optional[Dict[str, int]] = None, max_size: int = 200000):
+        super().__init__(entries or {})
+        self.max_size = max_size
+        self.misses = 0
+
+    def __missing__(self, word: str) -> int:
+        syllables = estimate_syllables(word)
+        self.misses += 1
+        if len(self) < self.max_size:
+            self[word] = syllables
+        return syllables
+
+    @classmethod
+    def load(cls, path: str) -> "SyllableTable":
+        """A table from "word count" lines (for example, derived from a pronouncing dictionary)"""
+        entries = dict(SYLLABLE_EXCEPTIONS)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) == 2 and fields[1].isdigit():
+                    entries[fields[0].lower()] = int(fields[1])
+        return cls(entries, max_size=len(entries) + 200000)
+
+
+class ReadabilityStats(NamedTuple):
+    """Readability statistics of one text; per-sentence arrays line up with the Document's sentences"""
+    sentence_words: np.ndarray  # word tokens per sentence (0 for sentences without words)
+    sentence_syllables: np.ndarray
+    words: int
+    sentences: int  # sentences with at least one word
+    syllables: int
+    polysyllables: int  # words of three or more syllables
+    characters: int  # characters in word tokens
+
+    @property
+    def words_per_sentence(self) -> float:
+        return self.words / self.sentences if self.sentences else 0.0
+
+    @property
+    def syllables_per_word(self) -> float:
+        return self.syllables / self.words if self.words else 0.0
+
+    @property
+    def flesch_reading_ease(self) -> float:
+        if not self.words:
+            return 0.0
+        return 206.835 - 1.015 * self.words_per_sentence - 84.6 * self.syllables_per_word
+
+    @property
+    def flesch_kincaid_grade(self) -> float:
+        if not self.words:
+            return 0.0
+        return 0.39 * self.words_per_sentence + 11.8 * self.syllables_per_word - 15.59
+
+    @property
+    def sentence_syllables_per_word(self) -> np.ndarray:
+        return self.sentence_syllables / np.maximum(self.sentence_words, 1)
+
+    def summary(self) -> Dict[str, float]:
+        lengths = self.sentence_words[self.sentence_words > 0]
+        return {
+            "flesch_reading_ease": round(self.flesch_reading_ease, 2),
+            "flesch_kincaid_grade": round(self.flesch_kincaid_grade, 2),
+            "words_per_sentence": round(self.words_per_sentence, 2),
+            "sentence_length_std": round(float(lengths.std()), 2) if len(lengths) else 0.0,
+            "sentence_length_p90": round(float(np.percentile(lengths, 90)), 2) if len(lengths) else 0.0,
+            "syllables_per_word": round(self.syllables_per_word, 3),
+            "polysyllable_ratio": round(self.polysyllables / self.words, 4) if self.words else 0.0,
+            "characters_per_word": round(self.characters / self.words, 2) if self.words else 0.0
+        }
+
+
+class ReadabilityEngine:
+    """
+    Flesch-Kincaid, sentence-length and syllable statistics.
+
+    All word tokens of a batch are looked up in the syllable table in one
+    pass and every statistic is an array reduction over them (bincount by
+    sentence, then by text), so scoring a document costs a tokenization and a
+    dictionary lookup per word.
+    """
+
+    def __init__(self, table: Optional[SyllableTable] = None):
+        self.table = table if table is not None else SyllableTable(SYLLABLE_EXCEPTIONS)
+
+    def analyze(self, text: Union[str, Document]) -> ReadabilityStats:
+        return self.analyze_batch([text])[0]
+
+    def analyze_batch(self, texts: Sequence[Union[str, Document]]) -> List[ReadabilityStats]:
+        documents = [Document.coerce(text) for text in texts]
+        tokens = [TOKEN_PATTERN.findall(sentence.lower()) for document in documents for sentence in document]
+        sentence_counts = [len(document) for document in documents]
+        sentence_words = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        total = int(sentence_words.sum())
+
+        syllables = np.fromiter(map(self.table.__getitem__, chain.from_iterable(tokens)), dtype=np.int64, count=total)
+        characters = np.fromiter(map(len, chain.from_iterable(tokens)), dtype=np.int64, count=total)
+        token_sentences = np.repeat(np.arange(len(tokens)), sentence_words)
+        sentence_syllables = np.bincount(token_sentences, weights=syllables, minlength=len(tokens)).astype(np.int64)
+        sentence_polysyllables = np.bincount(token_sentences, weights=syllables >= 3, minlength=len(tokens))
+        sentence_characters = np.bincount(token_sentences, weights=characters, minlength=len(tokens))
+
+        # Per-text sums over each text's run of sentences
+        sentence_texts = np.repeat(np.arange(len(documents)), sentence_counts)
+        def per_text(values):
+            return np.bincount(sentence_texts, weights=values, minlength=len(documents)).astype(np.int64)
+        words, syllable_totals = per_text(sentence_words), per_text(sentence_syllables)
+        sentences, polysyllables = per_text(sentence_words > 0), per_text(sentence_polysyllables)
+        character_totals = per_text(sentence_characters)
+
+        stats = []
+        bounds = np.concatenate([[0], np.cumsum(sentence_counts)]).astype(np.int64)
+        for i in range(len(documents)):
+            group = slice(bounds[i], bounds[i + 1])
+            stats.append(ReadabilityStats(sentence_words[group], sentence_syllables[group], int(words[i]),
+                                          int(sentences[i]), int(syllable_totals[i]), int(polysyllables[i]),
+                                          int(character_totals[i])))
+        return stats
+
+    def improvement(self, before: ReadabilityStats, after: ReadabilityStats) -> float:
+        """Change in Flesch reading ease as a fraction of its 0-100 scale (negative = harder to read)"""
+        return (after.flesch_reading_ease - before.flesch_reading_ease) / 100
+
+
+def load_syllable_table() -> SyllableTable:
+    if settings.SYLLABLE_TABLE_PATH:
+        try:
+            table = SyllableTable.load(settings.SYLLABLE_TABLE_PATH)
+            logger.info(f"✅ Syllable table loaded: {len(table)} words")
+            return table
+        except OSError as e:
+            logger.warning(f"⚠️ Syllable table unavailable ({settings.SYLLABLE_TABLE_PATH}): {e}")
+    return SyllableTable(SYLLABLE_EXCEPTIONS)
+
+
+readability_engine = ReadabilityEngine(load_syllable_table())
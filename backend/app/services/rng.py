@@ -0,0 +1,64 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Sequence, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+_request_rng: ContextVar[Optional[np.random.Generator]] = ContextVar("request_rng", default=None)
+
+
+def request_rng() -> np.random.Generator:
+    """
+    The NumPy generator of the current request.
+
+    Outside of a `use_request_rng` block a fresh generator is seeded from the
+    global `random` state, so `random.seed()` keeps runs reproducible.
+    """
+    rng = _request_rng.get()
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    return rng
+
+
+class RequestRandom:
+    """The `random` module functions the rule stages use, drawing from a request's NumPy generator"""
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+
+    def random(self) -> float:
+        return float(self.rng.random())
+
+    def randint(self, a: int, b: int) -> int:
+        return int(self.rng.integers(a, b + 1))
+
+    def choice(self, options: Sequence[T]) -> T:
+        return options[int(self.rng.integers(len(options)))]
+
+    def shuffle(self, items: List):
+        items[:] = [items[i] for i in self.rng.permutation(len(items))]
+
+
+def request_random() -> RequestRandom:
+    """
+    request_rng() behind the `random` interface.
+
+    Stages draw from this rather than the module-level `random`, so their
+    output depends only on the request's generator: threads of a fan-out don't
+    share a stream, and a seeded stage redraws the same decisions anywhere.
+    """
+    return RequestRandom(request_rng())
+
+
+@contextmanager
+def use_request_rng(seed: Optional[int] = None) -> Iterator[np.random.Generator]:
+    """Bind one generator to the current request (thread / task) for the duration of the block"""
+    rng = np.random.default_rng(seed if seed is not None else random.getrandbits(64))
+    token = _request_rng.set(rng)
+    try:
+        yield rng
+    finally:
+        _request_rng.reset(token)
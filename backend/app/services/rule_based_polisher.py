@@ -1,9 +1,79 @@
 import re
 import logging
-from typing import List, Tuple
+from bisect import bisect_right
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .safe_regex import SafePattern, regex_guard
 
 logger = logging.getLogger(__name__)
 
+# Matches this close (in characters) to preserved content are left alone
+PRESERVE_MARGIN = 20
+
+
+def compile_template(replacement) -> Callable[[re.Match], str]:
+    """
+    Turn a replacement template with \\N group references into a function of
+    the match, so the template isn't re-parsed for every match
+    """
+    if callable(replacement):
+        return replacement
+    pieces = re.split(r'\\(\d+)', replacement)
+    literals, groups = pieces[0::2], [int(group) for group in pieces[1::2]]
+    if not groups:
+        return lambda match: replacement
+
+    def expand(match: re.Match) -> str:
+        out = [literals[0]]
+        for group, literal in zip(groups, literals[1:]):
+            out.append(match.group(group) or "")
+            out.append(literal)
+        return "".join(out)
+    return expand
+
+
+class ProtectedSpans:
+    """Sorted index of non-overlapping character intervals that polishing must not touch"""
+
+    def __init__(self, spans: Iterable[Tuple[int, int]] = ()):
+        starts: List[int] = []
+        ends: List[int] = []
+        for start, end in sorted(spans):
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Whether [start, end) intersects any protected interval"""
+        k = bisect_right(self.ends, start)
+        return k < len(self.starts) and self.starts[k] < end
+
+    def shifted(self, edits: List[Tuple[int, int]]) -> "ProtectedSpans":
+        """
+        The same intervals after a rule's edits, given as (end, length_change)
+        pairs in increasing order. Edits never touch protected intervals, so an
+        interval moves by the total change of the edits that end before it.
+        """
+        if not edits:
+            return self
+        edit_ends = np.fromiter((end for end, _ in edits), dtype=np.int64, count=len(edits))
+        shifts = np.concatenate(([0], np.cumsum([change for _, change in edits])))
+        moved = ProtectedSpans()
+        for name in ("starts", "ends"):
+            positions = np.asarray(getattr(self, name), dtype=np.int64)
+            setattr(moved, name, (positions + shifts[np.searchsorted(edit_ends, positions, side="right")]).tolist())
+        return moved
+
+
 class RuleBasedPolisher:
     """
     Sophisticated rule-based text polisher that improves readability
@@ -14,7 +84,7 @@ class RuleBasedPolisher:
         # Patterns to preserve (DO NOT modify these)
         self.preserve_patterns = [
             r'\b(?:in some cases|you might say|to be honest|from what I\'ve seen|in my opinion|come to think of it)\b',
-            r'\([^)]+\)',  # Parenthetical comments
+            r'\([^)]{1,500}\)',  # Parenthetical comments (bounded, so unclosed parentheses scan linearly)
             r'—[^—]+—',    # Em-dash asides
             r'\.{3}',      # Ellipses
             r'\b(?:basically|in other words|what I mean is)\b',  # Redundancy phrases
@@ -23,7 +93,7 @@ class RuleBasedPolisher:
         # Safe polishing rules (improve readability without destroying quirks)
         self.polish_rules = [
             # Fix spacing issues
-            (r'\s+([,.!?;:])', r'\1'),  # Remove space before punctuation
+            (r'(?<!\s)\s+([,.!?;:])', r'\1'),  # Remove space before punctuation (whitespace runs tried once)
             (r'([,.!?;:])\s{2,}', r'\1 '),  # Normalize space after punctuation
             (r'\s{3,}', r'  '),  # Limit excessive spaces to max 2
             
@@ -54,42 +124,55 @@ class RuleBasedPolisher:
             (r'(\.) (So\s)', r'\1 \2'),  # Keep "So" transitions
         ]
 
-    def _is_preserved_content(self, text: str, start: int, end: int) -> bool:
-        """Check if content in range should be preserved"""
-        snippet = text[start:end]
-        for pattern in self.preserve_patterns:
-            if re.search(pattern, snippet, re.IGNORECASE):
-                return True
-        return False
-
-    def _apply_safe_rule(self, text: str, pattern: str, replacement) -> str:
-        """Apply a polishing rule while avoiding preserved content"""
-        try:
-            if callable(replacement):
-                # Handle lambda functions
-                matches = list(re.finditer(pattern, text))
-                offset = 0
-                for match in matches:
-                    start, end = match.span()
-                    start += offset
-                    end += offset
-                    
-                    # Check if this area should be preserved
-                    if not self._is_preserved_content(text, max(0, start-20), min(len(text), end+20)):
-                        old_text = text[start:end]
-                        new_text = replacement(match)
-                        text = text[:start] + new_text + text[end:]
-                        offset += len(new_text) - len(old_text)
-            else:
-                # Handle string replacements with simple substitution
-                if not any(self._is_preserved_content(text, m.start()-20, m.end()+20) 
-                          for m in re.finditer(pattern, text)):
-                    text = re.sub(pattern, replacement, text)
-        except re.error as e:
-            # Skip problematic regex patterns
-            logger.warning(f"Skipping regex pattern due to error: {pattern} - {e}")
-        
-        return text
+        self._preserve = [regex_guard.compile(pattern, re.IGNORECASE, name=f"preserve:{pattern[:30]}")
+                          for pattern in self.preserve_patterns]
+        self._rules = (self._compile_rules(self.polish_rules)
+                       + self._compile_rules(self.transition_improvements, "Improved transition"))
+
+    def _compile_rules(self, rules: List[Tuple[str, object]], label: Optional[str] = None) -> List[Tuple[str, SafePattern, Callable]]:
+        """Compile (pattern, replacement) rules once, skipping any pattern that fails to compile"""
+        compiled = []
+        for pattern, replacement in rules:
+            try:
+                compiled.append((label or f"Applied rule: {pattern[:30]}...", regex_guard.compile(pattern),
+                                 compile_template(replacement)))
+            except re.error as e:
+                logger.warning(f"Skipping regex pattern due to error: {pattern} - {e}")
+        return compiled
+
+    def protected_spans(self, text: str) -> ProtectedSpans:
+        """Index every span of text matched by a preserve pattern"""
+        return ProtectedSpans(match.span() for pattern in self._preserve for match in pattern.finditer(text))
+
+    def _apply_safe_rule(self, text: str, pattern: SafePattern, expand: Callable[[re.Match], str],
+                         protected: ProtectedSpans) -> Tuple[str, List[Tuple[int, int]]]:
+        """
+        Apply a polishing rule in one pass, leaving matches within
+        PRESERVE_MARGIN characters of protected content untouched.
+
+        Returns:
+            Tuple of (new_text, edits) where edits are (end, length_change)
+            pairs in the coordinates of the input text
+        """
+        parts = []
+        edits = []
+        last = 0
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if protected.overlaps(start - PRESERVE_MARGIN, end + PRESERVE_MARGIN):
+                continue
+            new_text = expand(match)
+            if new_text == match.group(0):
+                continue
+            parts.append(text[last:start])
+            parts.append(new_text)
+            last = end
+            edits.append((end, len(new_text) - (end - start)))
+
+        if not edits:
+            return text, edits
+        parts.append(text[last:])
+        return "".join(parts), edits
 
     def polish(self, text: str) -> Tuple[str, List[str]]:
         """
@@ -103,19 +186,16 @@ class RuleBasedPolisher:
         original_text = text
         changes_made = []
         
-        # Apply basic polishing rules
-        for pattern, replacement in self.polish_rules:
-            old_text = text
-            text = self._apply_safe_rule(text, pattern, replacement)
-            if text != old_text:
-                changes_made.append(f"Applied rule: {pattern[:30]}...")
-        
-        # Apply transition improvements (very carefully)
-        for pattern, replacement in self.transition_improvements:
-            old_text = text
-            text = self._apply_safe_rule(text, pattern, replacement)
-            if text != old_text:
-                changes_made.append(f"Improved transition")
+        with regex_guard.budget():
+            # Protected content is located once; later rules only shift its offsets
+            protected = self.protected_spans(text)
+            
+            # Apply basic polishing rules, then transition improvements (very carefully)
+            for change, pattern, expand in self._rules:
+                text, edits = self._apply_safe_rule(text, pattern, expand, protected)
+                if edits:
+                    changes_made.append(change)
+                    protected = protected.shifted(edits)
         
         # Final cleanup - ensure sentences start with capital letters
         sentences = re.split(r'(\.\s+|\!\s+|\?\s+)', text)
@@ -0,0 +1,191 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+# Linear-time engine (no backtracking), used for every pattern it can compile.
+# Note RE2's \w, \b and \s are ASCII-only.
+try:
+    import re2
+    RE2_AVAILABLE = True
+    # Patterns RE2 can't parse fall through to the next engine; don't log them to stderr
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Backtracking engine with per-call timeouts, for patterns RE2 can't express (lookarounds)
+try:
+    import regex
+    REGEX_AVAILABLE = True
+except ImportError:
+    REGEX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("regex_deadline", default=None)
+
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+
+class SafePattern:
+    """
+    A compiled pattern run on the safest engine available, within a time budget.
+
+    RE2 runs in linear time, so it gets no budget. The `regex` module gets the
+    rule budget (or what's left of the stage budget) as a timeout. With only the
+    standard library nothing can interrupt a running match, so a call that
+    blows the budget trips the rule for inputs at least that large. Every
+    pattern that user text flows through must therefore also be linear on the
+    standard engine by construction. A skipped call acts as if nothing matched.
+    """
+
+    def __init__(self, guard: "RegexGuard", pattern: str, flags: int = 0, name: Optional[str] = None,
+                 timeout_ms: Optional[int] = None):
+        self.guard = guard
+        self.pattern = pattern
+        self.flags = flags
+        self.name = name or pattern[:40]
+        self.timeout_ms = timeout_ms
+        self.engine, self._compiled = self._compile(pattern, flags)
+        self._tripped_at: Optional[int] = None  # stdlib: smallest input length that blew the budget
+
+    @staticmethod
+    def _compile(pattern: str, flags: int):
+        if RE2_AVAILABLE:
+            inline = "".join(letter for flag, letter in _INLINE_FLAGS if flags & flag)
+            try:
+                return "re2", re2.compile(f"(?{inline}){pattern}" if inline else pattern, _RE2_OPTIONS)
+            except Exception:
+                pass  # lookarounds, backreferences, ...
+        if REGEX_AVAILABLE:
+            regex_flags = 0
+            for flag, letter in _INLINE_FLAGS:
+                if flags & flag:
+                    regex_flags |= getattr(regex, flag.name)
+            return "regex", regex.compile(pattern, regex_flags)
+        return "re", re.compile(pattern, flags)
+
+    def sub(self, repl, string: str, count: int = 0) -> str:
+        return self._run("sub", string, string, repl, string, count=count)
+
+    def subn(self, repl, string: str, count: int = 0):
+        return self._run("subn", string, (string, 0), repl, string, count=count)
+
+    def search(self, string: str):
+        return self._run("search", string, None, string)
+
+    def finditer(self, string: str) -> List:
+        """All matches, found up front so the whole scan is within the budget"""
+        return self._run("finditer", string, [], string)
+
+    def split(self, string: str) -> List[str]:
+        return self._run("split", string, [string], string)
+
+    def _run(self, op: str, string: str, skipped, *args, **kwargs):
+        timeout = self.guard.remaining(self.timeout_ms)
+        if timeout is not None and timeout <= 0:
+            self.guard.record_skip(self, "stage budget exhausted", len(string))
+            return skipped
+        if self._tripped_at is not None and len(string) >= self._tripped_at:
+            self.guard.record_skip(self, "rule tripped earlier on an input this large", len(string))
+            return skipped
+
+        start = time.perf_counter()
+        try:
+            if self.engine == "regex" and timeout is not None:
+                kwargs["timeout"] = timeout
+            result = getattr(self._compiled, op)(*args, **kwargs)
+            if op == "finditer":
+                result = list(result)
+        except TimeoutError:
+            self.guard.record_skip(self, "timed out", len(string))
+            return skipped
+        elapsed = time.perf_counter() - start
+
+        self.guard.record_call(self.engine)
+        rule_timeout = self.guard.rule_timeout(self.timeout_ms)
+        if self.engine == "re" and rule_timeout is not None and elapsed > rule_timeout:
+            self.guard.record_trip(self, elapsed, len(string))
+        return result
+
+    def __repr__(self) -> str:
+        return f"SafePattern({self.name!r}, engine={self.engine})"
+
+
+class RegexGuard:
+    """Compiles SafePatterns and tracks per-stage deadlines and skipped rules"""
+
+    def __init__(self, rule_timeout_ms: int = 250, stage_budget_ms: int = 2000):
+        self.rule_timeout_ms = rule_timeout_ms
+        self.stage_budget_ms = stage_budget_ms
+        self.calls: Counter = Counter()
+        self.skipped: Counter = Counter()
+        self.tripped: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def compile(self, pattern: str, flags: int = 0, name: Optional[str] = None,
+                timeout_ms: Optional[int] = None) -> SafePattern:
+        return SafePattern(self, pattern, flags, name, timeout_ms)
+
+    @contextmanager
+    def budget(self, budget_ms: Optional[int] = None) -> Iterator[None]:
+        """Bound the total regex time of a stage; a budget nested in another never extends it"""
+        deadline = time.perf_counter() + (budget_ms if budget_ms is not None else self.stage_budget_ms) / 1000
+        outer = _deadline.get()
+        token = _deadline.set(deadline if outer is None else min(outer, deadline))
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    def rule_timeout(self, timeout_ms: Optional[int] = None) -> Optional[float]:
+        """Seconds one call of a rule may take (None = unlimited)"""
+        timeout_ms = self.rule_timeout_ms if timeout_ms is None else timeout_ms
+        return timeout_ms / 1000 if timeout_ms > 0 else None
+
+    def remaining(self, timeout_ms: Optional[int] = None) -> Optional[float]:
+        """Seconds a call may take: the rule timeout, capped by the current stage deadline"""
+        timeout = self.rule_timeout(timeout_ms)
+        deadline = _deadline.get()
+        if deadline is not None:
+            left = deadline - time.perf_counter()
+            timeout = left if timeout is None else min(timeout, left)
+        return timeout
+
+    def record_call(self, engine: str):
+        with self._lock:
+            self.calls[engine] += 1
+
+    def record_skip(self, pattern: SafePattern, reason: str, length: int):
+        with self._lock:
+            self.skipped[pattern.name] += 1
+        logger.warning(f"⏱️ Skipping regex rule {pattern.name!r} ({reason}, input of {length} chars)")
+
+    def record_trip(self, pattern: SafePattern, elapsed: float, length: int):
+        with self._lock:
+            self.tripped[pattern.name] += 1
+            pattern._tripped_at = length if pattern._tripped_at is None else min(pattern._tripped_at, length)
+        logger.warning(f"⏱️ Regex rule {pattern.name!r} took {elapsed * 1000:.0f} ms on {length} chars; "
+                       f"skipping it for inputs this large from now on")
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "engines": {"re2": RE2_AVAILABLE, "regex": REGEX_AVAILABLE},
+            "rule_timeout_ms": self.rule_timeout_ms,
+            "stage_budget_ms": self.stage_budget_ms,
+            **self._counters()
+        }
+
+    def _counters(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {"calls": dict(self.calls), "skipped": dict(self.skipped), "tripped": dict(self.tripped)}
+
+
+regex_guard = RegexGuard(settings.REGEX_RULE_TIMEOUT_MS, settings.REGEX_STAGE_BUDGET_MS)
@@ -0,0 +1,435 @@
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .document import Document, SENTENCE_BOUNDARY, count_words
+from .lexicon import Lexicon
+from .rng import request_rng
+
+logger = logging.getLogger(__name__)
+
+
+def pick(options: Sequence, u: float):
+    """random.choice driven by a pre-drawn uniform"""
+    return options[min(int(u * len(options)), len(options) - 1)]
+
+
+def randint(a: int, b: int, u: float) -> int:
+    """random.randint(a, b) driven by a pre-drawn uniform"""
+    return a + min(int(u * (b - a + 1)), b - a)
+
+
+class Draws:
+    """Uniform [0, 1) decisions for one rule, drawn from the request RNG in vectorized blocks"""
+
+    def __init__(self, rng: np.random.Generator, block: int):
+        self.rng = rng
+        self.block = max(block, 16)
+        self._buffer: List[float] = []
+        self._pos = 0
+
+    def take(self, n: int) -> List[float]:
+        if self._pos + n > len(self._buffer):
+            rest = self._buffer[self._pos:]
+            self._buffer = rest + self.rng.random(max(self.block, n)).tolist()
+            self._pos = 0
+        values = self._buffer[self._pos:self._pos + n]
+        self._pos += n
+        return values
+
+    def next(self) -> float:
+        return self.take(1)[0]
+
+
+class SentenceRule:
+    """
+    One sentence-level operator of the fused engine.
+
+    `apply` receives every sentence coming out of the previous rule and emits
+    zero or more sentences on its stage: `emit` for a new sentence, or
+    `replace_last` to rewrite (e.g. merge into) the last sentence it emitted.
+    `uniforms` is the number of decisions pre-drawn per input sentence.
+    """
+
+    name = "rule"
+    uniforms = 0
+
+    def block_size(self, document: Document) -> int:
+        return self.uniforms * len(document)
+
+    def start(self, stage: "_Stage"):
+        """Per-run setup (document-level decisions)"""
+
+    def apply(self, stage: "_Stage", sentence: str, count: int, separator: str):
+        stage.emit(sentence, count, separator)
+
+
+class _Stage:
+    """A rule in the chain, holding back its last output so the rule can still rewrite it"""
+
+    __slots__ = ("rule", "draws", "next", "pending", "inputs", "emitted")
+
+    def __init__(self, rule: SentenceRule, draws: Draws, next_stage):
+        self.rule = rule
+        self.draws = draws
+        self.next = next_stage
+        self.pending = None
+        self.inputs = 0
+        self.emitted = 0
+
+    def push(self, sentence: str, count: int, separator: str):
+        self.rule.apply(self, sentence, count, separator)
+        self.inputs += 1
+
+    def emit(self, sentence: str, count: Optional[int] = None, separator: str = " "):
+        if self.pending is not None:
+            self.next.push(*self.pending)
+        self.pending = (sentence, count_words(sentence) if count is None else count, separator)
+        self.emitted += 1
+
+    def emit_text(self, text: str, separator: str = " "):
+        """Emit text that may contain several sentences"""
+        parts = SENTENCE_BOUNDARY.split(text.strip())
+        for i, sentence in enumerate(parts[0::2]):
+            if sentence:
+                self.emit(sentence, None, separator if i == 0 else parts[2 * i - 1])
+
+    @property
+    def last(self) -> Optional[str]:
+        return self.pending[0] if self.pending is not None else None
+
+    @property
+    def last_count(self) -> int:
+        return self.pending[1]
+
+    def replace_last(self, sentence: str, count: Optional[int] = None):
+        self.pending = (sentence, count_words(sentence) if count is None else count, self.pending[2])
+
+    def finish(self):
+        if self.pending is not None:
+            self.next.push(*self.pending)
+            self.pending = None
+        self.next.finish()
+
+
+class _Sink:
+    def __init__(self):
+        self.document = Document()
+
+    def push(self, sentence: str, count: int, separator: str):
+        self.document.append(sentence, count, separator)
+
+    def finish(self):
+        pass
+
+
+class SentenceEngine:
+    """
+    Applies a chain of sentence rules to a Document in a single traversal.
+
+    Every sentence flows through all rules before the next one is read, so N
+    rules cost one pass instead of N splits and joins. Each rule's random
+    decisions are pre-drawn in NumPy blocks from the request RNG.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, int] = {"runs": 0, "sentences": 0, "rule_applications": 0}
+
+    def run(self, document: Document, rules: Sequence[SentenceRule],
+            rng: Optional[np.random.Generator] = None) -> Document:
+        """Rewrite the document in place with the rules, in order"""
+        if not rules or not len(document):
+            return document
+        rng = rng if rng is not None else request_rng()
+        sink = _Sink()
+        head = sink
+        stages = []
+        for rule in reversed(rules):
+            head = _Stage(rule, Draws(rng, rule.block_size(document)), head)
+            stages.append(head)
+        for stage in reversed(stages):
+            stage.rule.start(stage)
+
+        for i, sentence in enumerate(document):
+            head.push(sentence, document.count(i), document.separator_before(i))
+        head.finish()
+
+        self.stats["runs"] += 1
+        self.stats["sentences"] += len(document)
+        self.stats["rule_applications"] += sum(stage.inputs for stage in stages)
+        document.assign(sink.document)
+        logger.debug(f"Fused {len(rules)} rules ({', '.join(r.name for r in rules)}) over {len(document)} sentences")
+        return document
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+
+# --- Rules ---
+
+class LexiconRule(SentenceRule):
+    """Lexicon substitution; variant lists are picked with the request RNG"""
+
+    name = "lexicon"
+
+    def __init__(self, lexicon: Lexicon, name: Optional[str] = None):
+        self.lexicon = lexicon
+        self.name = name or self.name
+
+    def block_size(self, document: Document) -> int:
+        return len(document)
+
+    def apply(self, stage, sentence, count, separator):
+        rewritten = self.lexicon.sub(sentence, choose=lambda variants: pick(variants, stage.draws.next()))
+        stage.emit(rewritten, count if rewritten == sentence else None, separator)
+
+
+class FunctionWordRule(SentenceRule):
+    """StylometricHumanizer.adjust_function_words"""
+
+    name = "function_words"
+
+    def __init__(self, function_words: Sequence[str], probability: float = 0.15):
+        self.function_words = set(function_words)
+        self.probability = probability
+
+    def block_size(self, document: Document) -> int:
+        return document.word_count
+
+    def apply(self, stage, sentence, count, separator):
+        words = sentence.split()
+        u = stage.draws.take(len(words))
+        added = 0
+        for i, word in enumerate(words):
+            if word.lower() in self.function_words and u[i] < self.probability:
+                words[i] = word + " really"
+                added += 1
+        stage.emit(" ".join(words) if added else sentence, count + added, separator)
+
+
+class StarterRule(SentenceRule):
+    """EducationalLevelEngine.add_level_transitions: prefix a starter phrase, lower-case the rest"""
+
+    name = "starter"
+    uniforms = 2
+
+    def __init__(self, starters: Sequence[str], probability: float, name: Optional[str] = None):
+        self.starters = list(starters)
+        self.probability = probability
+        self.name = name or self.name
+
+    def apply(self, stage, sentence, count, separator):
+        u = stage.draws.take(2)
+        if u[0] < self.probability:
+            starter = pick(self.starters, u[1])
+            stage.emit(f"{starter}, {sentence.lower()}", count + count_words(starter), separator)
+        else:
+            stage.emit(sentence, count, separator)
+
+
+class HumanVarianceRule(SentenceRule):
+    """StylometricHumanizer.insert_human_variance"""
+
+    name = "human_variance"
+    uniforms = 4
+
+    def __init__(self, clause_starters: Sequence[str], filler_phrases: Sequence[str]):
+        self.starters = list(clause_starters)
+        self.fillers = list(filler_phrases)
+
+    def apply(self, stage, sentence, count, separator):
+        u = stage.draws.take(4)
+        if u[0] < 0.25:
+            starter = pick(self.starters, u[1])
+            sentence = f"{starter}, {sentence.lower()}"
+            count += count_words(starter)
+        if u[2] < 0.2:
+            filler = pick(self.fillers, u[3])
+            sentence += f", {filler}."
+            count += count_words(filler)
+        stage.emit(sentence, count, separator)
+
+
+class SplitLongRule(SentenceRule):
+    """EducationalLevelEngine.adjust_sentence_complexity: halve sentences over the level's length"""
+
+    name = "sentence_complexity"
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+
+    def apply(self, stage, sentence, count, separator):
+        if count > self.max_length:
+            words = sentence.split()
+            mid_point = count // 2
+            stage.emit(" ".join(words[:mid_point]) + ".", mid_point, separator)
+            stage.emit(" ".join(words[mid_point:]), count - mid_point)
+        else:
+            stage.emit(sentence, count, separator)
+
+
+class SentenceLengthRule(SentenceRule):
+    """StylometricHumanizer.adjust_sentence_lengths"""
+
+    name = "sentence_lengths"
+    uniforms = 2
+
+    def apply(self, stage, sentence, count, separator):
+        u = stage.draws.take(2)
+        if count > 18 and u[0] < 0.5:
+            words = sentence.split()
+            cut = randint(8, count - 5, u[1])
+            stage.emit(" ".join(words[:cut]) + ".", cut, separator)
+            stage.emit(" ".join(words[cut:]), count - cut)
+        elif count < 8 and u[0] < 0.3 and stage.last is not None:
+            stage.replace_last(stage.last.rstrip(".") + ", " + sentence.lower(), stage.last_count + count)
+        else:
+            stage.emit(sentence, count, separator)
+
+
+class PunctuationRule(SentenceRule):
+    """StylometricHumanizer.punctuate_variably: replace some ". " boundaries"""
+
+    name = "punctuation"
+    uniforms = 2
+    OPTIONS = [" — ", "… ", "; "]
+
+    def apply(self, stage, sentence, count, separator):
+        u = stage.draws.take(2)
+        last = stage.last
+        if last is not None and last.endswith(".") and separator.startswith(" ") and u[0] < 0.35:
+            stage.replace_last(last[:-1] + pick(self.OPTIONS, u[1]) + separator[1:] + sentence)
+        else:
+            stage.emit(sentence, count, separator)
+
+
+class GPTZeroRule(SentenceRule):
+    """MultiDetectorObfuscator.gptzero_evasion: simple / complex / medium sentence rhythm"""
+
+    name = "gptzero"
+
+    def __init__(self, clause: str):
+        self.clause = clause
+        self.clause_words = count_words(clause)
+
+    def apply(self, stage, sentence, count, separator):
+        position = stage.inputs % 3
+        if position == 0:
+            words = sentence.split()[:8]
+            stage.emit(" ".join(words) + ".", len(words), separator)
+        elif position == 1 and count > 5:
+            words = sentence.split()
+            words.insert(len(words) // 2, self.clause)
+            stage.emit(" ".join(words), count + self.clause_words, separator)
+        else:
+            stage.emit(sentence, count, separator)
+
+
+class TangentRule(SentenceRule):
+    """MultiDetectorObfuscator.surferseo_evasion: follow some sentences with a tangent"""
+
+    name = "surferseo"
+    uniforms = 2
+
+    def __init__(self, tangents: Sequence[str], probability: float = 0.15):
+        self.tangents = list(tangents)
+        self.probability = probability
+
+    def apply(self, stage, sentence, count, separator):
+        u = stage.draws.take(2)
+        stage.emit(sentence, count, separator)
+        if u[0] < self.probability:
+            stage.emit(pick(self.tangents, u[1]))
+
+
+class SpacingRule(SentenceRule):
+    """MultiDetectorObfuscator.general_evasion: spacing fixes, an occasional double space"""
+
+    name = "general"
+    PERIOD = re.compile(r'\.(\w)')
+    COMMA = re.compile(r',(\w)')
+
+    def start(self, stage):
+        self.double_space = stage.draws.next() < 0.1
+
+    def apply(self, stage, sentence, count, separator):
+        if self.double_space:
+            last = stage.last
+            if last is not None and last.endswith('.') and separator.startswith(' '):
+                separator = ' ' + separator
+                self.double_space = False
+        fixed = self.COMMA.sub(r', \1', self.PERIOD.sub(r'. \1', sentence))
+        if fixed == sentence:
+            stage.emit(sentence, count, separator)
+        else:
+            stage.emit_text(fixed, separator)
+
+
+class CoherenceRule(SentenceRule):
+    """CoherenceDisruptor.disrupt_coherence, including the paragraph breaks"""
+
+    name = "coherence"
+    uniforms = 12
+
+    def __init__(self, tangents: Sequence[str], emphasis_starters: Sequence[str],
+                 simplify: Callable[[str], str], paranoid_mode: bool = True):
+        self.tangents = list(tangents)
+        self.emphasis_starters = list(emphasis_starters)
+        self.simplify = simplify
+        self.tangent_probability = 0.20 if paranoid_mode else 0.10
+        self.emphasis_probability = 0.15 if paranoid_mode else 0.08
+
+    def apply(self, stage, sentence, count, separator):
+        u = stage.draws.take(12)
+
+        if u[0] < self.tangent_probability:
+            words = sentence.split()
+            words.insert(randint(1, max(1, count - 1), u[1]), pick(self.tangents, u[2]))
+            sentence = " ".join(words)
+            count = None
+
+        merged = u[3] < 0.20 and stage.last is not None
+        if merged:
+            sentence = stage.last.rstrip(".!?") + ", " + sentence.lower()
+            count = None
+
+        if u[4] < 0.12:
+            clauses = sentence.split(",")
+            if len(clauses) > 1:
+                sentence = clauses[0] + "."
+                count = None
+
+        if u[5] < 0.18:
+            sentence = sentence.replace(",", " —", 1)
+            count = None
+
+        if u[6] < 0.08:
+            sentence = sentence.replace(" and ", " & ", 1)
+
+        if u[7] < self.emphasis_probability:
+            emphasis = pick(self.emphasis_starters, u[8])
+            sentence += f" {emphasis}{self.simplify(sentence).lower()}"
+            count = None
+
+        if u[9] < 0.10:
+            words = sentence.split()
+            if len(words) > 6:
+                words.insert(randint(3, len(words) - 3, u[10]), "...")
+                sentence = " ".join(words)
+                count = len(words)
+
+        if merged:
+            stage.replace_last(sentence, count)
+            return
+        # Paragraph break after the previous (now final) sentence at irregular intervals
+        previous = stage.emitted - 1
+        if previous > 0 and previous % randint(3, 7, u[11]) == 0:
+            separator = " \n\n"
+        else:
+            separator = " "
+        stage.emit(sentence, count, separator)
+
+
+sentence_engine = SentenceEngine()
@@ -0,0 +1,13 @@
+"""
+Preloaded by the shard pool's forkserver (and imported by every shard worker).
+
+Shard workers only run the per-level stages (Step 3 on), which need the
+lexicons and the semantic model but never Pegasus. Restricting the registry
+before the pipeline is imported keeps a Pegasus copy out of every forkserver.
+"""
+
+from .model_registry import model_registry
+
+model_registry.restrict(["semantic"], reason="not loaded in shard workers")
+
+from .humanizer import humanizer  # noqa: E402,F401
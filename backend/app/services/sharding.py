@@ -0,0 +1,125 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from .document import Document, split_paragraphs
+from .rng import use_request_rng
+
+logger = logging.getLogger(__name__)
+
+# Imported once in the forkserver, so every worker forks with the local stages' lexicons and semantic model loaded
+WORKER_PRELOAD = ["app.services.shard_worker"]
+
+
+def shard_text(text: str, target_words: int) -> Tuple[List[str], List[str]]:
+    """
+    Contiguous shards of about target_words words each, and the separators between them.
+
+    Shards are cut at paragraph boundaries; a paragraph longer than
+    target_words is cut between its sentences instead. Joining the shards
+    with the separators gives back the text (less surrounding whitespace).
+    """
+    units, unit_separators = [], []  # (text, words) of paragraphs or sentences, and the whitespace after each
+    paragraphs, separators = split_paragraphs(text)
+    for paragraph, separator in zip(paragraphs, separators + [""]):
+        document = Document.from_text(paragraph)
+        if document.word_count > target_words and len(document) > 1:
+            units.extend((sentence, document.count(i)) for i, sentence in enumerate(document))
+            unit_separators.extend(document.separators + [separator])
+        else:
+            units.append((paragraph, document.word_count))
+            unit_separators.append(separator)
+
+    shards, shard_separators = [], []
+    current, words = "", 0
+    for (unit, count), separator in zip(units, unit_separators):
+        current += unit
+        words += count
+        if words >= target_words:
+            shards.append(current)
+            shard_separators.append(separator)
+            current, words = "", 0
+        else:
+            current += separator
+    if current:
+        shards.append(current)
+    elif shard_separators:
+        shard_separators.pop()
+    return shards, shard_separators
+
+
+def shard_seeds(seed: int, count: int) -> List[int]:
+    """Deterministic, independent sub-seeds of a request seed, one per shard"""
+    return [int(state[0]) for state in (child.generate_state(1, np.uint64)
+                                        for child in np.random.SeedSequence(seed).spawn(count))]
+
+
+def run_local_stages(shard: str, education_level: str, paranoid_mode: bool, writehuman_mode: bool, seed: int) -> str:
+    """The per-level stages (Step 3 on) over one shard; runs in a pool worker"""
+    from .humanizer import humanizer
+    with use_request_rng(seed):
+        values = humanizer.local_graph.run({"gemini_humanized": shard, "paranoid_mode": paranoid_mode,
+                                            "writehuman_mode": writehuman_mode, "min_words": 0}, [education_level])
+    return values[education_level]["polished"]
+
+
+def _warm_worker():
+    from . import shard_worker  # noqa: F401 (already imported when the forkserver preloaded it)
+    logger.info(f"✅ Shard worker {os.getpid()} ready")
+
+
+class ShardPool:
+    """
+    Process pool for the CPU-bound rule stages of paragraph shards.
+
+    The rule stages are pure Python, so threads take turns on the GIL; worker
+    processes run shards on separate cores. Workers start from a forkserver
+    that has already imported the pipeline, so they begin with its lexicons
+    and tables loaded, and without inheriting the server's threads. The
+    forkserver never loads Pegasus, which shards don't use (see shard_worker).
+    The pool is created on first use.
+    """
+
+    def __init__(self, workers: int = 0, start_method: str = "forkserver"):
+        """
+        Args:
+            workers (int): Worker processes, 0 = cpu_count // WEB_CONCURRENCY
+            start_method (str): multiprocessing start method (forkserver, spawn or fork)
+        """
+        self.workers = workers or max(1, (os.cpu_count() or 1) // max(1, settings.WEB_CONCURRENCY))
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context(self.start_method)
+                if self.start_method == "forkserver":
+                    context.set_forkserver_preload(WORKER_PRELOAD)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                     initializer=_warm_worker)
+                logger.info(f"🔀 Shard pool started: {self.workers} workers ({self.start_method})")
+            return self._executor
+
+    def imap(self, fn: Callable, *iterables: Iterable) -> Iterator:
+        """fn over the items, in worker processes; results are yielded in input order as they're ready"""
+        return self._pool().map(fn, *iterables)
+
+    def map(self, fn: Callable, *iterables: Iterable) -> list:
+        return list(self.imap(fn, *iterables))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+shard_pool = ShardPool(settings.SHARD_WORKERS, settings.SHARD_START_METHOD)
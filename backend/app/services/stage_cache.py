@@ -0,0 +1,132 @@
+import hashlib
+import sys
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from .document import Document
+
+MISSING = object()
+
+
+def snapshot(value: Any) -> Any:
+    """A copy of a stage output that later stages can edit without touching the original"""
+    if isinstance(value, Document):
+        return value.copy()
+    if isinstance(value, dict):
+        return {key: snapshot(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [snapshot(item) for item in value]
+    return value
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory held by a stage output, in bytes"""
+    if isinstance(value, Document):
+        return sum(map(sys.getsizeof, value.sentences)) + 16 * len(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def content_hash(value: Any) -> bytes:
+    """Digest of a stage input or output by content (Documents by their text)"""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(value, Document):
+        h.update(b"D" + value.text.encode("utf-8"))
+    elif isinstance(value, str):
+        h.update(b"S" + value.encode("utf-8"))
+    elif isinstance(value, dict):
+        h.update(b"M")
+        for key in sorted(value, key=str):
+            h.update(str(key).encode("utf-8") + b"\0" + content_hash(value[key]))
+    else:
+        h.update(b"R" + repr(value).encode("utf-8"))
+    return h.digest()
+
+
+def stage_key(stage: str, namespace: str, input_hashes: Sequence[bytes], seed: Optional[int]) -> bytes:
+    """Cache key of one stage call: the stage, the pipeline configuration, its inputs and the request seed"""
+    h = hashlib.blake2b(f"{stage}\0{namespace}\0{seed}".encode("utf-8"), digest_size=16)
+    for digest in input_hashes:
+        h.update(digest)
+    return h.digest()
+
+
+class StageCache:
+    """
+    Bounded LRU cache of pipeline stage outputs, keyed by stage_key().
+
+    Entries are snapshots: outputs are copied on the way in and on the way out,
+    since the stages after them edit Documents in place. The cache holds at
+    most max_bytes of (estimated) output; hits, misses, stores, evictions and
+    bypasses (stages that can't be reused for this request) are counted per stage.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, max_bytes)
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[str, Any, int]]" = OrderedDict()  # key -> (stage, value, size)
+        self._stats: Dict[str, Counter] = defaultdict(Counter)
+
+    def get(self, stage: str, key: bytes) -> Any:
+        """A copy of the cached output, or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats[stage]["misses"] += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self._stats[stage]["hits"] += 1
+        return snapshot(entry[1])
+
+    def put(self, stage: str, key: bytes, value: Any):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        value = snapshot(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._entries[key] = (stage, value, size)
+            self.bytes += size
+            self._stats[stage]["stores"] += 1
+            while self.bytes > self.max_bytes:
+                _, (evicted_stage, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self._stats[evicted_stage]["evictions"] += 1
+
+    def bypass(self, stage: str):
+        with self._lock:
+            self._stats[stage]["bypassed"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+            self.bytes = 0
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            stages = {}
+            for stage, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                stages[stage] = {
+                    **{name: counts[name] for name in ("hits", "misses", "stores", "evictions", "bypassed")},
+                    "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0
+                }
+            return {
+                "enabled": settings.STAGE_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "memory_bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "stages": stages
+            }
+
+
+stage_cache = StageCache(settings.STAGE_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,194 @@
+import asyncio
+import codecs
+import contextvars
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.config import settings
+from .document import PARAGRAPH_BREAK, SENTENCE_BOUNDARY, split_paragraphs
+from .humanizer import EnhancedComprehensiveHumanizer, humanizer
+from .pipeline_graph import observe_pipeline
+
+
+class UploadTooLargeError(ValueError):
+    """The upload grew past the configured size limit while it was being read"""
+
+
+async def iter_upload_text(file, chunk_size: int = 64 * 1024, max_bytes: int = 0) -> AsyncIterator[str]:
+    """
+    Text of an uploaded file, decoded chunk by chunk.
+
+    UTF-8 sequences split across chunks are completed by the incremental
+    decoder; invalid bytes become U+FFFD, since by the time they're read the
+    response has already started. max_bytes (0 = unlimited) is enforced as
+    the bytes arrive.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    total = 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if max_bytes and total > max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _cut_long_paragraph(buffer: str, max_chars: int) -> Tuple[str, str, str]:
+    """(head, separator, rest): buffer cut at its last sentence boundary, else last space, before max_chars"""
+    boundaries = list(SENTENCE_BOUNDARY.finditer(buffer, 0, max_chars))
+    if boundaries:
+        cut = boundaries[-1]
+        return buffer[:cut.start()], cut.group(), buffer[cut.end():]
+    space = buffer.rfind(" ", 0, max_chars)
+    if space > 0:
+        return buffer[:space], " ", buffer[space + 1:]
+    return buffer[:max_chars], "", buffer[max_chars:]
+
+
+async def iter_paragraphs(chunks: AsyncIterator[str], max_chars: int = 20000) -> AsyncIterator[Tuple[str, str]]:
+    """
+    (separator before it, paragraph) for every non-empty paragraph of a chunked text.
+
+    Only the current, unfinished paragraph is buffered. A paragraph that grows
+    past max_chars is emitted in pieces cut between sentences, so the buffer
+    stays bounded even for text without blank lines.
+    """
+    buffer, separator = "", ""
+    async for chunk in chunks:
+        buffer += chunk
+        position = 0
+        for match in PARAGRAPH_BREAK.finditer(buffer):
+            if match.end() == len(buffer):
+                break  # the break may continue in the next chunk
+            paragraph = buffer[position:match.start()].strip()
+            if paragraph:
+                yield separator, paragraph
+                separator = match.group()
+            position = match.end()
+        buffer = buffer[position:]
+        while len(buffer) > max_chars:
+            head, cut, buffer = _cut_long_paragraph(buffer, max_chars)
+            if head.strip():
+                yield separator, head.strip()
+                separator = cut
+    if buffer.strip():
+        yield separator, buffer.strip()
+
+
+async def humanize_stream(chunks: AsyncIterator[str], education_level: str = "undergraduate",
+                          paranoid_mode: bool = True, writehuman_mode: bool = True, seed: Optional[int] = None,
+                          pipeline: Optional[EnhancedComprehensiveHumanizer] = None,
+                          max_paragraph_chars: int = 20000) -> AsyncIterator[str]:
+    """
+    Humanized text of a chunked document, paragraph by paragraph, as it's produced.
+
+    Each paragraph goes through the whole pipeline on a worker thread (without
+    the minimum word count) and is yielded with the whitespace that preceded
+    it, so at most one input paragraph and its stage outputs are held at a time.
+    """
+    pipeline = pipeline or humanizer
+    async for separator, paragraph in iter_paragraphs(chunks, max_paragraph_chars):
+        output = await asyncio.to_thread(pipeline.humanize_paragraph, paragraph, education_level, paranoid_mode,
+                                         writehuman_mode, seed)
+        yield separator + output
+
+
+def humanize_upload_stream(file, education_level: str = "undergraduate", paranoid_mode: bool = True,
+                           writehuman_mode: bool = True, seed: Optional[int] = None) -> AsyncIterator[str]:
+    """humanize_stream over an UploadFile, with the configured chunk size and limits"""
+    chunks = iter_upload_text(file, settings.STREAM_CHUNK_SIZE, settings.STREAM_MAX_FILE_SIZE)
+    return humanize_stream(chunks, education_level, paranoid_mode, writehuman_mode, seed,
+                           max_paragraph_chars=settings.STREAM_MAX_PARAGRAPH_CHARS)
+
+
+# Stages whose text output is sent along with their stage_finished event
+INTERMEDIATE_TEXT_STAGES = ("paraphrased", "gemini_humanized")
+
+
+class EventChannel:
+    """
+    Hands events from a pipeline thread to an async consumer.
+
+    emit() only schedules a put on the event loop, so the pipeline never
+    waits on a slow client; events queue up until the consumer catches up.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(self, event: Dict[str, Any]):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, self._CLOSED)
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            event = await self.queue.get()
+            if event is self._CLOSED:
+                return
+            yield event
+
+
+def stage_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """A pipeline event as sent to clients: intermediate text for the model stages, no stage outputs otherwise"""
+    event = dict(event)
+    output = event.pop("output", None)
+    if event["event"] == "stage_finished" and event["stage"] in INTERMEDIATE_TEXT_STAGES:
+        event["text"] = str(output)
+    return event
+
+
+async def humanize_events(text: str, pipeline_type: str = "comprehensive", education_level: str = "undergraduate",
+                          paranoid_mode: bool = True, writehuman_mode: bool = True, seed: Optional[int] = None,
+                          pipeline: Optional[EnhancedComprehensiveHumanizer] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Progress events of one humanize_text run, as it happens.
+
+    "started", then stage_started / stage_finished for every stage (with
+    timing, whether it came from the stage cache, and the text of the
+    paraphrasing and Gemini steps), then "partial" events whose texts
+    concatenate to the output (per shard as shards finish when the run is
+    sharded, otherwise per paragraph at the end), and finally "result" with
+    the complete response, or "error".
+    """
+    pipeline = pipeline or humanizer
+    loop = asyncio.get_running_loop()
+    channel = EventChannel(loop)
+
+    def run():
+        partials = []
+        def listener(event):
+            if event["event"] == "partial":
+                partials.append(event)
+            channel.emit(stage_event(event))
+        try:
+            with observe_pipeline(listener):
+                result = pipeline.humanize_text(text, pipeline_type, education_level, paranoid_mode, writehuman_mode, seed)
+            if not partials:
+                paragraphs, separators = split_paragraphs(str(result["humanized_text"]))
+                for index, paragraph in enumerate(paragraphs):
+                    channel.emit({"event": "partial", "index": index,
+                                  "text": (separators[index - 1] if index else "") + paragraph})
+            channel.emit({"event": "result", "result": result})
+        except Exception as e:
+            channel.emit({"event": "error", "detail": str(e)})
+        finally:
+            channel.close()
+
+    yield {"event": "started", "word_count": len(text.split()), "education_level": education_level}
+    task = loop.run_in_executor(None, contextvars.copy_context().run, run)
+    try:
+        async for event in channel:
+            yield event
+    finally:
+        await task
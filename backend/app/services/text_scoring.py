@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional, Sequence
+
+from .ai_likeness import ai_likeness_scores
+from .document import Document
+from .language_model import language_model, LANGUAGE_MODEL_AVAILABLE
+from .perplexity import PerplexityOptimizer
+from .readability import readability_engine
+
+
+class TextScorer:
+    """
+    Scores texts without humanizing them: AI-likeness, language model
+    perplexity and burstiness, and readability statistics.
+
+    Every metric is computed for the whole batch at once: one AI-likeness
+    pass over all texts (and one over all sentences), and one language model
+    and one readability pass over all tokens.
+    """
+
+    def __init__(self, perplexity_optimizer: Optional[PerplexityOptimizer] = None):
+        self.perplexity_optimizer = perplexity_optimizer or PerplexityOptimizer()
+
+    def score_batch(self, texts: Sequence[str], per_sentence: bool = False) -> List[Dict[str, object]]:
+        documents = [Document.from_text(text) for text in texts]
+        ai_likeness = ai_likeness_scores(list(texts))
+        if LANGUAGE_MODEL_AVAILABLE:
+            lm_scores = language_model.score_batch(documents)
+            perplexities = [scores.perplexity_percentile for scores in lm_scores]
+        else:
+            lm_scores = [None] * len(documents)
+            perplexities = [self.perplexity_optimizer.calculate_simple_perplexity(document) for document in documents]
+
+        readability = readability_engine.analyze_batch(documents)
+
+        results = []
+        for document, ai, perplexity, scores, stats in zip(documents, ai_likeness, perplexities, lm_scores, readability):
+            results.append({
+                "word_count": document.word_count,
+                "sentence_count": len(document),
+                "ai_likeness": round(ai, 4),
+                "perplexity": round(float(perplexity), 2),
+                "raw_perplexity": round(scores.perplexity, 2) if scores else None,
+                "burstiness": round(scores.burstiness, 4) if scores else None,
+                "burstiness_percentile": round(scores.burstiness_percentile, 2) if scores else None,
+                "readability": stats.summary()
+            })
+
+        if per_sentence:
+            self._add_sentence_scores(documents, lm_scores, readability, results)
+        return results
+
+    @staticmethod
+    def _add_sentence_scores(documents: List[Document], lm_scores: list, readability: list,
+                             results: List[Dict[str, object]]):
+        """Per-sentence AI-likeness (one batch over every sentence), perplexity and syllables per word"""
+        sentence_ai = ai_likeness_scores([sentence for document in documents for sentence in document])
+        offset = 0
+        for document, scores, stats, result in zip(documents, lm_scores, readability, results):
+            # The language model only scores sentences with at least one token
+            perplexities = iter(scores.sentence_perplexities.tolist() if scores else [])
+            syllables_per_word = stats.sentence_syllables_per_word.tolist()
+            sentences = []
+            for i, sentence in enumerate(document):
+                has_tokens = stats.sentence_words[i] > 0
+                perplexity = next(perplexities) if scores and has_tokens else None
+                sentences.append({
+                    "text": sentence,
+                    "word_count": document.count(i),
+                    "ai_likeness": round(sentence_ai[offset + i], 4),
+                    "perplexity": round(perplexity, 2) if perplexity is not None else None,
+                    "syllables_per_word": round(syllables_per_word[i], 3) if has_tokens else None
+                })
+            offset += len(document)
+            result["sentences"] = sentences
+
+text_scorer = TextScorer()
@@ -1,7 +1,10 @@
-import random
 import re
 import logging
 
+from .lexicon import Lexicon
+from .document import Document, document_stage
+from .rng import request_random
+
 logger = logging.getLogger(__name__)
 
 class WriteHumanMimic:
@@ -18,15 +21,12 @@ class WriteHumanMimic:
     - Uncommon phrasing & mild awkwardness
     """
     
-    def __init__(self, aggressiveness=0.4, seed=None):
+    def __init__(self, aggressiveness=0.4):
         """
         Args:
             aggressiveness (float): 0.3 = subtle, 0.5 = stronger changes
-            seed (int): For reproducibility in tests
         """
         self.aggressiveness = aggressiveness
-        if seed is not None:
-            random.seed(seed)
         
         # Academic -> Simpler synonym replacements
         self.synonym_downgrades = {
@@ -75,6 +75,7 @@ class WriteHumanMimic:
             "magnificent": "great",
             "spectacular": "amazing"
         }
+        self.synonym_lexicon = Lexicon(self.synonym_downgrades)
         
         # Filler phrases to break smooth flow
         self.flow_breakers = [
@@ -107,82 +108,96 @@ class WriteHumanMimic:
             "basically"
         ]
 
-    def _swap_synonyms(self, text):
+    @document_stage
+    def _swap_synonyms(self, document):
         """Replace academic words with simpler alternatives"""
-        for academic, simple in self.synonym_downgrades.items():
-            if random.random() < self.aggressiveness:
-                # Case-insensitive replacement with word boundaries
-                pattern = rf"\b{re.escape(academic)}\b"
-                text = re.sub(pattern, simple, text, flags=re.IGNORECASE)
-        return text
+        rng = request_random()
+        active = {academic for academic in self.synonym_downgrades if rng.random() < self.aggressiveness}
+        # Case-insensitive replacement with word boundaries, every active word in one pass
+        return document.map(lambda sentence: self.synonym_lexicon.sub(sentence, active=active))
 
     def _insert_flow_breakers(self, sentence):
         """Insert filler phrases to break smooth logical flow"""
-        if random.random() < self.aggressiveness / 2:
+        rng = request_random()
+        if rng.random() < self.aggressiveness / 2:
             words = sentence.split()
             if len(words) > 5:  # Only break longer sentences
                 # Insert at random position (not at start/end)
-                pos = random.randint(2, len(words) - 2)
-                filler = random.choice(self.flow_breakers)
+                pos = rng.randint(2, len(words) - 2)
+                filler = rng.choice(self.flow_breakers)
                 words.insert(pos, f"{filler},")
                 return " ".join(words)
         return sentence
 
-    def _add_redundancy(self, text):
+    @document_stage
+    def _add_redundancy(self, document):
         """Add redundant phrases to lower information density"""
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        enhanced = []
-        
-        for sentence in sentences:
-            if random.random() < self.aggressiveness / 3:
-                # Add redundancy phrase
-                redundancy = random.choice(self.redundancy_phrases)
+        rng = request_random()
+        def add(sentence):
+            if rng.random() < self.aggressiveness / 3:
+                # Add redundancy phrase (the rewrite becomes two sentences)
+                redundancy = rng.choice(self.redundancy_phrases)
                 sentence = f"{sentence.rstrip('.')}. {redundancy.capitalize()}, {sentence.lower()}"
-            enhanced.append(sentence)
+            return sentence
         
-        return " ".join(enhanced)
+        return document.map(add)
 
-    def _vary_sentence_length(self, text):
+    @document_stage
+    def _vary_sentence_length(self, document):
         """Create more sentence length variety (very short + very long)"""
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        varied = []
+        rng = request_random()
+        varied = Document()
         
-        for sentence in sentences:
-            words = sentence.split()
+        for i, sentence in enumerate(document):
+            n = document.count(i)
+            separator = document.separator_before(i)
             
             # Split long sentences randomly
-            if len(words) > 15 and random.random() < self.aggressiveness:
-                split_point = random.randint(len(words)//3, 2*len(words)//3)
-                part1 = " ".join(words[:split_point]).rstrip('.,!?') + "."
-                part2 = " ".join(words[split_point:])
-                varied.extend([part1, part2])
+            if n > 15 and rng.random() < self.aggressiveness:
+                words = sentence.split()
+                split_point = rng.randint(n//3, 2*n//3)
+                varied.append(" ".join(words[:split_point]).rstrip('.,!?') + ".", split_point, separator)
+                varied.append(" ".join(words[split_point:]), n - split_point)
             
             # Make some sentences very short
-            elif len(words) > 8 and random.random() < self.aggressiveness / 2:
+            elif n > 8 and rng.random() < self.aggressiveness / 2:
                 # Take first few words as short sentence
-                short_end = random.randint(3, 6)
-                short = " ".join(words[:short_end]).rstrip('.,!?') + "."
-                rest = " ".join(words[short_end:])
-                varied.extend([short, rest])
+                words = sentence.split()
+                short_end = rng.randint(3, 6)
+                varied.append(" ".join(words[:short_end]).rstrip('.,!?') + ".", short_end, separator)
+                varied.append(" ".join(words[short_end:]), n - short_end)
             else:
-                varied.append(sentence)
+                varied.append(sentence, n, separator)
         
-        return " ".join(varied)
+        return document.assign(varied)
 
-    def _add_mild_imperfections(self, text):
+    @document_stage
+    def _add_mild_imperfections(self, document):
         """Add very subtle grammatical imperfections"""
+        rng = request_random()
         # Occasionally remove articles
-        if random.random() < self.aggressiveness / 4:
-            text = re.sub(r'\bthe\s+(?=\w)', '', text, count=1)
+        if rng.random() < self.aggressiveness / 4:
+            self._sub_first(document, r'\bthe\s+(?=\w)', '')
         
         # Occasionally change "a" to "an" incorrectly (very subtle)
-        if random.random() < self.aggressiveness / 5:
-            text = re.sub(r'\ba\s+(?=[aeiou])', 'an ', text, count=1)
+        if rng.random() < self.aggressiveness / 5:
+            self._sub_first(document, r'\ba\s+(?=[aeiou])', 'an ')
         
-        return text
+        return document
 
-    def _uncommon_phrasing(self, text):
+    @staticmethod
+    def _sub_first(document, pattern, replacement):
+        """Replace the first match of pattern in the document (within one sentence)"""
+        for i, sentence in enumerate(document):
+            modified, replaced = re.subn(pattern, replacement, sentence, count=1)
+            if replaced:
+                document.set(i, modified)
+                return
+
+    @document_stage
+    def _uncommon_phrasing(self, document):
         """Replace common phrases with slightly awkward alternatives"""
+        rng = request_random()
         awkward_replacements = {
             r'\bin order to\b': 'so as to',
             r'\bas well as\b': 'along with',
@@ -192,48 +207,49 @@ class WriteHumanMimic:
             r'\bin terms of\b': 'when it comes to',
         }
         
-        for pattern, replacement in awkward_replacements.items():
-            if random.random() < self.aggressiveness / 3:
-                text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+        active = [(pattern, replacement) for pattern, replacement in awkward_replacements.items()
+                  if rng.random() < self.aggressiveness / 3]
+        if not active:
+            return document
+        
+        def rephrase(sentence):
+            for pattern, replacement in active:
+                sentence = re.sub(pattern, replacement, sentence, flags=re.IGNORECASE)
+            return sentence
         
-        return text
+        return document.map(rephrase)
 
     def process(self, text, min_words=0):
         """
         Apply WriteHuman-style processing to reduce SurferSEO detection
         
         Args:
-            text (str): Input humanized text
+            text (str or Document): Input humanized text; a Document is edited in place
             min_words (int): Skip processing if text is too short
             
         Returns:
-            str: Enhanced text with WriteHuman-style quirks
+            str: Enhanced text with WriteHuman-style quirks (the Document, for a Document)
         """
-        if min_words and len(text.split()) < min_words:
-            logger.info(f"Text too short ({len(text.split())} words), skipping WriteHuman processing")
+        document = Document.coerce(text)
+        if min_words and document.word_count < min_words:
+            logger.info(f"Text too short ({document.word_count} words), skipping WriteHuman processing")
             return text
         
         logger.info("🎭 Applying WriteHuman mimicry for SurferSEO evasion...")
         
         # Apply transformations in order
-        text = self._swap_synonyms(text)
-        text = self._vary_sentence_length(text)
-        
-        # Break into sentences for sentence-level processing
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        processed_sentences = []
+        self._swap_synonyms(document)
+        self._vary_sentence_length(document)
         
-        for sentence in sentences:
-            sentence = self._insert_flow_breakers(sentence)
-            processed_sentences.append(sentence)
+        # Sentence-level processing
+        document.map(self._insert_flow_breakers)
         
-        text = " ".join(processed_sentences)
-        text = self._add_redundancy(text)
-        text = self._add_mild_imperfections(text)
-        text = self._uncommon_phrasing(text)
+        self._add_redundancy(document)
+        self._add_mild_imperfections(document)
+        self._uncommon_phrasing(document)
         
         logger.info("✅ WriteHuman mimicry complete")
-        return text
+        return document if isinstance(text, Document) else document.text
 
     def get_stats(self):
         """Return processing statistics"""
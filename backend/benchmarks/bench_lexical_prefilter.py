@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Bypass rate and decision agreement of the lexical pre-filter.
+
+Generates the edits EnhancedWriteHumanMimic actually checks (filler insertion,
+strategic synonym swaps, conjunction splits, light redundancy) over a corpus,
+decides them lexically, and - when sentence-transformers is installed -
+compares against the model's accept/reject decision at semantic_threshold.
+
+Usage:
+    python benchmarks/bench_lexical_prefilter.py [--corpus file.txt] [--accept 0.95] [--reject 0.30]
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.enhanced_writehuman import EnhancedWriteHumanMimic
+from app.services.lexical_similarity import LexicalPrefilter, ACCEPT, REJECT, AMBIGUOUS
+
+DEFAULT_CORPUS = """
+The artificial intelligence system demonstrates remarkable capabilities in natural language processing and text generation.
+These sophisticated algorithms can analyze patterns in data with unprecedented accuracy and efficiency.
+Machine learning technologies are revolutionizing numerous industries by providing innovative solutions for complex problems.
+The implementation of these systems requires comprehensive understanding of computational linguistics and advanced mathematical frameworks.
+These technological innovations are transforming numerous industries and business operations worldwide, and furthermore they are changing how people work.
+Researchers continue to push the boundaries of what AI can accomplish, but nevertheless many questions remain unanswered by the community.
+Organizations worldwide are investing heavily in AI development and deployment, and the utilization of cloud resources is significantly increasing.
+The complexity of human language presents unique challenges for computational systems, however modern models handle it particularly well.
+Natural language processing enables computers to understand and generate human language with remarkable fluency and consistency across domains.
+Deep learning has opened new possibilities for complex problem-solving, and consequently the optimization of training pipelines matters more than ever.
+"""
+
+
+def generate_edits(mimic, sentences):
+    """(edit type, original, candidate) for every edit the mimic could check"""
+    edits = []
+    for sentence in sentences:
+        words = sentence.split()
+        for filler in mimic.subtle_fillers:
+            with_filler = words[:len(words) // 2] + [f"{filler},"] + words[len(words) // 2:]
+            edits.append(("filler", sentence, " ".join(with_filler)))
+        for original_word, replacement in mimic.strategic_replacements.items():
+            pattern = re.compile(rf"\b{re.escape(original_word)}\b", re.IGNORECASE)
+            if pattern.search(sentence):
+                edits.append(("synonym", sentence, pattern.sub(replacement, sentence)))
+        for j, word in enumerate(words):
+            if word.lower() in ['and', 'but', 'however', 'therefore', 'moreover'] and j > 5:
+                part1 = " ".join(words[:j]).rstrip('.,!?') + "."
+                edits.append(("split", sentence, f"{part1} {' '.join(words[j:])}"))
+        for redundancy in mimic.light_redundancy:
+            edits.append(("redundancy", sentence, f"{sentence.rstrip('.')}. {redundancy.capitalize()}, {sentence.lower()}"))
+    return edits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lexical pre-filter benchmark")
+    parser.add_argument("--corpus", help="Text file, one or more sentences per line")
+    parser.add_argument("--accept", type=float, default=0.95)
+    parser.add_argument("--reject", type=float, default=0.30)
+    args = parser.parse_args()
+
+    text = open(args.corpus).read() if args.corpus else DEFAULT_CORPUS
+    sentences = [s for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s]
+
+    mimic = EnhancedWriteHumanMimic()
+    prefilter = LexicalPrefilter(accept_above=args.accept, reject_below=args.reject)
+    edits = generate_edits(mimic, sentences)
+    pairs = [(a, b) for _, a, b in edits]
+
+    lexical = prefilter.batch_similarity(pairs)
+    decisions = prefilter.decide(lexical, mimic.semantic_threshold)
+
+    neural = None
+    if mimic.semantic_model:
+        neural = np.array([mimic._calculate_semantic_similarity(a, b) for a, b in pairs])
+    else:
+        print("⚠️ sentence-transformers not available - reporting bypass rates only")
+
+    by_type = defaultdict(list)
+    for i, (edit_type, _, _) in enumerate(edits):
+        by_type[edit_type].append(i)
+
+    print(f"📊 {len(sentences)} sentences, {len(edits)} candidate edits, threshold {mimic.semantic_threshold}")
+    print(f"{'edit':<12} {'n':>5} {'accept':>7} {'reject':>7} {'model':>7} {'bypass':>7} {'disagree':>9}")
+    for edit_type, rows in sorted(by_type.items()):
+        d = decisions[rows]
+        bypass = np.mean(d != AMBIGUOUS)
+        disagree = "n/a"
+        if neural is not None:
+            decided = d != AMBIGUOUS
+            model_accepts = neural[rows] >= mimic.semantic_threshold
+            wrong = ((d == ACCEPT) & ~model_accepts) | ((d == REJECT) & model_accepts)
+            disagree = f"{wrong[decided].mean():.1%}" if decided.any() else "0.0%"
+        print(f"{edit_type:<12} {len(rows):>5} {np.sum(d == ACCEPT):>7} {np.sum(d == REJECT):>7} "
+              f"{np.sum(d == AMBIGUOUS):>7} {bypass:>7.1%} {disagree:>9}")
+
+    print(f"\n✅ Overall bypass rate: {prefilter.get_stats()['bypass_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Minimum word count expansion: precomputed template index versus the old code.
+
+The old code rebuilt the template dict on every call and appended fill
+sentences one at a time, re-splitting the whole text after each. Times both,
+plus peak allocation, for short-by-a-lot inputs of increasing size (the new
+path is given the word count, as enforce_min_word_count does).
+
+Usage:
+    python benchmarks/bench_min_word_count.py [--sizes 50,1000,10000,50000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.humanizer import (
+    CONTENT_TEMPLATES, extract_key_concepts, generate_comprehensive_content
+)
+
+WORDS = ("the model said this again and the results were plain to see for the team in the lab "
+         "while the system learned a new pattern from data").split()
+
+
+def legacy_concepts(text: str) -> list:
+    concepts = []
+    text_lower = text.lower()
+    for concept, keywords in [('artificial intelligence', ['artificial intelligence', 'ai']),
+                              ('natural language processing', ['natural language processing', 'nlp']),
+                              ('machine learning', ['machine learning']), ('text generation', ['text generation']),
+                              ('pattern recognition', ['pattern']), ('human communication', ['communication']),
+                              ('computational systems', ['system'])]:
+        if any(keyword in text_lower for keyword in keywords):
+            concepts.append(concept)
+    return concepts or ['technology', 'innovation', 'development']
+
+
+def legacy_generate(concepts: list, min_words: int, original_text: str) -> str:
+    content_templates = {concept: list(sentences) for concept, sentences in CONTENT_TEMPLATES.items()}
+    generated_content = [original_text]
+    for concept in concepts:
+        if concept in content_templates:
+            generated_content.extend(content_templates[concept][:4])
+    generated_content.extend(content_templates['technology'][:3])
+    final_text = '. '.join(generated_content)
+    final_words = final_text.split()
+    if len(final_words) < min_words:
+        additional_content = [s for template in content_templates.values() for s in template]
+        content_index = 0
+        while len(final_words) < min_words and content_index < len(additional_content):
+            final_text += '. ' + additional_content[content_index]
+            final_words = final_text.split()
+            content_index += 1
+    return final_text
+
+
+def make_text(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def measure(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimum word count expansion benchmark")
+    parser.add_argument("--sizes", default="50,1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'words':>8} {'min':>8} {'new ms':>9} {'old ms':>9} {'speedup':>8} {'new peak KB':>12} {'old peak KB':>12}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        text = make_text(size)
+        min_words = size + 1000  # needs (almost) every fill sentence
+
+        def new():
+            return generate_comprehensive_content(extract_key_concepts(text), min_words, text, size)
+
+        def old():
+            return legacy_generate(legacy_concepts(text), min_words, text)
+
+        assert new() == old()
+        new_time, new_peak = measure(new, args.repeat)
+        old_time, old_peak = measure(old, args.repeat)
+        print(f"{size:>8} {min_words:>8} {new_time * 1000:>9.3f} {old_time * 1000:>9.3f} {old_time / new_time:>7.1f}x "
+              f"{new_peak / 1024:>12.1f} {old_peak / 1024:>12.1f}")
+
+    print("\n✅ Minimum word count benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Scaling of RuleBasedPolisher.polish with input size.
+
+Polishes generated text full of fixable issues and preserved asides at
+increasing sizes and reports time per word, alongside the previous per-match
+approach (all preserve patterns re-run over a window around every match, and
+the string rebuilt for every replacement). The fitted exponent should stay
+close to 1 for linear scaling.
+
+Usage:
+    python benchmarks/bench_polisher.py [--sizes 1000,10000,100000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.rule_based_polisher import RuleBasedPolisher
+
+PIECES = ["the system processes text", "word ,", "a apple", "the the result", "so but then",
+          "to be honest", "(a short aside , really)", "— an em-dash aside —", "it works...",
+          "done!!", "It shows", "great.  so", "basically  , yes", "an dog", "fine."]
+
+
+def make_text(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    out = []
+    count = 0
+    while count < words:
+        piece = rng.choice(PIECES)
+        out.append(piece)
+        count += len(piece.split())
+    return "  ".join(out)
+
+
+def legacy_polish(polisher: RuleBasedPolisher, text: str) -> str:
+    """
+    The previous per-match path: every match re-runs all preserve patterns over
+    a window around it and splices its replacement into a new copy of the text
+    """
+    def preserved(text, start, end):
+        snippet = text[start:end]
+        return any(re.search(pattern, snippet, re.IGNORECASE) for pattern in polisher.preserve_patterns)
+
+    for pattern, replacement in polisher.polish_rules + polisher.transition_improvements:
+        offset = 0
+        for match in list(re.finditer(pattern, text)):
+            start, end = match.start() + offset, match.end() + offset
+            if not preserved(text, max(0, start - 20), min(len(text), end + 20)):
+                new_text = match.expand(replacement)
+                text = text[:start] + new_text + text[end:]
+                offset += len(new_text) - (end - start)
+    return text
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule-based polisher benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=100000, help="Largest size to time the legacy path on")
+    args = parser.parse_args()
+
+    polisher = RuleBasedPolisher()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    times = []
+
+    print(f"{'words':>8} {'polish ms':>10} {'us/word':>8} {'legacy ms':>10} {'speedup':>8}")
+    for size in sizes:
+        text = make_text(size)
+        elapsed = timed(lambda: polisher.polish(text), args.repeat)
+        times.append(elapsed)
+        row = f"{size:>8} {elapsed * 1000:>10.2f} {elapsed / size * 1e6:>8.2f}"
+        if size <= args.legacy_max:
+            legacy = timed(lambda: legacy_polish(polisher, text), 1)
+            row += f" {legacy * 1000:>10.2f} {legacy / elapsed:>7.1f}x"
+        print(row)
+
+    if len(sizes) > 1:
+        exponent = np.polyfit(np.log(sizes), np.log(times), 1)[0]
+        print(f"\n📈 Fitted scaling exponent: {exponent:.2f} (1.00 = linear)")
+
+    print("\n✅ Polisher benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
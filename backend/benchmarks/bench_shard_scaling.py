@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Scaling of paragraph-sharded execution with the number of worker processes.
+
+Runs the per-level rule stages (Steps 3-10) over a generated multi-paragraph
+document, first in-process on the whole text (the unsharded pipeline), then
+sharded over ShardPools of 1..N workers. Pools are started and warmed before
+timing, so the numbers are steady-state request latencies. Speedup is against
+the unsharded run; on N free cores it should approach N for large documents.
+
+Usage:
+    python benchmarks/bench_shard_scaling.py [--words 10000] [--workers 1,2,4,8] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.humanizer import humanizer
+from app.services.sharding import ShardPool, run_local_stages, shard_seeds, shard_text
+
+SENTENCES = [
+    "The artificial intelligence system demonstrates remarkable capabilities in natural language processing.",
+    "Furthermore, it is important to note that these advancements offer numerous benefits.",
+    "Organizations worldwide are investing heavily in AI development and deployment.",
+    "Machine learning algorithms can analyze patterns in data with unprecedented accuracy.",
+    "Moreover, researchers continue to push the boundaries of what these systems can accomplish.",
+    "Additionally, ethical considerations play a crucial role in responsible deployment.",
+]
+
+
+def make_document(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    paragraphs, count = [], 0
+    while count < words:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 7)))
+        paragraphs.append(paragraph)
+        count += len(paragraph.split())
+    return "\n\n".join(paragraphs)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the stages' progress output, in this process and in pool workers started inside the block"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with quiet():
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paragraph-sharding scaling benchmark")
+    parser.add_argument("--words", type=int, default=10000)
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)) or "1")
+    parser.add_argument("--shard-words", type=int, default=settings.SHARD_MIN_WORDS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_document(args.words)
+    shards, _ = shard_text(text, args.shard_words)
+    seeds = shard_seeds(0, len(shards))
+    print(f"📄 {len(text.split())} words, {len(shards)} shards of ~{args.shard_words} words, {os.cpu_count()} CPUs")
+
+    def unsharded():
+        run_local_stages(text, "undergraduate", True, True, 0)
+
+    baseline = timed(unsharded, 1)
+    print(f"\n{'workers':>8} {'ms':>10} {'speedup':>8} {'efficiency':>10}")
+    print(f"{'-':>8} {baseline * 1000:>10.1f} {1.0:>7.2f}x {'(unsharded)':>10}")
+
+    for workers in [int(n) for n in args.workers.split(",")]:
+        pool = ShardPool(workers)
+
+        def sharded():
+            pool.map(run_local_stages, shards, ["undergraduate"] * len(shards), [True] * len(shards),
+                     [True] * len(shards), seeds)
+
+        with quiet():
+            pool.map(run_local_stages, shards[:workers], ["undergraduate"] * workers, [True] * workers,
+                     [True] * workers, seeds[:workers])  # start and warm every worker
+        elapsed = timed(sharded, args.repeat)
+        pool.shutdown()
+        speedup = baseline / elapsed
+        print(f"{workers:>8} {elapsed * 1000:>10.1f} {speedup:>7.2f}x {speedup / workers:>10.0%}")
+
+    print("\n✅ Shard scaling benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
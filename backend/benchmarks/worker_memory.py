@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory report for a running gunicorn master.
+
+Compares summed RSS (what each worker appears to use) with summed PSS (what
+the host actually pays). With preloaded, shared weights the PSS total stays
+close to one model copy plus the per-worker private memory.
+
+Usage:
+    python benchmarks/worker_memory.py <gunicorn-master-pid>
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.model_registry import process_memory
+
+
+def child_pids(pid):
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for tid in os.listdir(task_dir):
+        with open(f"{task_dir}/{tid}/children") as f:
+            children.extend(int(c) for c in f.read().split())
+    return children
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+
+    master = int(sys.argv[1])
+    rows = [("master", process_memory(master))] + [("worker", process_memory(p)) for p in child_pids(master)]
+
+    print(f"{'role':<8} {'pid':>8} {'rss_mb':>9} {'pss_mb':>9} {'shared_mb':>10} {'private_mb':>11}")
+    for role, stats in rows:
+        shared = stats.get("shared_clean_mb", 0) + stats.get("shared_dirty_mb", 0)
+        private = stats.get("private_clean_mb", 0) + stats.get("private_dirty_mb", 0)
+        print(f"{role:<8} {stats['pid']:>8} {stats.get('rss_mb', 0):>9.1f} {stats.get('pss_mb', 0):>9.1f} {shared:>10.1f} {private:>11.1f}")
+
+    total_rss = sum(s.get("rss_mb", 0) for _, s in rows)
+    total_pss = sum(s.get("pss_mb", 0) for _, s in rows)
+    print(f"\n📊 Sum RSS: {total_rss:.1f} MB | Sum PSS (real host usage): {total_pss:.1f} MB")
+    if total_rss:
+        print(f"🔗 Shared by copy-on-write: {100 * (1 - total_pss / total_rss):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Gunicorn config for multi-worker deployments with shared model weights.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+With PRELOAD_MODELS=true the master imports the app (and with it the model
+registry) once, then forks the workers, so Pegasus and MiniLM weights are
+shared copy-on-write. `uvicorn --workers` spawns fresh interpreters instead
+of forking, so it cannot share them.
+"""
+
+import os
+
+from app.core.config import settings
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = max(settings.PROCESSING_TIMEOUT * 4, 120)
+preload_app = settings.PRELOAD_MODELS
+
+
+def when_ready(server):
+    if preload_app:
+        from app.services.model_registry import model_registry, process_memory
+        model_registry.preload()
+        server.log.info(f"Models preloaded in master: {process_memory()}")
+
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} forked (models shared: {preload_app})")
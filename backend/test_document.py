@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import random
+
+from app.services.document import Document
+from app.services.humanizer import (
+    StylometricHumanizer, MultiDetectorObfuscator, EducationalLevelEngine,
+    PerplexityOptimizer, CoherenceDisruptor, humanizer
+)
+from app.services.writehuman_mimic import WriteHumanMimic
+from app.services.enhanced_writehuman import EnhancedWriteHumanMimic
+
+SAMPLE = (
+    "The artificial intelligence system demonstrates remarkable capabilities in natural language processing and text generation. "
+    "These sophisticated algorithms can analyze patterns in data with unprecedented accuracy and efficiency, and they keep improving as more data arrives. "
+    "Furthermore, the implementation of comprehensive optimization strategies significantly facilitates the utilization of resources in order to help. "
+    "Is it good?\n\nMachine learning technologies are revolutionizing numerous industries by providing innovative solutions for complex problems, and nevertheless many challenges remain open. "
+    "Small teams utilize big models.Researchers comprehend the significant trade-offs, as well as the costs!"
+)
+
+
+def assert_consistent(document: Document):
+    """The maintained counts and spans must agree with the materialized text"""
+    text = document.text
+    assert document.word_count == len(text.split()), (document.word_count, len(text.split()))
+    assert list(document.counts) == [len(s.split()) for s in document.sentences]
+    assert len(document.separators) == max(len(document) - 1, 0)
+    for (start, end), sentence in zip(document.spans(), document.sentences):
+        assert text[start:end] == sentence
+
+
+def test_round_trip_and_offsets():
+    document = Document.from_text("  One two.  Three four five!\n\nSix?  ")
+    assert document.sentences == ["One two.", "Three four five!", "Six?"]
+    assert document.separators == ["  ", "\n\n"]
+    assert document.text == "One two.  Three four five!\n\nSix?"
+    assert list(document.word_starts()) == [0, 2, 5]
+    assert_consistent(document)
+    assert len(Document.from_text("   ")) == 0
+
+
+def test_edits_keep_counts_and_boundaries():
+    document = Document.from_text("Alpha beta. Gamma delta epsilon.\n\nZeta.")
+    document.set(1, "Gamma. Delta epsilon eta.")  # re-split into two sentences
+    assert document.sentences == ["Alpha beta.", "Gamma.", "Delta epsilon eta.", "Zeta."]
+    assert document.separators == [" ", " ", "\n\n"]
+    assert_consistent(document)
+
+    document.set(0, "")  # deleting a sentence drops its separator
+    assert document.text == "Gamma. Delta epsilon eta.\n\nZeta."
+    assert_consistent(document)
+
+    document.map(str.upper)
+    document.permute([2, 0, 1])
+    document.append("Theta iota.", separator="\n\n")
+    assert document.text == "ZETA. GAMMA.\n\nDELTA EPSILON ETA.\n\nTheta iota."
+    assert_consistent(document)
+
+
+def test_appends_grow_counts_in_place():
+    document = Document()
+    for i in range(100):
+        document.append("one two three." if i % 2 else "four.")
+        if i == 49:
+            half = document.copy()
+    assert list(document.counts) == [1, 3] * 50 and document.word_count == 200
+    assert len(half) == 50 and half.word_count == 100
+    half.append("five six.")
+    assert half.counts[-1] == 2 and document.count(50) == 1  # a copy never shares the buffer
+
+
+def test_stages_accept_strings_and_documents():
+    engine = EducationalLevelEngine()
+    random.seed(3)
+    from_string = engine.adjust_to_level(SAMPLE, "elementary")
+    random.seed(3)
+    document = Document.from_text(SAMPLE)
+    returned = engine.adjust_to_level(document, "elementary")
+    assert isinstance(from_string, str)
+    assert returned is document
+    assert document.text == from_string
+
+
+def test_every_stage_maintains_word_counts():
+    stylometric = StylometricHumanizer()
+    obfuscator = MultiDetectorObfuscator()
+    engine = EducationalLevelEngine()
+    perplexity = PerplexityOptimizer()
+    disruptor = CoherenceDisruptor()
+    mimic = WriteHumanMimic(aggressiveness=0.9)
+    enhanced = EnhancedWriteHumanMimic(aggressiveness=0.9, semantic_threshold=0.0)
+    enhanced.semantic_model = None
+
+    for seed in range(25):
+        random.seed(seed)
+        document = Document.from_text(" ".join([SAMPLE] * 3))
+        engine.adjust_to_level(document, random.choice(list(engine.level_configs)))
+        assert_consistent(document)
+        perplexity.increase_perplexity(document)
+        perplexity.decrease_perplexity(document)
+        assert_consistent(document)
+        stylometric.humanize_text(document)
+        assert_consistent(document)
+        obfuscator.apply_multi_detector_evasion(document)
+        assert_consistent(document)
+        disruptor.disrupt_coherence(document, paranoid_mode=True)
+        assert_consistent(document)
+        mimic.process(document)
+        assert_consistent(document)
+        enhanced.process(document, min_words=0)
+        assert_consistent(document)
+
+
+def test_pipeline_returns_text():
+    random.seed(0)
+    result = humanizer.humanize_text(SAMPLE, "comprehensive", "undergraduate", True, True)
+    assert isinstance(result["humanized_text"], str)
+    assert isinstance(result["original_text"], str)
+    assert len(result["humanized_text"].split()) >= 200
+
+
+if __name__ == "__main__":
+    test_round_trip_and_offsets()
+    test_edits_keep_counts_and_boundaries()
+    test_appends_grow_counts_in_place()
+    test_stages_accept_strings_and_documents()
+    test_every_stage_maintains_word_counts()
+    test_pipeline_returns_text()
+    print("🎉 Document IR tests passed!")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import os
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+
+DIM = 384
+
+
+def random_encoder(calls):
+    rng = np.random.default_rng(0)
+    table = {}
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.stack([table.setdefault(t, rng.standard_normal(DIM).astype(np.float32)) for t in texts])
+
+    return encode, table
+
+
+def test_hits_misses_and_batching():
+    calls = []
+    encode, _ = random_encoder(calls)
+    cache = EmbeddingCache("test-model", capacity=100)
+
+    first = cache.get_or_encode(["a", "b", "a"], encode)
+    second = cache.get_or_encode(["b", "c"], encode)
+
+    assert calls == [["a", "b"], ["c"]]  # duplicates and cached sentences never re-encoded
+    assert np.allclose(first[1], second[0])
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0, atol=1e-2)
+    stats = cache.get_stats()
+    assert stats["misses"] == 3 and stats["hits"] == 2
+    print(f"📊 {stats}")
+
+
+def test_compact_storage_accuracy():
+    for dtype, nbytes, tolerance in (("float16", 2, 1e-3), ("int8", 1, 2e-2)):
+        calls = []
+        encode, table = random_encoder(calls)
+        cache = EmbeddingCache("test-model", capacity=1000, dtype=dtype)
+        texts = [f"sentence {i}" for i in range(200)]
+        vectors = cache.get_or_encode(texts, encode)
+
+        exact = np.stack([table[t] / np.linalg.norm(table[t]) for t in texts])
+        cosines = np.einsum("ij,ij->i", vectors, exact) / np.linalg.norm(vectors, axis=1)
+        assert cosines.min() > 1 - tolerance, dtype
+        assert cache._vectors.itemsize == nbytes
+        # Hits return exactly what misses returned
+        assert np.array_equal(cache.get_or_encode(texts, encode), vectors)
+
+
+def test_lru_eviction():
+    calls = []
+    encode, _ = random_encoder(calls)
+    cache = EmbeddingCache("test-model", capacity=2)
+    cache.get_or_encode(["a"], encode)
+    cache.get_or_encode(["b"], encode)
+    cache.get_or_encode(["a"], encode)  # a is now most recently used
+    cache.get_or_encode(["c"], encode)  # evicts b
+    cache.get_or_encode(["a", "b"], encode)
+    assert calls[-1] == ["b"]
+    assert cache.get_stats()["evictions"] == 2
+
+
+def test_batch_larger_than_capacity():
+    calls = []
+    encode, _ = random_encoder(calls)
+    cache = EmbeddingCache("test-model", capacity=3)
+    vectors = cache.get_or_encode([f"s{i}" for i in range(10)], encode)
+    assert vectors.shape == (10, DIM)
+    assert cache.get_stats()["entries"] == 3
+
+
+def test_model_id_is_part_of_key():
+    assert EmbeddingCache("model-a")._key("same") != EmbeddingCache("model-b")._key("same")
+
+
+def test_persistent_cache_starts_warm(tmp_path):
+    calls = []
+    encode, _ = random_encoder(calls)
+    path = str(tmp_path / "embeddings")
+
+    cache = EmbeddingCache("test-model", capacity=50, dtype="int8", path=path)
+    before = cache.get_or_encode(["warm sentence", "another one"], encode)
+    cache.flush()
+    assert cache.get_stats()["persistent_path"] == path
+    cache._lock_file.close()  # simulate the worker exiting
+
+    restarted = EmbeddingCache("test-model", capacity=50, dtype="int8", path=path)
+    def no_encode(texts):
+        raise AssertionError(f"warm sentences re-encoded: {texts}")
+    after = restarted.get_or_encode(["warm sentence", "another one"], no_encode)
+    assert np.array_equal(before, after)
+    assert restarted.get_stats()["hit_rate"] == 1.0
+    restarted._lock_file.close()
+
+    # A different configuration doesn't map the old arena
+    resized = EmbeddingCache("test-model", capacity=60, dtype="int8", path=path)
+    assert resized.dim is None and resized.get_stats()["entries"] == 0
+
+
+def test_forked_worker_does_not_share_the_parent_arena(tmp_path):
+    calls = []
+    encode, table = random_encoder(calls)
+    path = str(tmp_path / "embeddings")
+    cache = EmbeddingCache("test-model", capacity=50, path=path)
+    parent = cache.get_or_encode(["parent sentence"], encode)
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # a preloaded server's worker
+        try:
+            child = cache.get_or_encode(["child sentence", "another child sentence"], encode)
+            expected = np.stack([table[t] / np.linalg.norm(table[t]) for t in ("child sentence",
+                                                                                "another child sentence")])
+            ok = np.allclose(child, expected, atol=1e-2) and cache.get_stats()["persistent_path"] is None
+            os.write(write, b"1" if ok else b"0")
+        finally:
+            os._exit(0)
+    os.close(write)
+    assert os.read(read, 1) == b"1"  # the parent still holds the file, so the child caches in memory
+    os.waitpid(pid, 0)
+
+    assert cache.get_stats()["entries"] == 1
+    assert np.array_equal(cache.get_or_encode(["parent sentence"], encode), parent) and len(calls) == 1
+    cache._lock_file.close()
+
+
+def test_row_holding_another_key_is_a_miss():
+    calls = []
+    encode, _ = random_encoder(calls)
+    cache = EmbeddingCache("test-model", capacity=10)
+    cache.get_or_encode(["a"], encode)
+    cache._keys[cache._slots[cache._key("a")]] = cache._key("b")  # row overwritten behind the index
+    cache.get_or_encode(["a"], encode)
+    assert calls == [["a"], ["a"]]
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_hits_misses_and_batching()
+    test_compact_storage_accuracy()
+    test_lru_eviction()
+    test_batch_larger_than_capacity()
+    test_model_id_is_part_of_key()
+    test_persistent_cache_starts_warm(pathlib.Path(tempfile.mkdtemp()))
+    test_forked_worker_does_not_share_the_parent_arena(pathlib.Path(tempfile.mkdtemp()))
+    test_row_holding_another_key_is_a_miss()
+    print("🎉 Embedding cache tests passed!")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+import random
+import zlib
+
+import numpy as np
+
+from app.services.enhanced_writehuman import EnhancedWriteHumanMimic
+from app.services.embedding_cache import EmbeddingCache
+
+TEST_BLOCK = " ".join([
+    "The artificial intelligence system demonstrates remarkable capabilities in natural language processing and text generation.",
+    "These sophisticated algorithms can analyze patterns in data with unprecedented accuracy and efficiency, and they keep improving over time as more data arrives.",
+    "Furthermore, the implementation of comprehensive optimization strategies significantly facilitates the utilization of resources.",
+    "Machine learning technologies are revolutionizing numerous industries by providing innovative solutions for complex problems, and nevertheless many challenges remain open for researchers.",
+])
+TEST_TEXT = " ".join([TEST_BLOCK] * 8)
+
+
+class CountingEncoder:
+    """Deterministic bag-of-words encoder standing in for MiniLM, counting encode calls"""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.calls = 0
+        self.texts_encoded = 0
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls += 1
+        self.texts_encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vectors
+
+
+def make_mimic(aggressiveness=0.9, semantic_threshold=0.85, prefilter=False):
+    random.seed(7)
+    mimic = EnhancedWriteHumanMimic(aggressiveness=aggressiveness, semantic_threshold=semantic_threshold)
+    mimic.semantic_model = CountingEncoder()
+    mimic.embedding_cache = EmbeddingCache("counting-encoder", capacity=1000)
+    if not prefilter:
+        mimic.lexical_prefilter = None
+    return mimic
+
+
+def test_semantic_checks_are_batched():
+    """Each semantic step should cost at most one encode call, regardless of candidate count"""
+    mimic = make_mimic()
+    result = mimic.process(TEST_TEXT, min_words=50)
+
+    encoder = mimic.semantic_model
+    print(f"📊 {len(TEST_TEXT.split())} words → {encoder.calls} encode calls, {encoder.texts_encoded} texts, {len(result['changes'])} changes")
+    # 4 rewriting steps + final similarity
+    assert encoder.calls <= 5
+    assert result["changes"]
+    assert 0.0 < result["similarity"] <= 1.0 + 1e-6
+
+
+def test_batched_similarity_matches_pairwise():
+    mimic = make_mimic()
+    pairs = [
+        ("the system shows great results", "the system shows great results"),
+        ("the system shows great results", "the platform shows good results"),
+        ("completely unrelated words", "the system shows great results"),
+    ]
+    batched = mimic._batch_similarities(pairs)
+    for (a, b), similarity in zip(pairs, batched):
+        va, vb = mimic.semantic_model.encode([a, b])
+        expected = np.dot(va, vb) / (np.linalg.norm(va) * np.linalg.norm(vb))
+        assert abs(similarity - expected) < 1e-3  # float16 cache storage
+    assert abs(batched[0] - 1.0) < 1e-3
+
+
+def test_rejects_edits_below_threshold():
+    """With an unreachable threshold nothing should be changed"""
+    mimic = make_mimic(semantic_threshold=1.01)
+    result = mimic.process(TEST_TEXT, min_words=50)
+    assert result["changes"] == []
+
+
+def test_synonym_guard_only_encodes_touched_sentences():
+    mimic = make_mimic(aggressiveness=1.0, semantic_threshold=0.0)
+    text = "\n\n".join([
+        "This sentence has nothing to swap.",
+        "The tool demonstrates remarkable speed.",
+        "Another plain sentence here.",
+        "Furthermore, it facilitates reuse.",
+    ])
+    modified, changes = mimic._apply_strategic_synonyms(text)
+
+    encoder = mimic.semantic_model
+    # 4 original sentences + one re-encoded sentence per swap, then the two sentences
+    # two swaps each hit, as emitted (their earlier versions are cached)
+    touched = 4  # demonstrates, remarkable, furthermore, facilitates
+    assert encoder.calls == 2
+    assert encoder.texts_encoded == 4 + touched + 2
+    assert "shows" in modified and "helps" in modified
+    # Paragraph breaks and untouched sentences survive verbatim
+    assert modified.count("\n\n") == 3
+    assert "This sentence has nothing to swap." in modified
+    assert len(changes) == 4
+
+
+class ClashingEncoder(CountingEncoder):
+    """Bag of words, except that "shows" and "great" together mean something else entirely"""
+
+    def encode(self, texts, convert_to_numpy=True):
+        vectors = super().encode(texts, convert_to_numpy)
+        for row, text in enumerate(texts):
+            if "shows" in text and "great" in text:
+                vectors[row] = 0.0
+                vectors[row, 0] = 1.0
+        return vectors
+
+
+def test_sentence_hit_by_several_swaps_is_checked_as_emitted():
+    mimic = make_mimic(aggressiveness=1.0, semantic_threshold=0.5)
+    mimic.semantic_model = ClashingEncoder()
+    text = "The tool demonstrates remarkable speed."
+    # Each swap alone keeps 4 of 5 words, and their composed deltas still pass the threshold
+    modified, changes = mimic._apply_strategic_synonyms(text)
+    assert changes == ["demonstrates → shows", "remarkable → great"]
+    assert modified == "The tool shows remarkable speed."  # the last swap is undone
+
+
+def test_document_similarity_from_sentence_vectors():
+    mimic = make_mimic(aggressiveness=1.0, semantic_threshold=0.0)
+    modified, _ = mimic._apply_strategic_synonyms(TEST_TEXT)
+    assert abs(mimic._document_similarity(TEST_TEXT, TEST_TEXT) - 1.0) < 1e-5
+    assert 0.0 < mimic._document_similarity(TEST_TEXT, modified) < 1.0
+
+
+def test_lexical_prefilter_skips_clear_cases():
+    """Sentence splits and single-word swaps in a long document are decided without the model"""
+    mimic = make_mimic(aggressiveness=1.0, prefilter=True)
+    plain = " ".join(f"Sentence number {i} talks about the weather in town." for i in range(60))
+    modified, changes = mimic._apply_strategic_synonyms(TEST_BLOCK + " " + plain)
+    assert changes
+    assert mimic.semantic_model.calls == 0
+
+    similarities = mimic._batch_similarities([
+        ("The tool is fast, and it keeps improving.", "The tool is fast. and it keeps improving."),
+        ("The tool is fast.", "Bananas grow on trees in warm climates everywhere."),
+    ])
+    assert similarities[0] >= mimic.semantic_threshold
+    assert similarities[1] < mimic.semantic_threshold
+    assert mimic.semantic_model.calls == 0
+    stats = mimic.lexical_prefilter.get_stats()
+    print(f"📊 Pre-filter: {stats}")
+    assert stats["bypass_rate"] == 1.0
+
+
+def test_lexical_prefilter_defers_ambiguous_edits():
+    mimic = make_mimic(prefilter=True)
+    sentence = "These sophisticated algorithms can analyze patterns in data with accuracy."
+    candidate = "These sophisticated algorithms can analyze, to be honest, patterns in data with accuracy."
+    mimic._batch_similarities([(sentence, candidate)])
+    assert mimic.semantic_model.calls == 1
+    assert mimic.lexical_prefilter.get_stats()["ambiguous"] == 1
+
+
+def test_lexical_prefilter_follows_a_low_threshold():
+    mimic = make_mimic(semantic_threshold=0.2, prefilter=True)
+    assert mimic.lexical_prefilter.reject_below == 0.2
+    # Lexically ~0.22: above the threshold, so the model decides instead of an outright reject
+    pair = ("The tool is fast and it keeps improving.", "The tool was slow before a new release came out.")
+    similarity = mimic._batch_similarities([pair])[0]
+    assert mimic.semantic_model.calls == 1 and mimic.lexical_prefilter.get_stats()["rejected"] == 0
+    va, vb = mimic.semantic_model.encode(list(pair))
+    assert abs(similarity - np.dot(va, vb) / (np.linalg.norm(va) * np.linalg.norm(vb))) < 1e-3
+
+    strict = make_mimic(semantic_threshold=0.99, prefilter=True)
+    assert strict.lexical_prefilter.accept_above == 0.99
+
+
+if __name__ == "__main__":
+    test_semantic_checks_are_batched()
+    test_batched_similarity_matches_pairwise()
+    test_rejects_edits_below_threshold()
+    test_synonym_guard_only_encodes_touched_sentences()
+    test_sentence_hit_by_several_swaps_is_checked_as_emitted()
+    test_document_similarity_from_sentence_vectors()
+    test_lexical_prefilter_skips_clear_cases()
+    test_lexical_prefilter_defers_ambiguous_edits()
+    test_lexical_prefilter_follows_a_low_threshold()
+    print("🎉 Enhanced WriteHuman batching tests passed!")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import time
+from collections import Counter
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import humanize
+from app.services.document import join_paragraphs, split_paragraphs
+from app.services.incremental import IncrementalHumanizer, UnknownJobError
+from app.services.job_queue import SQLiteJobQueue
+from app.services.stage_cache import stage_cache
+
+PARAGRAPHS = [
+    "The artificial intelligence system demonstrates remarkable capabilities in natural language processing.",
+    "Furthermore, it is important to note that these advancements offer numerous benefits.",
+    "Organizations worldwide are investing heavily in AI development and deployment.",
+]
+
+app = FastAPI()
+app.include_router(humanize.router, prefix="/api/humanize")
+client = TestClient(app)
+
+
+class UppercasePipeline:
+    MIN_WORDS = 0
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def humanize_paragraph(self, paragraph, education_level, paranoid_mode, writehuman_mode, seed):
+        self.calls[paragraph] += 1
+        return paragraph.upper()
+
+
+def test_paragraphs_round_trip():
+    text = "\n\nFirst one.\nStill first.\n\n  \n\nSecond.\n\n"
+    paragraphs, separators = split_paragraphs(text)
+    assert paragraphs == ["First one.\nStill first.", "Second."]
+    assert join_paragraphs(paragraphs, separators) == text.strip()
+    assert split_paragraphs("") == ([], [])
+
+
+def sqlite_store():
+    return SQLiteJobQueue(os.path.join(tempfile.mkdtemp(), "queue.sqlite3"))
+
+
+def test_only_edited_paragraphs_are_rerun():
+    pipeline = UppercasePipeline()
+    incremental = IncrementalHumanizer(pipeline, sqlite_store())
+    first = incremental.humanize("\n\n".join(PARAGRAPHS), seed=3)
+    assert first["processed_paragraphs"] == 3 and first["reused_paragraphs"] == 0
+
+    edited = [PARAGRAPHS[0], "A brand new paragraph.", PARAGRAPHS[2]]
+    second = incremental.humanize("\n\n".join(edited), previous_job_id=first["job_id"])
+    assert second["seed"] == 3
+    assert (second["processed_paragraphs"], second["reused_paragraphs"]) == (1, 2)
+    assert second["humanized_text"] == "\n\n".join(p.upper() for p in edited)
+    assert [d["op"] for d in second["diff"]] == ["equal", "replace", "equal"]
+    assert [p["reused"] for p in second["paragraphs"]] == [True, False, True]
+    assert max(pipeline.calls.values()) == 1
+
+    # Other options invalidate the earlier outputs
+    third = incremental.humanize("\n\n".join(edited), previous_job_id=second["job_id"], education_level="phd")
+    assert third["processed_paragraphs"] == 3
+
+
+def test_jobs_are_shared_between_workers():
+    path = os.path.join(tempfile.mkdtemp(), "queue.sqlite3")
+    first_worker, second_worker = UppercasePipeline(), UppercasePipeline()
+    first = IncrementalHumanizer(first_worker, SQLiteJobQueue(path)).humanize("\n\n".join(PARAGRAPHS))
+    follow_up = IncrementalHumanizer(second_worker, SQLiteJobQueue(path), ttl=0.05)
+    edited = follow_up.humanize("\n\n".join(PARAGRAPHS[:2]) + "\n\nNew.", previous_job_id=first["job_id"])
+    assert (edited["reused_paragraphs"], edited["processed_paragraphs"]) == (2, 1)
+    assert list(second_worker.calls) == ["New."]
+
+    time.sleep(0.1)
+    try:
+        follow_up.get_job(edited["job_id"])
+    except UnknownJobError:
+        pass
+    else:
+        raise AssertionError("incremental job outlived its TTL")
+
+
+def test_incremental_endpoint():
+    response = client.post("/api/humanize/incremental", json={"text": "\n\n".join(PARAGRAPHS[:2]), "writehuman_mode": False})
+    assert response.status_code == 200
+    first = response.json()
+    assert len(first["paragraphs"]) == 2 and len(first["humanized_text"].split()) >= 250
+
+    edited = PARAGRAPHS[0] + "\n\n" + PARAGRAPHS[2]
+    second = client.post("/api/humanize/incremental", json={"text": edited, "previous_job_id": first["job_id"],
+                                                            "writehuman_mode": False}).json()
+    assert second["reused_paragraphs"] == 1 and second["processed_paragraphs"] == 1
+    assert second["paragraphs"][0]["humanized_text"] == first["paragraphs"][0]["humanized_text"]
+
+    # Without the job: the previous text and the earlier run's seed, served from the stage cache
+    stage_cache.clear()
+    first_only = client.post("/api/humanize/incremental", json={"text": PARAGRAPHS[0], "writehuman_mode": False}).json()
+    hits = stage_cache.get_stats()["stages"]["polished"]["hits"]
+    from_text = client.post("/api/humanize/incremental", json={"text": edited, "previous_text": PARAGRAPHS[0],
+                                                               "seed": first_only["seed"], "writehuman_mode": False}).json()
+    assert from_text["paragraphs"][0]["humanized_text"] == first_only["paragraphs"][0]["humanized_text"]
+    assert stage_cache.get_stats()["stages"]["polished"]["hits"] == hits + 1  # the unchanged paragraph
+    only_text = client.post("/api/humanize/incremental", json={"text": edited, "previous_text": PARAGRAPHS[0]})
+    assert only_text.status_code == 400
+
+    missing = client.post("/api/humanize/incremental", json={"text": edited, "previous_job_id": "missing"})
+    assert missing.status_code == 404
+
+
+if __name__ == "__main__":
+    test_paragraphs_round_trip()
+    test_only_edited_paragraphs_are_rerun()
+    test_jobs_are_shared_between_workers()
+    test_incremental_endpoint()
+    print("🎉 Incremental humanization tests passed!")
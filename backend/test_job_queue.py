@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import humanize
+from app.services.job_queue import (FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, RedisJobQueue, SQLiteJobQueue,
+                                    WatchError)
+from app.services.job_workers import JOB_HANDLERS, JobWorkerPool
+
+TEXT = ("The artificial intelligence system demonstrates remarkable capabilities in natural language "
+        "processing. Furthermore, it is important to note that these advancements offer numerous benefits.")
+
+app = FastAPI()
+app.include_router(humanize.router, prefix="/api/humanize")
+client = TestClient(app)
+
+
+class LocalRedis:
+    """Stand-in for a Redis server: the hash, sorted-set and transaction commands RedisJobQueue uses, in memory"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.versions = {}  # key -> write count, for WATCH
+        self.before_exec = None  # called once before the next EXEC, to race a transaction
+
+    def _get(self, name, default):
+        if name in self.expiry and self.expiry[name] <= time.time():
+            self.data.pop(name, None)
+            self.expiry.pop(name)
+        return self.data.setdefault(name, default)
+
+    def _touch(self, name):
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def pipeline(self):
+        return LocalPipeline(self)
+
+    def hset(self, name, mapping):
+        self._touch(name)
+        self._get(name, {}).update(mapping)
+
+    def hgetall(self, name):
+        return dict(self._get(name, {}))
+
+    def pexpire(self, name, milliseconds):
+        self._touch(name)
+        self.expiry[name] = time.time() + milliseconds / 1000
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def incr(self, name):
+        self._touch(name)
+        self.data[name] = self.data.get(name, 0) + 1
+        return self.data[name]
+
+    def zadd(self, name, mapping):
+        self._touch(name)
+        self._get(name, {}).update(mapping)
+
+    def zrangebyscore(self, name, low, high):
+        return [member for member, score in sorted(self._get(name, {}).items(), key=lambda item: item[1])
+                if low <= score <= high]
+
+    def zscore(self, name, member):
+        return self._get(name, {}).get(member)
+
+    def zrem(self, name, *members):
+        self._touch(name)
+        zset = self._get(name, {})
+        return sum(zset.pop(member, None) is not None for member in members)
+
+    def zrange(self, name, start, end):
+        zset = self._get(name, {})
+        members = sorted(zset, key=lambda m: (zset[m], m))
+        return members[start:end + 1 if end >= 0 else None]
+
+    def zcard(self, name):
+        return len(self._get(name, {}))
+
+
+class LocalPipeline:
+    """redis-py's transactional pipeline over LocalRedis: WATCH runs commands at once, MULTI queues them"""
+
+    def __init__(self, server):
+        self.server = server
+        self.watched = None
+        self.queued = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.watched = self.queued = None
+
+    def watch(self, *names):
+        self.watched = self.watched or {}
+        self.watched.update({name: self.server.versions.get(name, 0) for name in names})
+
+    def multi(self):
+        self.queued = []
+
+    def execute(self):
+        if self.server.before_exec:
+            race, self.server.before_exec = self.server.before_exec, None
+            race()
+        changed = any(self.server.versions.get(name, 0) != version for name, version in (self.watched or {}).items())
+        queued, self.watched, self.queued = self.queued, None, None
+        if changed:
+            raise WatchError("Watched variable changed.")
+        return [getattr(self.server, name)(*args, **kwargs) for name, args, kwargs in queued]
+
+    def __getattr__(self, name):
+        command = getattr(self.server, name)
+        if self.queued is None:
+            return command
+        return lambda *args, **kwargs: self.queued.append((name, args, kwargs))
+
+
+def sqlite_queue(**kwargs):
+    return SQLiteJobQueue(os.path.join(tempfile.mkdtemp(), "queue.sqlite3"), **kwargs)
+
+
+def redis_queue(**kwargs):
+    return RedisJobQueue(LocalRedis(), **kwargs)
+
+
+def check_priority_order(make_queue):
+    queue = make_queue()
+    low = queue.enqueue("text", {"n": 1}, priority=-5)
+    first = queue.enqueue("text", {"n": 2}, priority=10)
+    second = queue.enqueue("text", {"n": 3}, priority=10)
+    normal = queue.enqueue("text", {"n": 4})
+    claimed = [queue.claim() for _ in range(4)]
+    assert [job.id for job in claimed] == [first.id, second.id, normal.id, low.id]
+    assert all(job.status == RUNNING and job.attempts == 1 for job in claimed)
+    assert queue.claim() is None
+    assert queue.get(low.id).payload == {"n": 1}
+
+
+def check_retries(make_queue):
+    queue = make_queue(retry_backoff=0, max_attempts=2)
+    calls = []
+    def flaky(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("model server went away")
+        return {"echo": payload["text"]}
+
+    pool = JobWorkerPool(queue, workers=0, handlers={"echo": flaky})
+    job = queue.enqueue("echo", {"text": "hi"})
+    pool.run_once()
+    assert queue.get(job.id).status == QUEUED and queue.get(job.id).error == "model server went away"
+    pool.run_once()
+    done = queue.get(job.id)
+    assert (done.status, done.attempts, done.result, done.error) == (SUCCEEDED, 2, {"echo": "hi"}, None)
+
+    doomed = queue.enqueue("missing", {})
+    pool.run_once()
+    assert queue.get(doomed.id).status == FAILED and queue.get(doomed.id).attempts == 1
+
+    # Retries wait out their backoff
+    queue = make_queue(retry_backoff=60)
+    job = queue.enqueue("echo", {"text": "hi"})
+    queue.fail(queue.claim(), "boom")
+    assert queue.get(job.id).status == QUEUED and queue.claim() is None
+
+
+def check_lease_expiry(make_queue):
+    queue = make_queue(lease_seconds=0, retry_backoff=0, max_attempts=2)
+    job = queue.enqueue("text", {})
+    stale = queue.claim()
+    time.sleep(0.01)
+    current = queue.claim()  # the first worker stopped renewing, so the job is retried
+    assert current.id == job.id and current.attempts == 2
+    assert not queue.complete(stale, {"late": True}) and queue.complete(current, {"ok": True})
+    assert queue.get(job.id).result == {"ok": True}
+
+
+def check_result_ttl(make_queue):
+    queue = make_queue(result_ttl=0.05)
+    job = queue.enqueue("text", {})
+    queue.complete(queue.claim(), {"ok": True})
+    assert queue.get(job.id).status == SUCCEEDED
+    time.sleep(0.1)
+    assert queue.get(job.id) is None
+
+
+def check_records(make_queue):
+    queue = make_queue()
+    record = queue.record("incremental", {"text": "a"}, {"a": "A"}, ttl=0.05)
+    stored = queue.get(record.id)
+    assert (stored.status, stored.payload, stored.result) == (SUCCEEDED, {"text": "a"}, {"a": "A"})
+    assert queue.claim() is None  # nothing for a worker to run
+    time.sleep(0.1)
+    assert queue.get(record.id) is None
+
+
+def test_sqlite_queue():
+    for check in (check_priority_order, check_retries, check_lease_expiry, check_result_ttl, check_records):
+        check(sqlite_queue)
+
+
+def test_redis_queue_on_local_stand_in():
+    for check in (check_priority_order, check_retries, check_lease_expiry, check_result_ttl, check_records):
+        check(redis_queue)
+
+
+def test_redis_stale_claim_cannot_overwrite_a_retry():
+    queue = redis_queue(retry_backoff=0)
+    job = queue.enqueue("text", {})
+    stale = queue.claim()
+
+    # Between the stale worker's check and its write, the job is retried and claimed again
+    def reclaim():
+        queue.client.hset(queue._key(job.id), mapping={"attempts": "2"})
+    queue.client.before_exec = reclaim
+    assert not queue.complete(stale, {"late": True})
+    current = queue.get(job.id)
+    assert current.status == RUNNING and current.attempts == 2 and current.result is None
+
+    queue.client.before_exec = lambda: queue.client.zadd(queue.running_key, {job.id: time.time() + 60})
+    assert queue.renew(current)  # a write the check doesn't depend on only makes it run again
+    assert queue.complete(current, {"ok": True}) and queue.get(job.id).result == {"ok": True}
+
+
+def test_redis_worker_dying_midway_loses_no_job():
+    queue = redis_queue(retry_backoff=0)
+
+    def die():
+        raise ConnectionError("worker killed")
+
+    def dies(step, *args):
+        queue.client.before_exec = die
+        try:
+            step(*args)
+        except ConnectionError:
+            return
+        raise AssertionError(f"{step.__name__} never reached EXEC")
+
+    dies(queue.enqueue, "text", {})
+    assert queue.get_stats()[QUEUED] == 0 and not any(k.startswith(f"{queue.prefix}:job:") for k in queue.client.data)
+
+    job = queue.enqueue("text", {})
+    dies(queue.claim)  # between taking the job off the queue and recording it as running
+    assert queue.get(job.id).status == QUEUED and queue.get_stats()[QUEUED] == 1
+
+    queue.fail(queue.claim(), "boom")
+    dies(queue.claim)  # while promoting the retry
+    assert queue.get_stats()["retrying"] == 1
+    retried = queue.claim()
+    assert retried.id == job.id and retried.attempts == 2
+    assert queue.get_stats() == {"backend": "redis", QUEUED: 0, "retrying": 0, RUNNING: 1}
+
+
+def test_job_queue_is_abstract():
+    try:
+        JobQueue()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("JobQueue can be instantiated")
+
+
+def test_sqlite_queue_is_durable():
+    path = os.path.join(tempfile.mkdtemp(), "queue.sqlite3")
+    queue = SQLiteJobQueue(path, result_ttl=0)
+    finished = queue.enqueue("text", {}, priority=5)
+    queued = queue.enqueue("text", {"text": "later"}, priority=3)
+    queue.complete(queue.claim(), {"ok": True})
+    queue.close()
+    reopened = SQLiteJobQueue(path)
+    assert reopened.get(queued.id).payload == {"text": "later"} and reopened.get(queued.id).priority == 3
+    assert reopened.get(finished.id) is None and reopened.purge_expired() == 1
+
+
+def test_jobs_endpoint(monkeypatch):
+    queue = sqlite_queue()
+    pool = JobWorkerPool(queue, workers=0, handlers=JOB_HANDLERS)
+    monkeypatch.setattr(humanize, "job_queue", queue)
+    monkeypatch.setattr(humanize, "job_workers", pool)
+
+    response = client.post("/api/humanize/jobs", json={"text": TEXT, "writehuman_mode": False, "priority": 5})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued" and job["priority"] == 5 and job["result"] is None
+
+    # Long-poll: the request returns once a worker has finished the job
+    worker = threading.Timer(0.2, pool.run_once)
+    worker.start()
+    done = client.get(f"/api/humanize/jobs/{job['job_id']}?wait=10").json()
+    worker.join()
+    assert done["status"] == "succeeded" and done["attempts"] == 1
+    assert done["result"]["original_text"] == TEXT and done["result"]["humanized_text"]
+
+    levels = client.post("/api/humanize/jobs", json={"text": TEXT, "education_levels": ["phd", "elementary"],
+                                                     "writehuman_mode": False}).json()
+    pool.run_once()
+    variants = client.get(f"/api/humanize/jobs/{levels['job_id']}").json()["result"]["variants"]
+    assert sorted(variants) == ["elementary", "phd"]
+
+    assert client.get("/api/humanize/jobs/nope").status_code == 404
+    assert client.post("/api/humanize/jobs", json={"text": TEXT, "education_levels": ["wizard"]}).status_code == 400
+
+
+if __name__ == "__main__":
+    test_sqlite_queue()
+    test_redis_queue_on_local_stand_in()
+    test_redis_stale_claim_cannot_overwrite_a_retry()
+    test_redis_worker_dying_midway_loses_no_job()
+    test_job_queue_is_abstract()
+    test_sqlite_queue_is_durable()
+    print("🎉 Job queue tests passed!")
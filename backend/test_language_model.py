@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import math
+import random
+
+import numpy as np
+
+from app.services.document import Document
+from app.services.perplexity import PerplexityOptimizer
+from app.services.language_model import NgramLanguageModel, language_model, tokenize, BOS_ID, UNK_ID
+
+CORPUS = [
+    "The cat sat on the mat. The dog sat on the log.",
+    "A cat and a dog played in the yard. The yard was green.",
+    "We sat in the yard and watched the dog.",
+]
+TEXT = "The dog sat in the yard. A bird sang on the mat! Nobody knows why."
+
+
+def naive_logprob(model, history, word):
+    """Witten-Bell interpolation, written out one token at a time"""
+    pair = [k for k in range(len(model.bigram_keys)) if model.bigram_keys[k] == history * model.size + word]
+    bigram = model.bigram_counts[pair[0]] if pair else 0
+    following = [k for k in range(len(model.bigram_keys)) if model.bigram_keys[k] // model.size == history]
+    count = sum(model.bigram_counts[k] for k in following)
+    types = len(following)
+    floor = (model.unigram_counts[word] + 1) / (model.unigram_counts.sum() + model.size)
+    return math.log((bigram + types * floor) / (count + types)) if count + types else math.log(floor)
+
+
+def test_vectorized_scores_match_token_by_token():
+    model = NgramLanguageModel.train(CORPUS)
+    scores = model.score(TEXT)
+    expected = []
+    for tokens in tokenize(TEXT):
+        history, total = BOS_ID, 0.0
+        for token in tokens:
+            word = model.index.get(token, UNK_ID)
+            total += naive_logprob(model, history, word)
+            history = word
+        expected.append(total)
+    assert np.allclose(scores.sentence_logprobs, expected)
+    assert list(scores.sentence_tokens) == [6, 6, 3]
+    assert math.isclose(scores.perplexity, math.exp(-sum(expected) / 15))
+
+
+def test_round_trip_and_memoized_scores(tmp_path):
+    levels = np.linspace(0, 1, 101)
+    model = NgramLanguageModel.train(CORPUS, perplexity_quantiles=levels * 40, burstiness_quantiles=levels)
+    path = str(tmp_path / "lm.npz")
+    model.save(path)
+    loaded = NgramLanguageModel.load(path)
+    assert np.allclose(loaded.score(TEXT).sentence_logprobs, model.score(TEXT).sentence_logprobs)
+    assert loaded.score(TEXT) is loaded.score(Document.from_text(TEXT))  # shared, not recomputed
+    assert loaded.score(TEXT).perplexity_percentile == 100.0 or loaded.score(TEXT).perplexity < 40
+    assert model.score("").perplexity == 0.0
+
+
+def test_bundled_model_ranks_plain_below_formal_text():
+    assert language_model is not None
+    plain = language_model.score("We went to the lake and ate sandwiches in the car. It was a good day.")
+    formal = language_model.score("Comprehensive optimization methodologies facilitate unprecedented "
+                                  "computational efficiency. Sophisticated paradigms necessitate utilization.")
+    assert plain.perplexity < formal.perplexity
+    assert 0 <= plain.perplexity_percentile < formal.perplexity_percentile <= 100
+    assert 0 <= plain.burstiness_percentile <= 100
+
+
+def test_optimize_perplexity_keeps_documents_consistent():
+    optimizer = PerplexityOptimizer()
+    for seed, level in enumerate(optimizer.target_perplexity_ranges):
+        random.seed(seed)
+        document = Document.from_text(" ".join([TEXT] * 4))
+        assert optimizer.optimize_perplexity(document, level) is document
+        assert document.word_count == len(document.text.split())
+        assert 0 <= optimizer.calculate_perplexity(document) <= 100
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_vectorized_scores_match_token_by_token()
+    test_round_trip_and_memoized_scores(pathlib.Path(tempfile.mkdtemp()))
+    test_bundled_model_ranks_plain_below_formal_text()
+    test_optimize_perplexity_keeps_documents_consistent()
+    print("🎉 Language model tests passed!")
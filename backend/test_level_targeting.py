@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import random
+
+from app.services.document import Document
+from app.services.humanizer import EducationalLevelEngine
+from app.services.readability import readability_engine
+
+LONG = ("Artificial intelligence is transforming industries across the globe, and from healthcare to finance, "
+        "these systems are enabling organizations to automate processes, analyze vast amounts of data, and make "
+        "more informed decisions about the future. We had lunch at noon and then went back to the office.")
+CHOPPY = ("My sister came home late. The bus was slow. Dinner was cold. "
+          "We talked about the weekend. Then everyone went to bed.")
+
+
+def targeted(text: str, level: str, seed: int = 0):
+    random.seed(seed)
+    engine = EducationalLevelEngine()
+    document = Document.from_text(text)
+    assert engine.adjust_to_level(document, level, iterative=True) is document
+    assert document.word_count == len(document.text.split())
+    return engine, document
+
+
+def test_text_within_band_is_left_alone():
+    text = "We walked to the park after school. The sun was warm and the grass was soft."
+    engine, document = targeted(text, "elementary")
+    assert document.text == text
+    assert engine.stats == {"runs": 1, "within_band": 1}
+
+
+def test_only_long_sentences_are_split():
+    engine, document = targeted(LONG, "middle_school")
+    config = engine.level_configs["middle_school"]
+    assert "We had lunch at noon and then went back to the office." in document.sentences
+    assert document.word_count == len(LONG.split())  # splitting adds no words
+    assert (readability_engine.analyze(document).sentence_words <= config["max_sentence_length"]).all()
+    assert engine.stats["split"] >= 1 and "merge" not in engine.stats
+    # The split happened at a clause break, not mid-phrase
+    assert LONG.startswith(document[0][:-1] + ",")
+
+
+def test_short_sentences_are_merged_into_band():
+    engine, document = targeted(CHOPPY, "middle_school")
+    stats = readability_engine.analyze(document)
+    low, high = engine.level_configs["middle_school"]["words_per_sentence"]
+    assert low <= stats.words_per_sentence <= high
+    assert engine.stats["merge"] == 1 and engine.stats["within_band"] == 1
+    assert all(sentence.endswith(".") for sentence in document)
+
+
+def test_starters_are_added_once():
+    engine, document = targeted(CHOPPY, "phd")
+    starters = engine.level_configs["phd"]["sentence_starters"]
+    for sentence in document:
+        assert sum(sentence.count(f"{starter}, ") for starter in starters) <= 1
+
+
+def test_vocabulary_only_moves_sentences_toward_the_band():
+    engine = EducationalLevelEngine()
+    config = engine.level_configs["phd"]
+    # Far above the phd band already; the scholarly lexicon would only lengthen it further
+    complex_text = ("Institutional epistemological considerations utilize interdisciplinary methodological "
+                    "frameworks comprehensively.")
+    document = Document.from_text(complex_text)
+    stats = readability_engine.analyze(document)
+    assert stats.syllables_per_word > config["syllables_per_word"][1]
+    assert not engine.target_vocabulary(document, config, stats)
+    assert document.text == complex_text
+
+    simple = Document.from_text("We utilize the new tool at work every day.")
+    assert engine.target_vocabulary(simple, config, readability_engine.analyze(simple))
+    assert "methodologically deploy" in simple.text
+
+    # Simplifying lexicons work on the sentences above the band
+    elementary = engine.level_configs["elementary"]
+    short = Document.from_text("We utilize it.")
+    stats = readability_engine.analyze(short)
+    assert stats.syllables_per_word > elementary["syllables_per_word"][1]
+    assert engine.target_vocabulary(short, elementary, stats) and short.text == "We use it."
+
+
+if __name__ == "__main__":
+    test_text_within_band_is_left_alone()
+    test_only_long_sentences_are_split()
+    test_short_sentences_are_merged_into_band()
+    test_starters_are_added_once()
+    test_vocabulary_only_moves_sentences_toward_the_band()
+    print("🎉 Level targeting tests passed!")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import random
+
+from app.services.lexicon import Lexicon
+
+
+def test_single_pass_matches_word_boundaries_and_case():
+    lexicon = Lexicon({"utilize": "use", "analyze": "look at", "demonstrate": "show"})
+    text = "We utilize tools. Utilize them to ANALYZE data, not reanalyze it; demonstrates stays."
+    assert lexicon.sub(text) == "We use tools. Use them to LOOK AT data, not reanalyze it; demonstrates stays."
+    assert lexicon.find(text) == {"utilize", "analyze"}
+
+
+def test_longest_entry_wins_and_no_chaining():
+    lexicon = Lexicon({"use": "apply", "use of": "application of", "apply": "employ"})
+    # "use of" is matched as a phrase, and the output of one entry is never rewritten by another
+    assert lexicon.sub("the use of tools we use") == "the application of tools we apply"
+
+
+def test_active_subset_and_max_per_word():
+    lexicon = Lexicon({"good": ["great", "superb"], "bad": "poor"})
+    random.seed(1)
+    out = lexicon.sub("good good bad bad", active={"good"}, max_per_word=1)
+    words = out.split()
+    assert words[0] in ("great", "superb")
+    assert words[1:] == ["good", "bad", "bad"]
+
+
+def test_empty_lexicon_is_a_no_op():
+    lexicon = Lexicon({})
+    assert lexicon.sub("Nothing to replace here.") == "Nothing to replace here."
+    assert lexicon.find("Nothing to replace here.") == set() and len(lexicon) == 0
+
+
+if __name__ == "__main__":
+    test_single_pass_matches_word_boundaries_and_case()
+    test_longest_entry_wins_and_no_chaining()
+    test_active_subset_and_max_per_word()
+    test_empty_lexicon_is_a_no_op()
+    print("🎉 Lexicon tests passed!")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+from app.services.document import Document
+from app.services.humanizer import (
+    enforce_min_word_count, extract_key_concepts, generate_comprehensive_content, content_index
+)
+
+TEXT = "Machine learning systems said again that NLP pattern work matters."
+
+
+def test_concepts_keep_table_order():
+    assert extract_key_concepts(TEXT) == [
+        "artificial intelligence", "natural language processing", "machine learning",
+        "pattern recognition", "computational systems"
+    ]
+    assert extract_key_concepts("Nothing to see here.") == ["technology", "innovation", "development"]
+
+
+def test_expansion_stops_at_the_first_sentence_reaching_the_minimum():
+    concepts = extract_key_concepts(TEXT)
+    base = generate_comprehensive_content(concepts, 0, TEXT)
+    for min_words in (120, 250, 400, 10 ** 6):
+        expanded = generate_comprehensive_content(concepts, min_words, TEXT)
+        assert expanded.startswith(base)
+        fill = expanded[len(base) + 2:].split(". ") if expanded != base else []
+        assert fill == content_index.fill[:len(fill)]
+        words = len(expanded.split())
+        if min_words > words:
+            assert len(fill) == len(content_index.fill)  # every fill sentence used
+        elif fill:
+            assert words - len(fill[-1].split()) < min_words <= words
+
+
+def test_documents_are_expanded_in_kind():
+    document = Document.from_text(TEXT)
+    expanded = enforce_min_word_count(document, 250)
+    assert isinstance(expanded, Document)
+    assert expanded.word_count >= 250
+    assert expanded.text == enforce_min_word_count(TEXT, 250)
+    assert enforce_min_word_count(TEXT, 5) == TEXT
+
+
+if __name__ == "__main__":
+    test_concepts_keep_table_order()
+    test_expansion_stops_at_the_first_sentence_reaching_the_minimum()
+    test_documents_are_expanded_in_kind()
+    print("🎉 Minimum word count tests passed!")
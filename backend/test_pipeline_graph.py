@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import random
+import threading
+from collections import Counter
+from contextvars import ContextVar
+
+import pytest
+
+from app.services.humanizer import humanizer
+from app.services.pipeline_graph import Stage, StageGraph
+from app.services.rng import request_rng
+from app.services.stage_cache import stage_cache
+
+TEXT = ("The artificial intelligence system demonstrates remarkable capabilities in natural language "
+        "processing. Furthermore, it is important to note that these advancements offer numerous benefits.")
+
+request_id: ContextVar[str] = ContextVar("request_id", default="none")
+
+
+def make_graph(calls: Counter) -> StageGraph:
+    def shared(text):
+        calls["shared"] += 1
+        return text.upper()
+
+    def branch(prefix, level):
+        calls[level] += 1
+        return f"{level}:{prefix}:{request_id.get()}:{request_rng().integers(1000)}:{threading.current_thread().name[:15]}"
+
+    return StageGraph([
+        Stage("prefix", shared, ("text",)),
+        Stage("leveled", branch, ("prefix", "level"), per_variant=True),
+    ], request_inputs=("text",), variant_key="level")
+
+
+def test_shared_stages_run_once_and_branches_fan_out():
+    calls = Counter()
+    request_id.set("req-1")
+    random.seed(0)
+    results = make_graph(calls).run({"text": "abc"}, ["a", "b", "c"])
+    assert calls == {"shared": 1, "a": 1, "b": 1, "c": 1}
+    for level, values in results.items():
+        assert values["prefix"] == "ABC" and values["level"] == level
+        name, prefix, context, draw, thread = values["leveled"].split(":")
+        assert (name, prefix, context, thread) == (level, "ABC", "req-1", "pipeline-branch")
+    # Branch RNGs are seeded from the request, so runs repeat
+    random.seed(0)
+    assert make_graph(Counter()).run({"text": "abc"}, ["a", "b", "c"]) == results
+
+
+def test_single_variant_runs_inline():
+    results = make_graph(Counter()).run({"text": "abc"}, ["only"])
+    assert results["only"]["leveled"].endswith(threading.current_thread().name[:15])
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        StageGraph([Stage("x", str, ("level",))], request_inputs=(), variant_key="level")
+    with pytest.raises(ValueError):
+        StageGraph([Stage("x", str, ("missing",))], request_inputs=(), variant_key="level")
+    with pytest.raises(ValueError):
+        StageGraph([Stage("branch", str, ("text",), per_variant=True), Stage("shared", str, ("branch",))],
+                   request_inputs=("text",), variant_key="level")
+
+
+def test_humanize_levels_shares_upstream_work(monkeypatch):
+    stage_cache.clear()  # paraphrasing must actually run, not come from an earlier test's cache
+    calls = Counter()
+    paraphrase = humanizer.paraphraser.paraphrase
+    monkeypatch.setattr(humanizer.paraphraser, "paraphrase", lambda text: calls.update(["paraphrase"]) or paraphrase(text))
+    levels = ["elementary", "high_school", "phd"]
+    results = humanizer.humanize_levels(TEXT, levels, writehuman_mode=False)
+    assert calls["paraphrase"] == 1
+    assert list(results) == levels
+    for level, result in results.items():
+        assert result["education_level"] == level
+        assert result["original_text"] == TEXT
+        assert result["paraphrased_text"] == results["elementary"]["paraphrased_text"]
+        assert len(result["humanized_text"].split()) >= 200
+
+
+def test_humanize_text_is_a_single_level_run():
+    result = humanizer.humanize_text(TEXT, education_level="masters", writehuman_mode=False)
+    assert result["education_level"] == "masters"
+    assert {"humanized_text", "paraphrased_text", "ai_detection_score_after", "readability_improvement"} <= set(result)
+
+
+if __name__ == "__main__":
+    test_shared_stages_run_once_and_branches_fan_out()
+    test_single_variant_runs_inline()
+    test_invalid_graphs_are_rejected()
+    test_humanize_text_is_a_single_level_run()
+    print("🎉 Pipeline graph tests passed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import humanize
+from app.services.pipeline_graph import Stage, StageGraph, notify, observe_pipeline
+from app.services.stage_cache import StageCache
+from app.services.streaming import humanize_events
+
+TEXT = ("The artificial intelligence system demonstrates remarkable capabilities in natural language "
+        "processing. Furthermore, it is important to note that these advancements offer numerous benefits.")
+
+app = FastAPI()
+app.include_router(humanize.router, prefix="/api/humanize")
+client = TestClient(app)
+
+
+def test_graph_reports_stage_progress():
+    graph = StageGraph([
+        Stage("upper", str.upper, ("text",), seeded=False),
+        Stage("tagged", lambda text, level: f"{level}:{text}", ("upper", "level"), per_variant=True, seeded=False),
+    ], request_inputs=("text",), variant_key="level")
+    cache, events = StageCache(1 << 20), []
+    with observe_pipeline(events.append):
+        graph.run({"text": "abc"}, ["a", "b"], cache=cache)
+        graph.run({"text": "abc"}, ["a"], cache=cache)
+    assert [(e["event"], e["stage"]) for e in events[:2]] == [("stage_started", "upper"), ("stage_finished", "upper")]
+    finished = [e for e in events if e["event"] == "stage_finished"]
+    assert sorted((e["stage"], e["variant"]) for e in finished[:3]) == [("tagged", "a"), ("tagged", "b"), ("upper", None)]
+    assert [e["cached"] for e in finished[3:]] == [True, True]
+    assert finished[-1]["output"] == "a:ABC" and finished[-1]["elapsed_ms"] >= 0
+    # Nothing is reported outside the block
+    graph.run({"text": "abc"}, ["a"])
+    assert len(events) == 10
+
+
+def test_events_come_from_the_pipeline_thread_in_order():
+    class Pipeline:
+        def humanize_text(self, text, *args):
+            for index, part in enumerate(["One.", "\n\nTwo."]):
+                notify({"event": "partial", "index": index, "text": part})
+            return {"humanized_text": "One.\n\nTwo."}
+
+    async def collect():
+        return [event async for event in humanize_events("x y", pipeline=Pipeline())]
+
+    events = asyncio.run(collect())
+    assert [e["event"] for e in events] == ["started", "partial", "partial", "result"]
+    assert "".join(e["text"] for e in events if e["event"] == "partial") == events[-1]["result"]["humanized_text"]
+
+
+def test_stream_endpoint_ndjson():
+    response = client.post("/api/humanize/text/stream", json={"text": TEXT, "writehuman_mode": False})
+    assert response.status_code == 200 and response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["event"] == "started" and events[-1]["event"] == "result"
+    finished = {e["stage"]: e for e in events if e["event"] == "stage_finished"}
+    assert list(finished) == ["paraphrased", "gemini_humanized", "leveled", "optimized", "stylometric", "evaded",
+                              "expanded", "mimicked", "polished"]
+    assert finished["paraphrased"]["text"] and "text" not in finished["leveled"]
+    result = events[-1]["result"]
+    assert result["paraphrased_text"] == finished["paraphrased"]["text"]
+    assert "".join(e["text"] for e in events if e["event"] == "partial") == result["humanized_text"]
+
+
+def test_stream_endpoint_sse():
+    response = client.post("/api/humanize/text/stream?format=sse", json={"text": TEXT, "writehuman_mode": False})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    messages = response.text.strip().split("\n\n")
+    assert messages[0].startswith("event: started\ndata: {")
+    assert messages[-1].startswith("event: result\n")
+    assert client.post("/api/humanize/text/stream?format=xml", json={"text": TEXT}).status_code == 400
+
+
+if __name__ == "__main__":
+    test_graph_reports_stage_progress()
+    test_events_come_from_the_pipeline_thread_in_order()
+    test_stream_endpoint_ndjson()
+    test_stream_endpoint_sse()
+    print("🎉 Progress streaming tests passed!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import time
+
+import numpy as np
+
+from app.services.document import Document
+from app.services.humanizer import StylometricHumanizer
+from app.services.readability import ReadabilityEngine, SyllableTable, estimate_syllables, readability_engine
+
+SYLLABLES = {
+    "cat": 1, "table": 2, "tables": 2, "make": 1, "makes": 1, "wanted": 2, "jumped": 1, "happy": 2,
+    "beautiful": 3, "information": 4, "university": 5, "technology": 4, "artificial": 4, "intelligence": 4,
+    "capabilities": 5, "boxes": 2, "dishes": 2, "changes": 2, "sentences": 3, "states": 1, "piano": 3,
+    "quiet": 2, "giant": 2, "special": 2, "continue": 3, "studies": 2, "coffee": 2, "noticed": 2,
+}
+
+
+def test_syllable_heuristic():
+    wrong = {word: estimate_syllables(word) for word, count in SYLLABLES.items() if estimate_syllables(word) != count}
+    assert not wrong, wrong
+
+
+def test_flesch_kincaid_by_hand():
+    stats = readability_engine.analyze("The cat sat on the mat. The dog ran.")
+    assert (stats.words, stats.sentences, stats.syllables) == (9, 2, 9)
+    assert np.isclose(stats.flesch_reading_ease, 206.835 - 1.015 * 4.5 - 84.6 * 1.0)
+    assert np.isclose(stats.flesch_kincaid_grade, 0.39 * 4.5 + 11.8 * 1.0 - 15.59)
+    assert readability_engine.analyze("").summary()["flesch_kincaid_grade"] == 0.0
+
+
+def test_batch_matches_single_and_sentences_line_up():
+    texts = ["Short one. ?! A considerably more complicated sentence follows.", "", "Word"]
+    batch = readability_engine.analyze_batch(texts)
+    for text, stats in zip(texts, batch):
+        single = readability_engine.analyze(Document.from_text(text))
+        assert single.summary() == stats.summary()
+        assert len(stats.sentence_words) == len(Document.from_text(text))
+    assert batch[0].sentence_words.tolist() == [2, 0, 6]
+    assert batch[0].sentences == 2
+
+
+def test_loaded_table_overrides_heuristic(tmp_path):
+    path = tmp_path / "syllables.txt"
+    path.write_text("cat 7\nbroken line\n")
+    engine = ReadabilityEngine(SyllableTable.load(str(path)))
+    assert engine.analyze("cat every dog").syllables == 7 + 2 + 1
+
+
+def test_humanize_reports_readability_change():
+    text = ("The implementation demonstrates considerable organizational sophistication. "
+            "Furthermore, comprehensive evaluation necessitates methodological consistency.")
+    result = StylometricHumanizer().humanize_text(text)
+    before, after = readability_engine.analyze(text), readability_engine.analyze(result["humanized_text"])
+    assert result["readability_before"] == before.summary()
+    assert result["readability_improvement"] == round((after.flesch_reading_ease - before.flesch_reading_ease) / 100, 2)
+
+
+def benchmark_analyze(words: int = 500, repeat: int = 200):
+    text = " ".join(["The quick brown fox jumps over the lazy dog."] * (words // 9))
+    readability_engine.analyze(text)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        readability_engine.analyze(text)
+    print(f"📊 {words}-word document: {(time.perf_counter() - start) / repeat * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_syllable_heuristic()
+    test_flesch_kincaid_by_hand()
+    test_batch_matches_single_and_sentences_line_up()
+    test_loaded_table_overrides_heuristic(pathlib.Path(tempfile.mkdtemp()))
+    test_humanize_reports_readability_change()
+    benchmark_analyze()
+    print("🎉 Readability tests passed!")
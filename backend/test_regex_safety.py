@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Worst-case inputs for the regex rules: long whitespace runs, unclosed
+parentheses and dashes, giant words and sentences. Every rule-based stage must
+get through each of them in roughly linear time, and the regex guard must skip
+(not hang on) rules that blow their budget.
+"""
+
+import random
+import threading
+import time
+
+from app.services import safe_regex
+from app.services.safe_regex import RegexGuard
+from app.services.humanizer import (
+    StylometricHumanizer, MultiDetectorObfuscator, EducationalLevelEngine,
+    PerplexityOptimizer, CoherenceDisruptor
+)
+from app.services.rule_based_polisher import RuleBasedPolisher
+from app.services.fluency_polisher import SafeFluencyPolisher
+from app.services.writehuman_mimic import WriteHumanMimic
+from app.services.enhanced_writehuman import EnhancedWriteHumanMimic
+
+SIZE = 40000
+STAGE_LIMIT_SECONDS = 3.0
+
+WORST_CASES = {
+    "whitespace_run": "word" + " " * SIZE + "end",
+    "mixed_whitespace": "word" + " \t\n" * (SIZE // 3) + "x",
+    "giant_word": "a" * SIZE,
+    "unpunctuated": " ".join(["word"] * (SIZE // 5)),
+    "dashes": "—" * SIZE,
+    "unclosed_dashes": " — a" * (SIZE // 4),
+    "unclosed_parentheses": "(" * SIZE,
+    "periods": "." * SIZE,
+    "capitalized_fragments": ". A" * (SIZE // 3),
+    "duplicate_commas": ", ," * (SIZE // 3),
+    "open_sentence": "x. " + "A" * SIZE,
+}
+
+
+def stages():
+    enhanced = EnhancedWriteHumanMimic(aggressiveness=0.9, semantic_threshold=0.0)
+    enhanced.semantic_model = None
+    return {
+        "rule_based_polish": RuleBasedPolisher().polish,
+        "fluency_polish": SafeFluencyPolisher()._rule_based_polish,
+        "stylometric": StylometricHumanizer().humanize_text,
+        "detector_evasion": MultiDetectorObfuscator().apply_multi_detector_evasion,
+        "education_level": lambda text: EducationalLevelEngine().adjust_to_level(text, "elementary"),
+        "perplexity": PerplexityOptimizer().increase_perplexity,
+        "coherence": CoherenceDisruptor().disrupt_coherence,
+        "writehuman": WriteHumanMimic(aggressiveness=0.9).process,
+        "enhanced_writehuman": lambda text: enhanced.process(text, min_words=0),
+    }
+
+
+def test_worst_case_inputs_through_every_stage():
+    slow = []
+    for stage_name, stage in stages().items():
+        for case_name, text in WORST_CASES.items():
+            random.seed(0)
+            start = time.perf_counter()
+            stage(text)
+            elapsed = time.perf_counter() - start
+            if elapsed > STAGE_LIMIT_SECONDS:
+                slow.append(f"{stage_name} on {case_name}: {elapsed:.2f}s")
+    assert not slow, slow
+
+
+def test_polishers_still_fix_text():
+    polished, _ = RuleBasedPolisher().polish("this is a apple ,  and the the end .")
+    assert polished == "This is an apple, and the end."
+    assert SafeFluencyPolisher()._rule_based_polish("one  , two .three. four") == "One, two.three. Four"
+
+
+def test_exhausted_stage_budget_skips_rules():
+    guard = RegexGuard(rule_timeout_ms=250, stage_budget_ms=2000)
+    pattern = guard.compile(r"\s+", name="spaces")
+    with guard.budget(0):
+        assert pattern.sub(" ", "a  b") == "a  b"
+        assert pattern.finditer("a  b") == []
+    assert pattern.sub(" ", "a  b") == "a b"
+    assert guard.get_stats()["skipped"] == {"spaces": 2}
+
+
+def test_catastrophic_rule_times_out_on_the_regex_engine():
+    guard = RegexGuard(rule_timeout_ms=20)
+    # The lookahead keeps it off RE2; exponential backtracking on a failing input
+    pattern = guard.compile(r"^(a|aa)+(?=b)b$", name="catastrophic")
+    assert pattern.engine == "regex"
+    evil = "a" * 40 + "!"
+    start = time.perf_counter()
+    assert pattern.search(evil) is None
+    assert time.perf_counter() - start < 1.0  # interrupted mid-match, not after the fact
+    assert pattern.search("aab") is not None
+    stats = guard.get_stats()
+    assert stats["skipped"] == {"catastrophic": 1} and stats["tripped"] == {}
+    assert stats["calls"] == {"regex": 1}
+
+
+def test_nested_quantifiers_run_in_linear_time_on_re2():
+    guard = RegexGuard(rule_timeout_ms=20)
+    pattern = guard.compile(r"(a+)+$", name="nested")
+    if pattern.engine != "re2":  # no google-re2 wheel for this platform
+        return
+    assert pattern.search("a" * SIZE + "!") is None
+    assert guard.get_stats()["skipped"] == {}
+
+
+def test_standard_library_trips_catastrophic_rule(monkeypatch):
+    monkeypatch.setattr(safe_regex, "RE2_AVAILABLE", False)
+    monkeypatch.setattr(safe_regex, "REGEX_AVAILABLE", False)
+    guard = RegexGuard(rule_timeout_ms=1)
+    pattern = guard.compile(r"(a+)+$", name="catastrophic")
+    assert pattern.engine == "re"
+    evil = "a" * 22 + "!"
+    pattern.search(evil)  # nothing can interrupt it: runs to the end, then trips the rule
+    start = time.perf_counter()
+    assert pattern.search(evil) is None
+    assert time.perf_counter() - start < 0.05
+    assert pattern.search("aaa") is not None  # smaller inputs still run
+    stats = guard.get_stats()
+    assert stats["tripped"] == {"catastrophic": 1} and stats["skipped"] == {"catastrophic": 1}
+
+
+def test_patterns_re2_rejects_compile_quietly(capfd):
+    guard = RegexGuard()
+    pattern = guard.compile(r"(?<=\.)\s+(\w)\1")
+    assert pattern.engine != "re2"
+    assert capfd.readouterr().err == ""
+
+
+def test_counters_are_exact_across_threads():
+    guard = RegexGuard()
+    pattern = guard.compile(r"\s+", name="spaces")
+
+    def work():
+        for _ in range(500):
+            pattern.sub(" ", "a  b")
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(guard.get_stats()["calls"].values()) == 8 * 500
+
+
+if __name__ == "__main__":
+    test_worst_case_inputs_through_every_stage()
+    test_polishers_still_fix_text()
+    test_exhausted_stage_budget_skips_rules()
+    test_catastrophic_rule_times_out_on_the_regex_engine()
+    test_nested_quantifiers_run_in_linear_time_on_re2()
+    test_counters_are_exact_across_threads()
+    print("🎉 Regex safety tests passed!")
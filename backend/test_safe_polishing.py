@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 
-from app.services.rule_based_polisher import RuleBasedPolisher
+import re
+import timeit
+
+from app.services.rule_based_polisher import RuleBasedPolisher, ProtectedSpans
 from app.services.fluency_polisher import SafeFluencyPolisher
 
+# Sample text with intentional quirks that should be preserved
+TEST_TEXT = """this  is   a  sample  text , in some cases it has   weird spacing . you might say  the grammar is  not perfect  but these quirks should be preserved . to be honest  , this (parenthetical comment)  looks  human-like already . basically  , we want to  fix obvious  issues  without  destroying  the  human  markers ."""
+
+
 def test_safe_polishing():
     """Test the safe polishing system"""
     
-    # Sample text with intentional quirks that should be preserved
-    test_text = """this  is   a  sample  text , in some cases it has   weird spacing . you might say  the grammar is  not perfect  but these quirks should be preserved . to be honest  , this (parenthetical comment)  looks  human-like already . basically  , we want to  fix obvious  issues  without  destroying  the  human  markers ."""
+    test_text = TEST_TEXT
     
     print("🔧 Testing Safe Polishing System")
     print("=" * 50)
@@ -73,5 +79,62 @@ def test_safe_polishing():
     print("   • Maintained parenthetical comments")
     print("   • Improved readability without losing quirks")
 
+def test_protected_spans_follow_edits():
+    """Matches near preserved content are skipped, everything else is fixed in one pass"""
+    filler = "nothing to see here at all " * 3
+    text = f"word , {filler}(keep  ,  this) {filler}the the end , {filler}so... , ok"
+    polisher = RuleBasedPolisher()
+    polished, changes = polisher.polish(text)
+
+    assert polished.startswith("Word, ")
+    assert "(keep , this)" in polished
+    assert "the end, " in polished and "the the" not in polished
+    assert polished.endswith("so... , ok")
+    assert changes
+
+    spans = ProtectedSpans([(10, 20), (15, 25), (40, 45)])
+    assert (spans.starts, spans.ends) == ([10, 40], [25, 45])
+    assert spans.overlaps(24, 30) and not spans.overlaps(25, 40)
+    moved = spans.shifted([(5, -2), (30, 3)])
+    assert (moved.starts, moved.ends) == ([8, 41], [23, 46])
+
+
+def legacy_rule_based_polish(text: str) -> str:
+    """SafeFluencyPolisher._rule_based_polish before the rules were compiled into one program"""
+    patterns = {
+        r'\s+,': ',', r'\s+\.': '.', r'(\w+),\s*,': r'\1,', r'(\w+)\.\s*\.': r'\1.', r'\s{2,}': ' ',
+        r'^([a-z])': lambda m: m.group(1).upper(),
+    }
+    for pattern, replacement in patterns.items():
+        flags = re.MULTILINE if callable(replacement) else 0
+        text = re.sub(pattern, replacement, text, flags=flags)
+    parts = re.split(r'(\.\s+)', text)
+    for i in range(0, len(parts), 2):
+        if parts[i].strip() and parts[i][0].islower():
+            parts[i] = parts[i][0].upper() + parts[i][1:]
+    return ''.join(parts).strip()
+
+
+def test_compiled_program_matches_legacy_polish():
+    polisher = SafeFluencyPolisher()
+    for text in (TEST_TEXT, TEST_TEXT * 3, "one.two .  three , , four..\nfive  .  six"):
+        assert polisher._rule_based_polish(text) == legacy_rule_based_polish(text)
+
+
+def benchmark_rule_based_polish(repeat: int = 200):
+    """Micro-benchmark: compiled rule program vs the old per-call re.sub loop"""
+    polisher = SafeFluencyPolisher()
+    for copies in (1, 10, 100):
+        text = " ".join([TEST_TEXT] * copies)
+        compiled = min(timeit.repeat(lambda: polisher._rule_based_polish(text), number=repeat, repeat=3)) / repeat
+        legacy = min(timeit.repeat(lambda: legacy_rule_based_polish(text), number=repeat, repeat=3)) / repeat
+        print(f"   • {len(text.split()):>6} words: compiled {compiled * 1e6:8.1f} µs, "
+              f"legacy {legacy * 1e6:8.1f} µs ({legacy / compiled:.1f}x)")
+
+
 if __name__ == "__main__":
-    test_safe_polishing() 
\ No newline at end of file
+    test_safe_polishing()
+    test_protected_spans_follow_edits()
+    test_compiled_program_matches_legacy_polish()
+    print("⏱️ Rule-based fluency polish micro-benchmark:")
+    benchmark_rule_based_polish() 
\ No newline at end of file
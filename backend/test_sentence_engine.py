@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Statistical equivalence of the fused sentence engine and the stage-by-stage
+rule-based steps: both are run many times on the same input and the means of
+output statistics (length, sentence count, how often each edit shows up) must
+agree within sampling error.
+"""
+
+import random
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.document import Document
+from app.services.humanizer import (
+    StylometricHumanizer, MultiDetectorObfuscator, EducationalLevelEngine, CoherenceDisruptor
+)
+from app.services.sentence_engine import sentence_engine, GPTZeroRule, LexiconRule
+
+SENTENCES = [
+    "The artificial intelligence system demonstrates remarkable capabilities in natural language processing and text generation across many different domains and use cases.",
+    "These sophisticated algorithms analyze patterns in data.",
+    "Furthermore, organizations utilize the results to facilitate decisions, and consequently they implement changes quickly.",
+    "It is good.",
+    "Machine learning technologies are revolutionizing numerous industries by providing innovative solutions for complex problems in the world today.",
+    "Researchers comprehend the significant trade-offs, and nevertheless they continue to push the boundaries of what the models can do for people.",
+    "Small teams use big models.",
+    "The implementation of these systems requires comprehensive understanding of computational linguistics, and advanced mathematical frameworks.",
+]
+TEXT = " ".join(SENTENCES * 2)
+TRIALS = 300
+
+MARKERS = ["really", "—", "…", ";", "\n\n", "...", "&", "which, considering", "Actually,", "In other words",
+           "to be honest", "Interestingly", "Subsequently", "look at", "considerable"]
+
+
+def statistics(text: str) -> np.ndarray:
+    document = Document.from_text(text)
+    tangents = sum(text.count(tangent[:12]) for tangent in MultiDetectorObfuscator.TANGENTS)
+    return np.array([document.word_count, len(document), tangents] + [text.count(marker) for marker in MARKERS], dtype=float)
+
+
+def sample(transform, trials=TRIALS) -> np.ndarray:
+    rows = []
+    for trial in range(trials):
+        random.seed(10_000 + trial)
+        rows.append(statistics(transform(Document.from_text(TEXT)).text))
+    return np.array(rows)
+
+
+def assert_equivalent(stagewise: np.ndarray, fused: np.ndarray):
+    mean_a, mean_b = stagewise.mean(axis=0), fused.mean(axis=0)
+    se = np.sqrt(stagewise.var(axis=0, ddof=1) / len(stagewise) + fused.var(axis=0, ddof=1) / len(fused))
+    # 4.5 standard errors (plus a little slack for statistics that never vary)
+    tolerance = 4.5 * se + 0.05
+    for name, a, b, tol in zip(["words", "sentences", "tangents"] + MARKERS, mean_a, mean_b, tolerance):
+        assert abs(a - b) <= tol, f"{name!r}: stage-by-stage {a:.3f} vs fused {b:.3f} (tolerance {tol:.3f})"
+
+
+def with_flag(enabled, fn):
+    def run(document):
+        previous = settings.FUSED_SENTENCE_ENGINE
+        settings.FUSED_SENTENCE_ENGINE = enabled
+        try:
+            return fn(document)
+        finally:
+            settings.FUSED_SENTENCE_ENGINE = previous
+    return run
+
+
+def test_level_adjustment_is_equivalent():
+    engine = EducationalLevelEngine()
+    for level in ("elementary", "undergraduate"):
+        def adjust(document):
+            engine.adjust_to_level(document, level)
+            return document
+        assert_equivalent(sample(with_flag(False, adjust)), sample(with_flag(True, adjust)))
+
+
+def test_stylometric_disruptions_are_equivalent():
+    stylometric = StylometricHumanizer()
+
+    def humanize(document):
+        return stylometric.humanize_text(document)["humanized_text"]
+    assert_equivalent(sample(with_flag(False, humanize)), sample(with_flag(True, humanize)))
+
+
+def test_detector_evasion_and_coherence_are_equivalent():
+    obfuscator = MultiDetectorObfuscator()
+    disruptor = CoherenceDisruptor()
+
+    def stagewise(document):
+        obfuscator.apply_multi_detector_evasion(document)
+        return disruptor.disrupt_coherence(document, paranoid_mode=True)
+
+    def fused(document):
+        return sentence_engine.run(document, obfuscator.rules() + disruptor.rules(paranoid_mode=True))
+    assert_equivalent(sample(with_flag(False, stagewise)), sample(fused))
+
+
+def test_deterministic_rules_match_exactly():
+    obfuscator = MultiDetectorObfuscator()
+    stagewise = Document.from_text(TEXT)
+    obfuscator.gptzero_evasion(stagewise)
+    obfuscator.undetectable_evasion(stagewise)
+
+    fused = sentence_engine.run(Document.from_text(TEXT), [
+        GPTZeroRule(obfuscator.SUBORDINATE_CLAUSE),
+        LexiconRule(obfuscator.sophisticated_replacements),
+    ])
+    assert fused.text == stagewise.text
+    assert fused.word_count == len(fused.text.split())
+
+
+def test_fused_output_keeps_counts_and_is_seeded():
+    obfuscator = MultiDetectorObfuscator()
+    disruptor = CoherenceDisruptor()
+    rules = obfuscator.rules() + disruptor.rules()
+    first = sentence_engine.run(Document.from_text(TEXT), rules, np.random.default_rng(5))
+    second = sentence_engine.run(Document.from_text(TEXT), rules, np.random.default_rng(5))
+    assert first.text == second.text
+    assert first.word_count == len(first.text.split())
+    assert list(first.counts) == [len(s.split()) for s in first.sentences]
+
+
+if __name__ == "__main__":
+    test_level_adjustment_is_equivalent()
+    test_stylometric_disruptions_are_equivalent()
+    test_detector_evasion_and_coherence_are_equivalent()
+    test_deterministic_rules_match_exactly()
+    test_fused_output_keeps_counts_and_is_seeded()
+    print("🎉 Fused sentence engine tests passed!")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+from app.core.config import settings
+from app.services.document import join_paragraphs
+from app.services.humanizer import humanizer
+from app.services.model_registry import ModelRegistry
+from app.services.sharding import ShardPool, shard_seeds, shard_text
+
+PARAGRAPH = ("The artificial intelligence system demonstrates remarkable capabilities in natural language "
+             "processing. Furthermore, it is important to note that these advancements offer numerous benefits. "
+             "Organizations worldwide are investing heavily in AI development and deployment.")
+
+
+def test_shards_cut_at_paragraphs_and_rejoin():
+    text = "\n\n".join([PARAGRAPH] * 6)
+    shards, separators = shard_text(text, 60)
+    assert len(shards) == 3 and all(shard.count(PARAGRAPH) == 2 for shard in shards)
+    assert join_paragraphs(shards, separators) == text
+    # A paragraph longer than the target is cut between sentences
+    long_paragraph = " ".join([PARAGRAPH] * 4)
+    shards, separators = shard_text(long_paragraph, 40)
+    assert len(shards) > 1 and join_paragraphs(shards, separators) == long_paragraph
+    assert shard_text("", 40) == ([], [])
+
+
+def test_shard_seeds_are_deterministic_and_distinct():
+    seeds = shard_seeds(42, 8)
+    assert seeds == shard_seeds(42, 8) and len(set(seeds)) == 8
+    assert shard_seeds(42, 4) == seeds[:4]
+    assert shard_seeds(43, 8) != seeds
+
+
+def test_sharded_runs_repeat_with_a_seed():
+    text = "\n\n".join([PARAGRAPH] * 12)
+    pool = ShardPool(2)
+    try:
+        first = humanizer.humanize_sharded(text, seed=9, pool=pool)
+        second = humanizer.humanize_sharded(text, seed=9, pool=pool)
+    finally:
+        pool.shutdown()
+    assert first["humanized_text"] == second["humanized_text"]
+    assert len(first["humanized_text"].split()) >= humanizer.MIN_WORDS
+    assert first["original_text"] == text and "ai_detection_score_after" in first
+
+
+def worker_models(_):
+    from app.services.model_registry import model_registry
+    return sorted(model_registry._models), dict(model_registry._errors)
+
+
+def test_shard_workers_skip_pegasus():
+    pool = ShardPool(1)
+    try:
+        [(loaded, unavailable)] = pool.map(worker_models, [0])
+    finally:
+        pool.shutdown()
+    assert "pegasus" not in loaded and unavailable["pegasus"] == "not loaded in shard workers"
+    assert "semantic" not in unavailable or unavailable["semantic"] != "not loaded in shard workers"
+
+
+def test_restricted_registry_never_loads_other_models():
+    registry = ModelRegistry()
+    loaded = []
+    registry._loaders = {name: (lambda name=name: loaded.append(name) or name) for name in registry._loaders}
+    registry.restrict(["semantic"])
+    assert registry.get("pegasus") is None and registry.get("semantic") == "semantic"
+    assert loaded == ["semantic"]
+
+
+def test_large_documents_are_sharded_when_enabled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(settings, "PARAGRAPH_SHARDING", True)
+    monkeypatch.setattr(humanizer, "humanize_sharded", lambda *args: calls.append(args) or {})
+    humanizer.humanize_text("\n\n".join([PARAGRAPH] * 40))
+    assert len(calls) == 1
+    humanizer.humanize_text(PARAGRAPH, writehuman_mode=False)
+    assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    test_shards_cut_at_paragraphs_and_rejoin()
+    test_shard_seeds_are_deterministic_and_distinct()
+    test_sharded_runs_repeat_with_a_seed()
+    test_shard_workers_skip_pegasus()
+    test_restricted_registry_never_loads_other_models()
+    print("🎉 Sharding tests passed!")
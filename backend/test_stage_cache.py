@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import random
+from collections import Counter
+
+from app.core.config import settings
+from app.services.document import Document
+from app.services.humanizer import humanizer
+from app.services.pipeline_graph import Stage, StageGraph, skip_stage_cache
+from app.services.rng import request_rng
+from app.services.stage_cache import MISSING, StageCache, content_hash, estimate_size, stage_key, stage_cache
+
+TEXT = ("The artificial intelligence system demonstrates remarkable capabilities in natural language "
+        "processing. Furthermore, it is important to note that these advancements offer numerous benefits.")
+
+
+def make_graph(calls: Counter) -> StageGraph:
+    def upstream(text):
+        calls["upstream"] += 1
+        return Document.from_text(text.upper())
+
+    def leveled(document, level):
+        calls["leveled"] += 1
+        document.set(0, f"{level}-{request_rng().integers(10 ** 9)} {document[0]}")
+        return document
+
+    def finish(document, suffix):
+        calls["finish"] += 1
+        document.append(suffix)
+        return document.text
+
+    return StageGraph([
+        Stage("upstream", upstream, ("text",), seeded=False),
+        Stage("leveled", leveled, ("upstream", "level"), per_variant=True),
+        Stage("finished", finish, ("leveled", "suffix"), per_variant=True, seeded=False),
+    ], request_inputs=("text", "suffix"), variant_key="level")
+
+
+def test_cache_is_bounded_and_returns_copies():
+    document = Document.from_text("One sentence here. Another one there.")
+    cache = StageCache(max_bytes=3 * estimate_size(document))
+    keys = [stage_key("stage", "", [content_hash(i)], None) for i in range(4)]
+    for key in keys:
+        cache.put("stage", key, document)
+    assert cache.get("stage", keys[0]) is MISSING
+    hit = cache.get("stage", keys[3])
+    hit.set(0, "Edited.")
+    assert cache.get("stage", keys[3]).text == document.text
+    assert cache.bytes <= cache.max_bytes
+    stats = cache.get_stats()["stages"]["stage"]
+    assert (stats["hits"], stats["misses"], stats["stores"], stats["evictions"]) == (2, 1, 4, 1)
+
+
+def test_downstream_change_resumes_from_cache():
+    calls, cache = Counter(), StageCache(max_bytes=1 << 20)
+    graph = make_graph(calls)
+    first = graph.run({"text": "a b. c d.", "suffix": "End."}, ["x"], seed=7, cache=cache)["x"]
+    assert calls == {"upstream": 1, "leveled": 1, "finish": 1}
+    # Only the last stage's option changed: upstream and leveled come from the cache
+    second = graph.run({"text": "a b. c d.", "suffix": "Fin."}, ["x"], seed=7, cache=cache)["x"]
+    assert calls == {"upstream": 1, "leveled": 1, "finish": 2}
+    assert second["finished"].replace("Fin.", "End.") == first["finished"]
+    # A seeded stage's output depends on the seed and its inputs only, not on what was cached
+    assert graph.run({"text": "a b. c d.", "suffix": "Fin."}, ["x"], seed=7)["x"]["finished"] == second["finished"]
+    # Another seed reuses the unseeded upstream stage only
+    graph.run({"text": "a b. c d.", "suffix": "Fin."}, ["x"], seed=8, cache=cache)
+    assert calls == {"upstream": 2, "leveled": 3, "finish": 4}  # the second upstream call was the uncached run
+    stats = cache.get_stats()["stages"]
+    assert stats["upstream"]["hits"] == 2 and stats["leveled"]["hits"] == 1
+
+
+def test_unseeded_requests_bypass_seeded_stages():
+    calls, cache = Counter(), StageCache(max_bytes=1 << 20)
+    graph = make_graph(calls)
+    for _ in range(2):
+        graph.run({"text": "a b. c d.", "suffix": "End."}, ["x", "y"], cache=cache)
+    assert calls == {"upstream": 1, "leveled": 4, "finish": 4}
+    assert cache.get_stats()["stages"]["leveled"]["bypassed"] == 4
+
+
+def test_skipped_outputs_are_not_stored():
+    cache, calls = StageCache(max_bytes=1 << 20), Counter()
+
+    def flaky(text):
+        calls["flaky"] += 1
+        skip_stage_cache()
+        return text
+
+    graph = StageGraph([Stage("out", flaky, ("text",), seeded=False)], request_inputs=("text",), variant_key="v")
+    graph.run({"text": "a"}, ["v"], cache=cache)
+    graph.run({"text": "a"}, ["v"], cache=cache)
+    assert calls["flaky"] == 2 and cache.get_stats()["entries"] == 0
+
+
+def test_humanizer_resumes_when_only_writehuman_mode_changes():
+    stage_cache.clear()
+    first = humanizer.humanize_text(TEXT, writehuman_mode=True, seed=11)
+    second = humanizer.humanize_text(TEXT, writehuman_mode=False, seed=11)
+    stats = stage_cache.get_stats()["stages"]
+    for stage in ("paraphrased", "gemini_humanized", "leveled", "optimized", "stylometric", "evaded", "expanded"):
+        assert stats[stage]["hits"] == 1, stage
+    assert stats["mimicked"]["hits"] == 0
+    assert first["paraphrased_text"] == second["paraphrased_text"]
+
+
+def test_seeded_pipeline_is_reproducible():
+    """The real graph, uncached: same inputs and seed give the same stage outputs whatever the global random state"""
+    inputs = {"text": " ".join([TEXT] * 4), "paranoid_mode": True, "writehuman_mode": True, "min_words": 250}
+    previous = settings.FUSED_SENTENCE_ENGINE
+    try:
+        for fused in (False, True):
+            settings.FUSED_SENTENCE_ENGINE = fused
+            runs = []
+            for global_seed in (0, 1):
+                random.seed(global_seed)
+                values = humanizer.graph.run(inputs, ["undergraduate", "phd"], seed=11,
+                                             namespace=humanizer.cache_namespace())
+                runs.append({level: {name: str(value) for name, value in branch.items()}
+                             for level, branch in values.items()})
+            assert runs[0] == runs[1], f"fused={fused}"
+    finally:
+        settings.FUSED_SENTENCE_ENGINE = previous
+
+
+if __name__ == "__main__":
+    test_cache_is_bounded_and_returns_copies()
+    test_downstream_change_resumes_from_cache()
+    test_unseeded_requests_bypass_seeded_stages()
+    test_skipped_outputs_are_not_stored()
+    test_humanizer_resumes_when_only_writehuman_mode_changes()
+    test_seeded_pipeline_is_reproducible()
+    print("🎉 Stage cache tests passed!")
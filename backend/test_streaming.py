@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import asyncio
+import io
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import humanize
+from app.core.config import settings
+from app.services.document import split_paragraphs
+from app.services.streaming import UploadTooLargeError, humanize_stream, iter_paragraphs, iter_upload_text
+
+PARAGRAPHS = [
+    "The artificial intelligence system demonstrates remarkable capabilities in natural language processing.",
+    "Furthermore, it is important to note that these advancements offer numerous benefits — naïvely or not.",
+    "Organizations worldwide are investing heavily in AI development and deployment.",
+]
+
+app = FastAPI()
+app.include_router(humanize.router, prefix="/api/humanize")
+client = TestClient(app)
+
+
+class ChunkedFile:
+    """Async reads from bytes, like UploadFile"""
+
+    def __init__(self, data: bytes):
+        self.buffer = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.buffer.read(size)
+
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+def test_upload_is_decoded_across_chunk_boundaries():
+    text = "\n\n".join(PARAGRAPHS)
+    chunks = asyncio.run(collect(iter_upload_text(ChunkedFile(text.encode("utf-8")), chunk_size=7)))
+    assert "".join(chunks) == text and len(chunks) > 10
+    try:
+        asyncio.run(collect(iter_upload_text(ChunkedFile(text.encode("utf-8")), chunk_size=7, max_bytes=50)))
+        assert False, "expected UploadTooLargeError"
+    except UploadTooLargeError:
+        pass
+
+
+def test_paragraphs_stream_like_a_whole_text_split():
+    text = "\n\n" + PARAGRAPHS[0] + "\n\n\n" + PARAGRAPHS[1] + "\n  \n" + PARAGRAPHS[2] + "\n"
+    for size in (1, 5, 64, len(text)):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        streamed = asyncio.run(collect(iter_paragraphs(aiter(chunks))))
+        assert [paragraph for _, paragraph in streamed] == split_paragraphs(text)[0]
+        assert [separator for separator, _ in streamed][1:] == split_paragraphs(text)[1]
+
+
+def test_long_paragraphs_are_cut_between_sentences():
+    paragraph = " ".join(PARAGRAPHS * 10)
+    pieces = asyncio.run(collect(iter_paragraphs(aiter([paragraph[i:i + 100] for i in range(0, len(paragraph), 100)]),
+                                                 max_chars=400)))
+    assert len(pieces) > 1 and all(len(piece) <= 400 for _, piece in pieces)
+    assert "".join(separator + piece for separator, piece in pieces) == paragraph
+
+
+def test_stream_humanizes_paragraph_by_paragraph():
+    class Pipeline:
+        def humanize_paragraph(self, paragraph, *args):
+            return paragraph.upper()
+
+    chunks = aiter(["\n\n".join(PARAGRAPHS)[i:i + 16] for i in range(0, 400, 16)])
+    parts = asyncio.run(collect(humanize_stream(chunks, pipeline=Pipeline())))
+    assert parts == [PARAGRAPHS[0].upper(), "\n\n" + PARAGRAPHS[1].upper(), "\n\n" + PARAGRAPHS[2].upper()]
+
+
+def test_stream_endpoint(monkeypatch):
+    data = "\n\n".join(PARAGRAPHS).encode("utf-8")
+    response = client.post("/api/humanize/file/stream?writehuman_mode=false", files={"file": ("essay.txt", data)})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="essay_humanized.txt"'
+    assert len(response.text.split()) >= len(data.split()) // 2
+
+    monkeypatch.setattr(settings, "STREAM_MAX_FILE_SIZE", 100)
+    assert client.post("/api/humanize/file/stream", files={"file": ("essay.txt", data)}).status_code == 400
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 100)
+    assert client.post("/api/humanize/file", files={"file": ("essay.txt", data)}).status_code == 400
+
+
+if __name__ == "__main__":
+    test_upload_is_decoded_across_chunk_boundaries()
+    test_paragraphs_stream_like_a_whole_text_split()
+    test_long_paragraphs_are_cut_between_sentences()
+    test_stream_humanizes_paragraph_by_paragraph()
+    print("🎉 Streaming tests passed!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import subprocess
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import humanize
+from app.core.config import settings
+from app.services.ai_likeness import ai_likeness_scorer
+from app.services.language_model import language_model
+from app.services.text_scoring import text_scorer
+
+AI_TEXT = ("The artificial intelligence system demonstrates remarkable capabilities in natural language "
+           "processing. Furthermore, it is important to note that these advancements offer numerous benefits.")
+HUMAN_TEXT = "We got lost on the way to the lake. Nobody was angry, though! We ate sandwiches in the car."
+
+app = FastAPI()
+app.include_router(humanize.router, prefix="/api/humanize")
+client = TestClient(app)
+
+
+def test_batch_scores_match_single_text_scores():
+    texts = [AI_TEXT, HUMAN_TEXT, "", "... !!!"]
+    results = text_scorer.score_batch(texts)
+    for text, result in zip(texts, results):
+        scores = language_model.score(text)
+        assert result["ai_likeness"] == round(ai_likeness_scorer.score(text), 4)
+        assert result["perplexity"] == round(scores.perplexity_percentile, 2)
+        assert result["burstiness"] == round(scores.burstiness, 4)
+    assert results[1]["sentence_count"] == 3
+    assert results[1]["readability"]["words_per_sentence"] == 6.33
+    assert results[2]["word_count"] == 0 and results[2]["perplexity"] == 0.0
+
+
+def test_sentence_scores_line_up_with_sentences():
+    result, = text_scorer.score_batch(["First one here. ?! And the last sentence."], per_sentence=True)
+    sentences = result["sentences"]
+    assert [s["text"] for s in sentences] == ["First one here.", "?!", "And the last sentence."]
+    assert sentences[1]["perplexity"] is None  # no tokens to score
+    perplexities = language_model.score("First one here. And the last sentence.").sentence_perplexities
+    assert [sentences[0]["perplexity"], sentences[2]["perplexity"]] == [round(p, 2) for p in perplexities]
+
+
+def test_score_endpoint():
+    response = client.post("/api/humanize/score", json={"texts": [AI_TEXT, HUMAN_TEXT], "per_sentence": True})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["ai_likeness"] > results[1]["ai_likeness"]
+    assert len(results[1]["sentences"]) == 3
+    assert client.post("/api/humanize/score", json={"texts": [AI_TEXT]}).json()["results"][0]["sentences"] is None
+
+
+def test_score_endpoint_limits():
+    assert client.post("/api/humanize/score", json={"texts": []}).status_code == 400
+    too_many = {"texts": ["x"] * (settings.SCORE_MAX_TEXTS + 1)}
+    assert client.post("/api/humanize/score", json=too_many).status_code == 400
+
+
+def test_scoring_does_not_import_the_humanizer():
+    # A fresh interpreter: this test module already imports the humanizer through the API
+    check = "import sys, app.services.text_scoring; print('app.services.humanizer' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+if __name__ == "__main__":
+    test_batch_scores_match_single_text_scores()
+    test_sentence_scores_line_up_with_sentences()
+    test_score_endpoint()
+    test_score_endpoint_limits()
+    test_scoring_does_not_import_the_humanizer()
+    print("🎉 Text scoring tests passed!")